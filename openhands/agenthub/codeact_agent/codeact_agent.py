@@ -26,6 +26,7 @@ from openhands.core.logger import openhands_logger as logger
 from openhands.core.message import Message
 from openhands.events.action import AgentFinishAction, MessageAction
 from openhands.events.event import Event
+from openhands.llm.async_llm import AsyncLLM
 from openhands.llm.llm import LLM
 from openhands.llm.llm_utils import check_tools
 from openhands.memory.condenser import Condenser
@@ -36,6 +37,7 @@ from openhands.runtime.plugins import (
     JupyterRequirement,
     PluginRequirement,
 )
+from openhands.utils.async_utils import call_sync_from_async
 from openhands.utils.prompt import PromptManager
 
 
@@ -155,6 +157,24 @@ class CodeActAgent(Agent):
         - MessageAction(content) - Message action to run (e.g. ask for clarification)
         - AgentFinishAction() - end the interaction
         """
+        params = self._prepare_step(state)
+        if not isinstance(params, dict):
+            return params
+        response = self.llm.completion(**params)
+        return self._handle_response(response)
+
+    async def astep(self, state: State) -> 'Action':
+        """Performs one step like `step`, awaiting the LLM without blocking the event loop."""
+        # The condenser may call the LLM synchronously, so it runs in a worker thread
+        params = await call_sync_from_async(self._prepare_step, state)
+        if not isinstance(params, dict):
+            return params
+        assert isinstance(self.llm, AsyncLLM)
+        response = await self.llm.async_completion(**params)
+        return self._handle_response(response)
+
+    def _prepare_step(self, state: State) -> 'Action | dict':
+        """The action to return without asking the LLM, or the parameters of the completion call."""
         # Continue with pending actions if any
         if self.pending_actions:
             return self.pending_actions.popleft()
@@ -187,7 +207,9 @@ class CodeActAgent(Agent):
         }
         params['tools'] = check_tools(self.tools, self.llm.config)
         params['extra_body'] = {'metadata': state.to_llm_metadata(agent_name=self.name)}
-        response = self.llm.completion(**params)
+        return params
+
+    def _handle_response(self, response: 'ModelResponse') -> 'Action':
         logger.debug(f'Response from LLM: {response}')
         actions = self.response_to_actions(response)
         logger.debug(f'Actions after response_to_actions: {actions}')
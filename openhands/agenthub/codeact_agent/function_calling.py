@@ -89,7 +89,11 @@ def response_to_actions(
                     )
                 # convert is_input to boolean
                 is_input = arguments.get('is_input', 'false') == 'true'
-                action = CmdRunAction(command=arguments['command'], is_input=is_input)
+                action = CmdRunAction(
+                    command=arguments['command'],
+                    is_input=is_input,
+                    session_id=arguments.get('session_id') or None,
+                )
 
                 # Set hard timeout if provided
                 if 'timeout' in arguments:
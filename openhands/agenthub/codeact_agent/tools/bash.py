@@ -17,6 +17,7 @@ _DETAILED_BASH_DESCRIPTION = """Execute a bash command in the terminal within a
   - Send empty `command` to retrieve additional logs
   - Send text (set `command` to the text) to STDIN of the running process
   - Send control commands like `C-c` (Ctrl+C), `C-d` (Ctrl+D), or `C-z` (Ctrl+Z) to interrupt the process
+* Separate sessions: Set `session_id` to run a command in another named shell session, e.g. a dev server or a test watcher in `server`. Each session has its own working directory and environment, and a command still running in one session does not block the others.
 
 ### Best Practices
 * Directory verification: Before creating new directories or files, first verify the parent directory exists and is the correct location.
@@ -69,6 +70,12 @@ def create_cmd_run_tool(
                         'type': 'number',
                         'description': 'Optional. Sets a hard timeout in seconds for the command execution. If not provided, the command will use the default soft timeout behavior.',
                     },
+                    'session_id': {
+                        'type': 'string',
+                        'description': refine_prompt(
+                            'Optional. The name of the shell session to run the command in, which is started on first use. If not provided, the command runs in the default session.'
+                        ),
+                    },
                 },
                 'required': ['command'],
             },
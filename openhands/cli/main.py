@@ -79,6 +79,7 @@ async def cleanup_session(
 
     event_stream = runtime.event_stream
     end_state = controller.get_state()
+    event_stream.flush()
     end_state.save_to_session(
         event_stream.sid,
         event_stream.file_store,
@@ -19,6 +19,7 @@ from openhands.core.logger import openhands_logger as logger
 from openhands.events.event import EventSource
 from openhands.llm.llm import LLM
 from openhands.runtime.plugins import PluginRequirement
+from openhands.utils.async_utils import call_sync_from_async
 
 
 class Agent(ABC):
@@ -102,6 +103,15 @@ class Agent(ABC):
         """
         pass
 
+    async def astep(self, state: 'State') -> 'Action':
+        """Performs a step like `step`, without blocking the event loop.
+
+        The controller uses it if the agent's LLM is an `AsyncLLM`, and steps
+        other agents with `step`. By default `step` runs in a worker thread;
+        agents override this to await the LLM instead.
+        """
+        return await call_sync_from_async(self.step, state)
+
     def reset(self) -> None:
         """Resets the agent's execution status and clears the history. This method can be used
         to prepare the agent for restarting the instruction or cleaning up before destruction.
@@ -70,6 +70,7 @@ from openhands.events.observation import (
     Observation,
 )
 from openhands.events.serialization.event import event_to_trajectory, truncate_content
+from openhands.llm.async_llm import AsyncLLM
 from openhands.llm.llm import LLM
 from openhands.llm.metrics import Metrics, TokenUsage
 from openhands.memory.view import View
@@ -140,8 +141,27 @@ class AgentController:
         # the event stream must be set before maybe subscribing to it
         self.event_stream = event_stream
 
+        # the running `astep` of the agent, cancelled if the agent is stopped meanwhile
+        self._agent_step_task: asyncio.Task | None = None
+
+        # the `num_records` of the agent and condenser metrics when the last
+        # action got its metrics. Records made before this controller are not
+        # added to its actions.
+        self._agent_metrics_start = agent.llm.metrics.num_records
+        self._condenser_metrics_start = (0, 0, 0)
+        condenser = getattr(agent, 'condenser', None)
+        if hasattr(condenser, 'llm'):
+            self._condenser_metrics_start = condenser.llm.metrics.num_records
+
         # subscribe to the event stream if this is not a delegate
         if not self.is_delegate:
+            # on_event runs the agent step, so stop requests queued behind it
+            # are watched for separately, to cancel the step right away
+            self.event_stream.subscribe(
+                EventStreamSubscriber.AGENT_CONTROLLER,
+                self._on_stop_requested,
+                self._stop_callback_id,
+            )
             self.event_stream.subscribe(
                 EventStreamSubscriber.AGENT_CONTROLLER, self.on_event, self.id
             )
@@ -241,6 +261,9 @@ class AgentController:
             self.event_stream.unsubscribe(
                 EventStreamSubscriber.AGENT_CONTROLLER, self.id
             )
+            self.event_stream.unsubscribe(
+                EventStreamSubscriber.AGENT_CONTROLLER, self._stop_callback_id
+            )
         self._closed = True
 
     def log(self, level: str, message: str, extra: dict | None = None) -> None:
@@ -482,7 +505,12 @@ class AgentController:
         )
 
         if observation.llm_metrics is not None:
-            self.agent.llm.metrics.merge(observation.llm_metrics)
+            metrics = self.agent.llm.metrics
+            caught_up = metrics.num_records == self._agent_metrics_start
+            metrics.merge(observation.llm_metrics)
+            if caught_up:
+                # the observation carries these records already
+                self._agent_metrics_start = metrics.num_records
 
         # this happens for runnable actions and microagent actions
         if self._pending_action and self._pending_action.id == observation.cause:
@@ -605,6 +633,7 @@ class AgentController:
             return
 
         if new_state in (AgentState.STOPPED, AgentState.ERROR):
+            self._cancel_agent_step()
             # sync existing metrics BEFORE resetting the agent
             await self.update_state_after_step()
             self.state.metrics.merge(self.state.local_metrics)
@@ -686,7 +715,8 @@ class AgentController:
         agent_cls: type[Agent] = Agent.get_cls(action.agent)
         agent_config = self.agent_configs.get(action.agent, self.agent.config)
         llm_config = self.agent_to_llm_config.get(action.agent, self.agent.llm.config)
-        llm = LLM(config=llm_config, retry_listener=self._notify_on_llm_retry)
+        llm_cls = AsyncLLM if agent_config.enable_async_step else LLM
+        llm = llm_cls(config=llm_config, retry_listener=self._notify_on_llm_retry)
         delegate_agent = agent_cls(llm=llm, config=agent_config)
         state = State(
             session_id=self.id.removesuffix('-delegate'),
@@ -776,6 +806,38 @@ class AgentController:
         # unset delegate so parent can resume normal handling
         self.delegate = None
 
+    async def _agent_step(self) -> Action:
+        """Asks the agent for its next action, without blocking the event loop if its LLM is an `AsyncLLM`."""
+        if not isinstance(self.agent.llm, AsyncLLM):
+            return self.agent.step(self.state)
+        self._agent_step_task = asyncio.create_task(self.agent.astep(self.state))
+        try:
+            return await self._agent_step_task
+        finally:
+            self._agent_step_task = None
+
+    def _cancel_agent_step(self) -> None:
+        """Cancels the running `astep` of the agent, if any. Safe to call from any thread."""
+        task = self._agent_step_task
+        if task is not None and not task.done():
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+    @property
+    def _stop_callback_id(self) -> str:
+        return f'{self.id}-stop'
+
+    def _on_stop_requested(self, event: Event) -> None:
+        """Cancels the running steps of this controller and its delegates when the agent is stopped or paused."""
+        if not isinstance(event, ChangeAgentStateAction) or event.agent_state not in (
+            AgentState.STOPPED,
+            AgentState.PAUSED,
+        ):
+            return
+        controller: AgentController | None = self
+        while controller is not None:
+            controller._cancel_agent_step()
+            controller = controller.delegate
+
     async def _step(self) -> None:
         """Executes a single step of the parent or delegate agent. Detects stuck agents and limits on the number of iterations and the task budget."""
         if self.get_agent_state() != AgentState.RUNNING:
@@ -832,7 +894,7 @@ class AgentController:
             action = self._replay_manager.step()
         else:
             try:
-                action = self.agent.step(self.state)
+                action = await self._agent_step()
                 if action is None:
                     raise LLMNoActionError('No action was returned')
                 action._source = EventSource.AGENT  # type: ignore [attr-defined]
@@ -850,6 +912,13 @@ class AgentController:
                     EventSource.AGENT,
                 )
                 return
+            except asyncio.CancelledError:
+                current_task = asyncio.current_task()
+                if current_task is not None and current_task.cancelling():
+                    raise
+                # the agent was stopped while waiting for the LLM: drop the step
+                self.log('info', 'Agent step cancelled')
+                return
             except (ContextWindowExceededError, BadRequestError, OpenAIError) as e:
                 # FIXME: this is a hack until a litellm fix is confirmed
                 # Check if this is a nested context window error
@@ -1346,12 +1415,26 @@ class AgentController:
 
         return self._stuck_detector.is_stuck(self.headless_mode)
 
+    @staticmethod
+    def _add_step_records(
+        metrics: Metrics, source: Metrics, start: tuple[int, int, int]
+    ) -> tuple[int, int, int]:
+        """Adds the records of `source` from `start` to `metrics` and returns where they end."""
+        end = source.num_records
+        if any(first > last for first, last in zip(start, end)):
+            # the source metrics were reset since
+            start = (0, 0, 0)
+        metrics.add_records(source, start)
+        return end
+
     def _prepare_metrics_for_frontend(self, action: Action) -> None:
         """Create a minimal metrics object for frontend display and log it.
 
         To avoid performance issues with long conversations, we only keep:
         - accumulated_cost: The current total cost
         - accumulated_token_usage: Accumulated token statistics across all API calls
+        - the cost, latency and token usage records of the LLM calls made since
+          the previous action, so that each record is stored in one event only
 
         This includes metrics from both the agent's LLM and the condenser's LLM if it exists.
 
@@ -1376,15 +1459,21 @@ class AgentController:
 
         # Set accumulated token usage (sum of agent and condenser token usage)
         # Use a deep copy to ensure we don't modify the original object
-        metrics._accumulated_token_usage = (
-            agent_metrics.accumulated_token_usage.model_copy(deep=True)
-        )
+        metrics.accumulated_token_usage = agent_metrics.accumulated_token_usage
         if condenser_metrics:
-            metrics._accumulated_token_usage = (
-                metrics._accumulated_token_usage
+            metrics.accumulated_token_usage = (
+                metrics.accumulated_token_usage
                 + condenser_metrics.accumulated_token_usage
             )
 
+        self._agent_metrics_start = self._add_step_records(
+            metrics, agent_metrics, self._agent_metrics_start
+        )
+        if condenser_metrics:
+            self._condenser_metrics_start = self._add_step_records(
+                metrics, condenser_metrics, self._condenser_metrics_start
+            )
+
         action.llm_metrics = metrics
 
         # Log the metrics information for debugging
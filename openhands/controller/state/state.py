@@ -5,7 +5,7 @@ import os
 import pickle
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any
+from typing import Any, Iterable
 
 import openhands
 from openhands.core.logger import openhands_logger as logger
@@ -15,8 +15,9 @@ from openhands.events.action import (
 )
 from openhands.events.action.agent import AgentFinishAction
 from openhands.events.event import Event, EventSource
+from openhands.events.event_store import EventStore
 from openhands.llm.metrics import Metrics
-from openhands.memory.view import View
+from openhands.memory.view import IncrementalView, View
 from openhands.storage.files import FileStore
 from openhands.storage.locations import get_conversation_agent_state_filename
 
@@ -157,6 +158,11 @@ class State:
             logger.debug(f'Could not restore state from session: {e}')
             raise e
 
+        if not any(state.metrics.num_records):
+            state.restore_metric_records(
+                EventStore(sid, file_store, user_id).search_events()
+            )
+
         # update state
         if state.agent_state in RESUMABLE_STATES:
             state.resume_state = state.agent_state
@@ -167,6 +173,16 @@ class State:
         state.agent_state = AgentState.LOADING
         return state
 
+    def restore_metric_records(self, events: Iterable[Event]) -> None:
+        """Adds the record of each LLM call to the metrics, from the llm_metrics of the events.
+
+        Only the totals of the metrics are pickled. Each record is kept in the
+        event of the step that made the call.
+        """
+        for event in events:
+            if event.llm_metrics is not None:
+                self.metrics.add_records(event.llm_metrics)
+
     def __getstate__(self) -> dict:
         # don't pickle history, it will be restored from the event stream
         state = self.__dict__.copy()
@@ -174,8 +190,12 @@ class State:
 
         # Remove any view caching attributes. They'll be rebuilt frmo the
         # history after that gets reloaded.
-        state.pop('_history_checksum', None)
-        state.pop('_view', None)
+        state.pop('_incremental_view', None)
+
+        # only keep the totals of the metrics, the record of each LLM call is
+        # in the llm_metrics of the event of its step
+        state['metrics'] = self.metrics.totals()
+        state['local_metrics'] = self.local_metrics.totals()
 
         return state
 
@@ -225,15 +245,9 @@ class State:
 
     @property
     def view(self) -> View:
-        # Compute a simple checksum from the history to see if we can re-use any
-        # cached view.
-        history_checksum = len(self.history)
-        old_history_checksum = getattr(self, '_history_checksum', -1)
-
-        # If the history has changed, we need to re-create the view and update
-        # the caching.
-        if history_checksum != old_history_checksum:
-            self._history_checksum = history_checksum
-            self._view = View.from_events(self.history)
-
-        return self._view
+        # The incremental view only processes the events appended since the last
+        # call, and returns the same view object if there are none.
+        incremental_view = getattr(self, '_incremental_view', None)
+        if incremental_view is None:
+            incremental_view = self._incremental_view = IncrementalView()
+        return incremental_view.get_view(self.history)
@@ -1,3 +1,5 @@
+from collections import deque
+
 from openhands.controller.state.state import State
 from openhands.core.logger import openhands_logger as logger
 from openhands.events.action.action import Action
@@ -24,10 +26,31 @@ class StuckDetector:
 
     def __init__(self, state: State):
         self.state = state
+        # The history list seen last, to only process the events appended since
+        self._history: list[Event] | None = None
+        self._num_history_events = 0
+        self._last_history_event: Event | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        # Events of the history are numbered once user messages and null events
+        # are filtered out. Only the few recent ones the scenarios look at are kept.
+        self._num_filtered_events = 0
+        # Number of filtered events before the last user message
+        self._last_user_message_position = 0
+        self._last_observation_position = -1
+        self._last_actions: deque[tuple[int, Event]] = deque(maxlen=6)
+        self._last_observations: deque[tuple[int, Event]] = deque(maxlen=6)
+        # Agent messages, with the position of the last observation before them
+        self._last_agent_messages: deque[tuple[int, Event, int]] = deque(maxlen=3)
+        self._last_condensation_positions: deque[int] = deque(maxlen=10)
 
     def is_stuck(self, headless_mode: bool = True) -> bool:
         """Checks if the agent is stuck in a loop.
 
+        Only the events added to the history since the last call are processed,
+        unless the history was replaced or changed other than by appending.
+
         Args:
             headless_mode: Matches AgentController's headless_mode.
                           If True: Consider all history (automated/testing)
@@ -36,79 +59,104 @@ class StuckDetector:
         Returns:
             bool: True if the agent is stuck in a loop, False otherwise.
         """
-        if not headless_mode:
-            # In interactive mode, only look at history after the last user message
-            last_user_msg_idx = -1
-            for i, event in enumerate(reversed(self.state.history)):
-                if (
-                    isinstance(event, MessageAction)
-                    and event.source == EventSource.USER
-                ):
-                    last_user_msg_idx = len(self.state.history) - i - 1
-                    break
-
-            history_to_check = self.state.history[last_user_msg_idx + 1 :]
-        else:
-            # In headless mode, look at all history
-            history_to_check = self.state.history
+        self._update()
 
-        # Filter out user messages and null events
-        filtered_history = [
-            event
-            for event in history_to_check
-            if not (
-                # Filter works elegantly in both modes:
-                # - In headless: actively filters out user messages from full history
-                # - In non-headless: no-op since we already sliced after last user message
-                (isinstance(event, MessageAction) and event.source == EventSource.USER)
-                # there might be some NullAction or NullObservation in the history at least for now
-                or isinstance(event, (NullAction, NullObservation))
-            )
-        ]
+        # In interactive mode, only look at history after the last user message
+        start = 0 if headless_mode else self._last_user_message_position
+        num_filtered_events = self._num_filtered_events - start
 
         # it takes 3 actions minimum to detect a loop, otherwise nothing to do here
-        if len(filtered_history) < 3:
+        if num_filtered_events < 3:
             return False
 
-        # the first few scenarios detect 3 or 4 repeated steps
-        # prepare the last 4 actions and observations, to check them out
-        last_actions: list[Event] = []
-        last_observations: list[Event] = []
-
-        # retrieve the last four actions and observations starting from the end of history, wherever they are
-        for event in reversed(filtered_history):
-            if isinstance(event, Action) and len(last_actions) < 4:
-                last_actions.append(event)
-            elif isinstance(event, Observation) and len(last_observations) < 4:
-                last_observations.append(event)
-
-            if len(last_actions) == 4 and len(last_observations) == 4:
-                break
+        # the last six actions and observations, starting from the end of history
+        last_actions = [
+            event
+            for position, event in reversed(self._last_actions)
+            if position >= start
+        ]
+        last_observations = [
+            event
+            for position, event in reversed(self._last_observations)
+            if position >= start
+        ]
 
+        # the first few scenarios detect 3 or 4 repeated steps
         # scenario 1: same action, same observation
-        if self._is_stuck_repeating_action_observation(last_actions, last_observations):
+        if self._is_stuck_repeating_action_observation(
+            last_actions[:4], last_observations[:4]
+        ):
             return True
 
         # scenario 2: same action, errors
-        if self._is_stuck_repeating_action_error(last_actions, last_observations):
+        if self._is_stuck_repeating_action_error(
+            last_actions[:4], last_observations[:4]
+        ):
             return True
 
         # scenario 3: monologue
-        if self._is_stuck_monologue(filtered_history):
+        if self._is_stuck_monologue(start):
             return True
 
         # scenario 4: action, observation pattern on the last six steps
-        if len(filtered_history) >= 6:
-            if self._is_stuck_action_observation_pattern(filtered_history):
+        if num_filtered_events >= 6:
+            if self._is_stuck_action_observation_pattern(
+                last_actions, last_observations
+            ):
                 return True
 
         # scenario 5: context window error loop
-        if len(filtered_history) >= 10:
-            if self._is_stuck_context_window_error(filtered_history):
+        if num_filtered_events >= 10:
+            if self._is_stuck_context_window_error(start):
                 return True
 
         return False
 
+    def _update(self) -> None:
+        history = self.state.history
+        num_events = len(history)
+        appended = (
+            history is self._history
+            and num_events >= self._num_history_events
+            and (
+                self._num_history_events == 0
+                or history[self._num_history_events - 1] is self._last_history_event
+            )
+        )
+        if appended:
+            new_events = history[self._num_history_events :]
+        else:
+            self._reset()
+            new_events = history
+        for event in new_events:
+            self._add_event(event)
+        self._history = history
+        self._num_history_events = num_events
+        self._last_history_event = history[-1] if history else None
+
+    def _add_event(self, event: Event) -> None:
+        if isinstance(event, MessageAction) and event.source == EventSource.USER:
+            # User messages are filtered out; in interactive mode they also reset the history to check
+            self._last_user_message_position = self._num_filtered_events
+            return
+        # there might be some NullAction or NullObservation in the history at least for now
+        if isinstance(event, (NullAction, NullObservation)):
+            return
+
+        position = self._num_filtered_events
+        self._num_filtered_events += 1
+        if isinstance(event, Action):
+            self._last_actions.append((position, event))
+            if isinstance(event, MessageAction) and event.source == EventSource.AGENT:
+                self._last_agent_messages.append(
+                    (position, event, self._last_observation_position)
+                )
+        elif isinstance(event, Observation):
+            self._last_observations.append((position, event))
+            self._last_observation_position = position
+            if isinstance(event, AgentCondensationObservation):
+                self._last_condensation_positions.append(position)
+
     def _is_stuck_repeating_action_observation(
         self, last_actions: list[Event], last_observations: list[Event]
     ) -> bool:
@@ -255,20 +303,15 @@ class StuckDetector:
         # and the 3rd-to-last line is identical across all occurrences
         return len(error_lines) == 3 and len(set(error_lines)) == 1
 
-    def _is_stuck_monologue(self, filtered_history: list[Event]) -> bool:
+    def _is_stuck_monologue(self, start: int) -> bool:
         # scenario 3: monologue
         # check for repeated MessageActions with source=AGENT
         # see if the agent is engaged in a good old monologue, telling itself the same thing over and over
-        agent_message_actions = [
-            (i, event)
-            for i, event in enumerate(filtered_history)
-            if isinstance(event, MessageAction) and event.source == EventSource.AGENT
-        ]
-
         # last three message actions will do for this check
-        if len(agent_message_actions) >= 3:
-            last_agent_message_actions = agent_message_actions[-3:]
-
+        last_agent_message_actions = [
+            message for message in self._last_agent_messages if message[0] >= start
+        ]
+        if len(last_agent_message_actions) >= 3:
             if all(
                 (last_agent_message_actions[0][1] == action[1])
                 for action in last_agent_message_actions
@@ -276,38 +319,19 @@ class StuckDetector:
                 # check if there are any observations between the repeated MessageActions
                 # then it's not yet a loop, maybe it can recover
                 start_index = last_agent_message_actions[0][0]
-                end_index = last_agent_message_actions[-1][0]
+                last_observation_index = last_agent_message_actions[-1][2]
 
-                has_observation_between = False
-                for event in filtered_history[start_index + 1 : end_index]:
-                    if isinstance(event, Observation):
-                        has_observation_between = True
-                        break
-
-                if not has_observation_between:
+                if last_observation_index <= start_index:
                     logger.warning('Repeated MessageAction with source=AGENT detected')
                     return True
         return False
 
     def _is_stuck_action_observation_pattern(
-        self, filtered_history: list[Event]
+        self, last_six_actions: list[Event], last_six_observations: list[Event]
     ) -> bool:
         # scenario 4: action, observation pattern on the last six steps
         # check if the agent repeats the same (Action, Observation)
         # every other step in the last six steps
-        last_six_actions: list[Event] = []
-        last_six_observations: list[Event] = []
-
-        # the end of history is most interesting
-        for event in reversed(filtered_history):
-            if isinstance(event, Action) and len(last_six_actions) < 6:
-                last_six_actions.append(event)
-            elif isinstance(event, Observation) and len(last_six_observations) < 6:
-                last_six_observations.append(event)
-
-            if len(last_six_actions) == 6 and len(last_six_observations) == 6:
-                break
-
         # this pattern is every other step, like:
         # (action_1, obs_1), (action_2, obs_2), (action_1, obs_1), (action_2, obs_2),...
         if len(last_six_actions) == 6 and len(last_six_observations) == 6:
@@ -333,7 +357,7 @@ class StuckDetector:
                 return True
         return False
 
-    def _is_stuck_context_window_error(self, filtered_history: list[Event]) -> bool:
+    def _is_stuck_context_window_error(self, start: int) -> bool:
         """Detects if we're stuck in a loop of context window errors.
 
         This happens when we repeatedly get context window errors and try to trim,
@@ -342,38 +366,26 @@ class StuckDetector:
         events between them.
 
         Args:
-            filtered_history: List of filtered events to check
+            start: Position of the first filtered event to check
 
         Returns:
             bool: True if we detect a context window error loop
         """
-        # Look for AgentCondensationObservation events
-        condensation_events = [
-            (i, event)
-            for i, event in enumerate(filtered_history)
-            if isinstance(event, AgentCondensationObservation)
+        # Get the last 10 condensation events
+        last_condensation_positions = [
+            position
+            for position in self._last_condensation_positions
+            if position >= start
         ]
 
         # Need at least 10 condensation events to detect a loop
-        if len(condensation_events) < 10:
+        if len(last_condensation_positions) < 10:
             return False
 
-        # Get the last 10 condensation events
-        last_condensation_events = condensation_events[-10:]
-
-        # Check if there are any non-condensation events between them
-        for i in range(len(last_condensation_events) - 1):
-            start_idx = last_condensation_events[i][0]
-            end_idx = last_condensation_events[i + 1][0]
-
-            # Look for any non-condensation events between these two
-            has_other_events = False
-            for event in filtered_history[start_idx + 1 : end_idx]:
-                if not isinstance(event, AgentCondensationObservation):
-                    has_other_events = True
-                    break
-
-            if not has_other_events:
+        # Check if there are any non-condensation events between them: as they
+        # are consecutive condensation events, any event between them is another one
+        for i in range(len(last_condensation_positions) - 1):
+            if last_condensation_positions[i + 1] == last_condensation_positions[i] + 1:
                 logger.warning(
                     'Context window error loop detected - repeated condensation events'
                 )
@@ -38,6 +38,8 @@ class AgentConfig(BaseModel):
     """Whether history should be truncated to continue the session when hitting LLM context length limit."""
     enable_som_visual_browsing: bool = Field(default=True)
     """Whether to enable SoM (Set of Marks) visual browsing."""
+    enable_async_step: bool = Field(default=False)
+    """Whether to give the agent an AsyncLLM, so agents implementing `astep` do not block the controller's event loop while waiting for the LLM, and can be cancelled when stopped."""
     condenser: CondenserConfig = Field(
         default_factory=lambda: NoOpCondenserConfig(type='noop')
     )
@@ -25,6 +25,11 @@ class ObservationMaskingCondenserConfig(BaseModel):
         description='The number of most-recent events where observations will not be masked.',
         ge=1,
     )
+    mask_chunk_size: int = Field(
+        default=1,
+        description='The number of events by which the masked prefix grows at once. Larger chunks keep the prompt prefix unchanged, and cached by the LLM provider, between maskings.',
+        ge=1,
+    )
 
     model_config = {'extra': 'forbid'}
 
@@ -82,6 +87,13 @@ class LLMSummarizingCondenserConfig(BaseModel):
         description='Maximum length of the event representations to be passed to the LLM.',
     )
 
+    background_threshold: float | None = Field(
+        default=None,
+        description='Fraction of max_size at which to start condensing in the background, ahead of the limit. None to only condense at the limit.',
+        gt=0,
+        le=1,
+    )
+
     model_config = {'extra': 'forbid'}
 
 
@@ -125,6 +137,13 @@ class LLMAttentionCondenserConfig(BaseModel):
         ge=0,
     )
 
+    background_threshold: float | None = Field(
+        default=None,
+        description='Fraction of max_size at which to start condensing in the background, ahead of the limit. None to only condense at the limit.',
+        gt=0,
+        le=1,
+    )
+
     model_config = {'extra': 'forbid'}
 
 
@@ -152,6 +171,13 @@ class StructuredSummaryCondenserConfig(BaseModel):
         description='Maximum length of the event representations to be passed to the LLM.',
     )
 
+    background_threshold: float | None = Field(
+        default=None,
+        description='Fraction of max_size at which to start condensing in the background, ahead of the limit. None to only condense at the limit.',
+        gt=0,
+        le=1,
+    )
+
     model_config = {'extra': 'forbid'}
 
 
@@ -42,6 +42,11 @@ class LLMConfig(BaseModel):
         log_completions: Whether to log LLM completions to the state.
         log_completions_folder: The folder to log LLM completions to. Required if log_completions is True.
         custom_tokenizer: A custom tokenizer to use for token counting.
+        cache_completions: Whether to reuse the responses stored in the completion cache, and store new ones. For replays and evaluations.
+        cache_completions_folder: The folder of the completion cache, which may be shared by processes.
+        cache_completions_max_size: The maximum size of the completion cache, in bytes. The least recently used responses are removed first.
+        cache_completions_strict: Whether a request with no response in the completion cache fails instead of calling the LLM, for reproducible offline runs.
+        model_info_cache_file: A file to keep the model info and capabilities looked up from litellm, so that new processes do not look them up again.
         native_tool_calling: Whether to use native tool calling if supported by the model. Can be True, False, or not set.
         reasoning_effort: The effort to put into reasoning. This is a string that can be one of 'low', 'medium', 'high', or 'none'. Exclusive for o1 models.
         seed: The seed to use for the LLM.
@@ -83,6 +88,15 @@ class LLMConfig(BaseModel):
     log_completions: bool = Field(default=False)
     log_completions_folder: str = Field(default=os.path.join(LOG_DIR, 'completions'))
     custom_tokenizer: str | None = Field(default=None)
+    cache_completions: bool = Field(default=False)
+    cache_completions_folder: str = Field(
+        default=os.path.join(
+            os.path.expanduser('~'), '.cache', 'openhands', 'completions'
+        )
+    )
+    cache_completions_max_size: int = Field(default=1024**3)
+    cache_completions_strict: bool = Field(default=False)
+    model_info_cache_file: str | None = Field(default=None)
     native_tool_calling: bool | None = Field(default=None)
     reasoning_effort: str | None = Field(default='high')
     seed: int | None = Field(default=None)
@@ -32,6 +32,13 @@ class OpenHandsConfig(BaseModel):
         file_store_path: Path to the file store.
         file_store_web_hook_url: Optional url for file store web hook
         file_store_web_hook_headers: Optional headers for file_store web hook
+        event_log_format: Format of the event log for new conversations, `files` or `segments`.
+        event_write_behind_interval: If positive, events are written in batches on a background
+            thread, at most this many seconds after they are added. `0` writes each event synchronously.
+        event_write_behind_batch_size: Number of pending events that triggers a batch write.
+        event_dispatch_mode: How events are delivered to subscribers, `threads` (a thread per
+            callback) or `asyncio` (an event loop and a pool of worker threads shared by all conversations).
+        event_dispatch_queue_size: With the `asyncio` dispatch mode, the number of events a subscriber may fall behind.
         save_trajectory_path: Either a folder path to store trajectories with auto-generated filenames, or a designated trajectory file path.
         save_screenshots_in_trajectory: Whether to save screenshots in trajectory (in encoded image format).
         replay_trajectory_path: Path to load trajectory and replay. If provided, trajectory would be replayed first before user's instruction.
@@ -67,6 +74,11 @@ class OpenHandsConfig(BaseModel):
     file_store_path: str = Field(default='~/.openhands')
     file_store_web_hook_url: str | None = Field(default=None)
     file_store_web_hook_headers: dict | None = Field(default=None)
+    event_log_format: str = Field(default='files')
+    event_write_behind_interval: float = Field(default=0.0)
+    event_write_behind_batch_size: int = Field(default=100)
+    event_dispatch_mode: str = Field(default='threads')
+    event_dispatch_queue_size: int = Field(default=1000)
     save_trajectory_path: str | None = Field(default=None)
     save_screenshots_in_trajectory: bool = Field(default=False)
     replay_trajectory_path: str | None = Field(default=None)
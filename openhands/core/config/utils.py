@@ -363,9 +363,14 @@ def finalize_config(cfg: OpenHandsConfig) -> None:
             parts = cfg.workspace_mount_rewrite.split(':')
             cfg.workspace_mount_path = base.replace(parts[0], parts[1])
 
-    # make sure log_completions_folder is an absolute path
+    # make sure the completion folders and the model info cache file are absolute paths
     for llm in cfg.llms.values():
         llm.log_completions_folder = os.path.abspath(llm.log_completions_folder)
+        llm.cache_completions_folder = os.path.abspath(llm.cache_completions_folder)
+        if llm.model_info_cache_file:
+            llm.model_info_cache_file = os.path.abspath(
+                os.path.expanduser(llm.model_info_cache_file)
+            )
 
     if cfg.sandbox.use_host_network and platform.system() == 'Darwin':
         logger.openhands_logger.warning(
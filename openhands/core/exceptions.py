@@ -98,6 +98,12 @@ class LLMNoResponseError(Exception):
         super().__init__(message)
 
 
+# The completion cache is strict and has no response for a request
+class LLMCompletionCacheMissError(Exception):
+    def __init__(self, message: str = 'No cached LLM response for the request') -> None:
+        super().__init__(message)
+
+
 class UserCancelledError(Exception):
     def __init__(self, message: str = 'User cancelled the request') -> None:
         super().__init__(message)
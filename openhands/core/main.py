@@ -210,6 +210,8 @@ async def run_controller(
     if config.file_store is not None and config.file_store != 'memory':
         end_state = controller.get_state()
         # NOTE: the saved state does not include delegates events
+        if not event_stream.flush():
+            logger.warning('Some events could not be stored before saving the session')
         end_state.save_to_session(
             event_stream.sid, event_stream.file_store, event_stream.user_id
         )
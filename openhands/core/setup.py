@@ -15,7 +15,10 @@ from openhands.core.config import (
 from openhands.core.logger import openhands_logger as logger
 from openhands.events import EventStream
 from openhands.events.event import Event
+from openhands.events.event_dispatcher import EventDispatchMode
+from openhands.events.event_store import EventLogFormat
 from openhands.integrations.provider import ProviderToken, ProviderType
+from openhands.llm.async_llm import AsyncLLM
 from openhands.llm.llm import LLM
 from openhands.memory.memory import Memory
 from openhands.microagent.microagent import BaseMicroagent
@@ -53,7 +56,15 @@ def create_runtime(
 
     # set up the event stream
     file_store = get_file_store(config.file_store, config.file_store_path)
-    event_stream = EventStream(session_id, file_store)
+    event_stream = EventStream(
+        session_id,
+        file_store,
+        log_format=EventLogFormat(config.event_log_format),
+        write_behind_interval=config.event_write_behind_interval,
+        write_behind_batch_size=config.event_write_behind_batch_size,
+        dispatch_mode=EventDispatchMode(config.event_dispatch_mode),
+        dispatch_queue_size=config.event_dispatch_queue_size,
+    )
 
     # set up the security analyzer
     if config.security.security_analyzer:
@@ -177,8 +188,9 @@ def create_agent(config: OpenHandsConfig) -> Agent:
     agent_config = config.get_agent_config(config.default_agent)
     llm_config = config.get_llm_config_from_agent(config.default_agent)
 
+    llm_cls = AsyncLLM if agent_config.enable_async_step else LLM
     agent = agent_cls(
-        llm=LLM(config=llm_config),
+        llm=llm_cls(config=llm_config),
         config=agent_config,
     )
 
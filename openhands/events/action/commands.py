@@ -19,6 +19,7 @@ class CmdRunAction(Action):
     blocking: bool = False  # if True, the command will be run in a blocking manner, but a timeout must be set through _set_hard_timeout
     is_static: bool = False  # if True, runs the command in a separate process
     cwd: str | None = None  # current working directory, only used if is_static is True
+    session_id: str | None = None  # named shell session to run in, the default if None
     hidden: bool = False
     action: str = ActionType.RUN
     runnable: ClassVar[bool] = True
@@ -0,0 +1,298 @@
+import asyncio
+import inspect
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from typing import Any, Callable
+
+from openhands.core.logger import openhands_logger as logger
+from openhands.events.event import Event
+
+# Worker threads running the synchronous callbacks of every event stream in the process
+NUM_DISPATCH_WORKERS = 32
+
+
+class EventDispatchMode(str, Enum):
+    # A thread and an event loop per callback, fed by a polling thread per stream
+    THREADS = 'threads'
+    # A process-wide event loop, with synchronous callbacks run on a shared pool of threads
+    ASYNCIO = 'asyncio'
+
+
+def _init_worker_loop() -> None:
+    # Callbacks run coroutines with `asyncio.get_event_loop().run_until_complete`
+    asyncio.set_event_loop(asyncio.new_event_loop())
+
+
+def _new_worker(name: str) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=1, initializer=_init_worker_loop, thread_name_prefix=name
+    )
+
+
+class _Subscription:
+    """A callback, with its queue of events still to be delivered."""
+
+    def __init__(
+        self,
+        subscriber_id: str,
+        callback_id: str,
+        callback: Callable[[Event], Any],
+        max_queue_size: int,
+        worker: int | None,
+        executor: ThreadPoolExecutor,
+    ) -> None:
+        self.subscriber_id = subscriber_id
+        self.callback_id = callback_id
+        self.callback = callback
+        self.is_coroutine = inspect.iscoroutinefunction(callback)
+        self.queue: asyncio.Queue[tuple[Event, float]] = asyncio.Queue(max_queue_size)
+        # The shared worker the callback runs on, or None if it has its own thread
+        self.worker = worker
+        self.executor = executor
+        self.task: asyncio.Task | None = None
+        self.closed = False
+        self.num_delivered = 0
+        self.num_failed = 0
+        self.num_blocked = 0  # Events which had to wait for room in the queue
+        self.max_queue_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def get_metrics(self) -> dict[str, Any]:
+        return {
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_queue_depth,
+            'num_delivered': self.num_delivered,
+            'num_failed': self.num_failed,
+            'num_blocked': self.num_blocked,
+            'last_lag': self.last_lag,
+            'max_lag': self.max_lag,
+        }
+
+
+class EventChannel:
+    """The subscribers of one event stream, served by an `AsyncEventDispatcher`.
+
+    Published events are delivered to the callbacks in the order they were
+    published. Each callback has a bounded queue and gets one event at a time;
+    when a queue is full, delivery to the following callbacks waits for room,
+    so a slow subscriber holds the stream back rather than growing without bound.
+    Publishing itself never blocks, so callbacks may publish events.
+    """
+
+    def __init__(self, dispatcher: 'AsyncEventDispatcher', max_queue_size: int):
+        self._dispatcher = dispatcher
+        self._max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscriptions: dict[str, dict[str, _Subscription]] = {}
+        self._intake: asyncio.Queue[tuple[Event, float]] = asyncio.Queue()
+        self._closed = False
+        self._fan_out_task = dispatcher.run_soon(self._fan_out)
+
+    def publish(self, event: Event) -> None:
+        """Queue an event for every callback. Safe to call from any thread."""
+        if self._closed:
+            return
+        self._dispatcher.loop.call_soon_threadsafe(
+            self._intake.put_nowait, (event, time.monotonic())
+        )
+
+    def subscribe(
+        self,
+        subscriber_id: str,
+        callback_id: str,
+        callback: Callable[[Event], Any],
+        dedicated_thread: bool = False,
+    ) -> None:
+        """Deliver the events published from now on to the callback.
+
+        Coroutine functions are awaited on the dispatcher loop; other callbacks
+        always run on the same worker thread, which has its own event loop.
+        Callbacks that block for long, like running an agent step, should ask
+        for a `dedicated_thread`: a shared worker would hold back the callbacks
+        of other streams that run on it.
+        """
+        if dedicated_thread:
+            worker = None
+            executor = _new_worker('event-dispatch-dedicated')
+        else:
+            worker = self._dispatcher.acquire_worker()
+            executor = self._dispatcher.get_worker(worker)
+        subscription = _Subscription(
+            subscriber_id,
+            callback_id,
+            callback,
+            self._max_queue_size,
+            worker,
+            executor,
+        )
+        with self._lock:
+            self._subscriptions.setdefault(subscriber_id, {})[callback_id] = (
+                subscription
+            )
+        self._dispatcher.run_soon(lambda: self._consume(subscription))
+
+    def unsubscribe(self, subscriber_id: str, callback_id: str) -> None:
+        with self._lock:
+            subscription = self._subscriptions.get(subscriber_id, {}).pop(
+                callback_id, None
+            )
+        if subscription is not None:
+            self._dispatcher.loop.call_soon_threadsafe(self._stop, subscription)
+
+    def close(self, timeout: float | None = 5) -> None:
+        """Stop delivering events. Callbacks already running are not interrupted."""
+        self._closed = True
+        with self._lock:
+            subscriptions = [
+                subscription
+                for callbacks in self._subscriptions.values()
+                for subscription in callbacks.values()
+            ]
+            self._subscriptions = {}
+
+        def stop_all() -> None:
+            self._fan_out_task.cancel()
+            for subscription in subscriptions:
+                self._stop(subscription)
+
+        self._dispatcher.call_and_wait(stop_all, timeout)
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            subscriptions = {
+                subscriber_id: {
+                    callback_id: subscription.get_metrics()
+                    for callback_id, subscription in callbacks.items()
+                }
+                for subscriber_id, callbacks in self._subscriptions.items()
+            }
+        return {'queue_depth': self._intake.qsize(), 'subscribers': subscriptions}
+
+    def _stop(self, subscription: _Subscription) -> None:
+        subscription.closed = True
+        if subscription.task is not None:
+            subscription.task.cancel()
+        # Free up the fan out if it is waiting for room in this queue
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        if subscription.worker is None:
+            # A running callback finishes before the thread exits
+            subscription.executor.shutdown(wait=False)
+        else:
+            self._dispatcher.release_worker(subscription.worker)
+
+    async def _fan_out(self) -> None:
+        while True:
+            item = await self._intake.get()
+            # Callbacks subscribed while an event is being delivered only get the next one
+            with self._lock:
+                subscriptions = [
+                    subscription
+                    for subscriber_id in sorted(self._subscriptions)
+                    for subscription in self._subscriptions[subscriber_id].values()
+                ]
+            for subscription in subscriptions:
+                if subscription.closed:
+                    continue
+                if subscription.queue.full():
+                    subscription.num_blocked += 1
+                await subscription.queue.put(item)
+                subscription.max_queue_depth = max(
+                    subscription.max_queue_depth, subscription.queue.qsize()
+                )
+
+    async def _consume(self, subscription: _Subscription) -> None:
+        subscription.task = asyncio.current_task()
+        if subscription.closed:
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            event, published_at = await subscription.queue.get()
+            lag = time.monotonic() - published_at
+            subscription.last_lag = lag
+            subscription.max_lag = max(subscription.max_lag, lag)
+            try:
+                if subscription.is_coroutine:
+                    await subscription.callback(event)
+                else:
+                    await loop.run_in_executor(
+                        subscription.executor, subscription.callback, event
+                    )
+            except Exception as e:
+                subscription.num_failed += 1
+                logger.error(
+                    f'Error in event callback {subscription.callback_id} for subscriber {subscription.subscriber_id}: {str(e)}',
+                )
+            subscription.num_delivered += 1
+
+
+class AsyncEventDispatcher:
+    """Delivers the events of any number of streams from a single event loop thread.
+
+    Waiting for events costs no thread: queues wake their consumer when an event
+    is put. Synchronous callbacks run on a fixed pool of single threaded workers,
+    each callback staying on the worker it was given, so the tasks it leaves on
+    that worker's event loop resume on its next event. Callbacks which block for
+    long get a thread of their own instead, see `EventChannel.subscribe`.
+    """
+
+    def __init__(self, num_workers: int = NUM_DISPATCH_WORKERS) -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name='event-dispatcher', daemon=True
+        )
+        self._thread.start()
+        self._workers = [
+            _new_worker(f'event-dispatch-worker-{i}') for i in range(num_workers)
+        ]
+        self._worker_loads = [0] * num_workers
+        self._lock = threading.Lock()
+
+    def open_channel(self, max_queue_size: int) -> EventChannel:
+        return EventChannel(self, max_queue_size)
+
+    def run_soon(self, coroutine_function: Callable[[], Any]) -> asyncio.Task:
+        """Start a task on the dispatcher loop, from any thread."""
+        if threading.current_thread() is self._thread:
+            return self.loop.create_task(coroutine_function())
+        return self.call_and_wait(lambda: self.loop.create_task(coroutine_function()))
+
+    def call_and_wait(self, function: Callable[[], Any], timeout: float | None = None):
+        """Call a function on the dispatcher loop, returning its result."""
+        if threading.current_thread() is self._thread:
+            return function()
+
+        async def call() -> Any:
+            return function()
+
+        return asyncio.run_coroutine_threadsafe(call(), self.loop).result(timeout)
+
+    def acquire_worker(self) -> int:
+        """The least busy worker, for a new callback."""
+        with self._lock:
+            worker = self._worker_loads.index(min(self._worker_loads))
+            self._worker_loads[worker] += 1
+            return worker
+
+    def release_worker(self, worker: int) -> None:
+        with self._lock:
+            self._worker_loads[worker] -= 1
+
+    def get_worker(self, worker: int) -> ThreadPoolExecutor:
+        return self._workers[worker]
+
+
+_dispatcher: AsyncEventDispatcher | None = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_event_dispatcher() -> AsyncEventDispatcher:
+    """The dispatcher shared by the event streams of this process, started on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AsyncEventDispatcher()
+        return _dispatcher
@@ -1,8 +1,54 @@
 import json
 from dataclasses import dataclass
+from enum import Enum
 
 from openhands.events.event import Event
+from openhands.events.serialization.action import ACTION_TYPE_TO_CLASS
 from openhands.events.serialization.event import event_to_dict
+from openhands.events.serialization.observation import OBSERVATION_TYPE_TO_CLASS
+
+
+def get_search_text(event: Event) -> str:
+    """The text `EventFilter.query` is matched against."""
+    return json.dumps(event_to_dict(event)).lower()
+
+
+@dataclass(frozen=True)
+class EventColumns:
+    """The fields of an event the filter checks, other than its text.
+
+    Kept in the search index so events can be filtered without being read.
+    """
+
+    kind: str | None
+    """`action:<action>` or `observation:<observation>`, which determines the class the event is read as."""
+    source: str | None
+    timestamp: str | None
+    hidden: bool
+
+    @classmethod
+    def from_event(cls, event: Event) -> 'EventColumns':
+        kind = None
+        for key in ('action', 'observation'):
+            value = getattr(event, key, None)
+            if value is not None:
+                value = value.value if isinstance(value, Enum) else value
+                kind = f'{key}:{value}'
+                break
+        return cls(
+            kind=kind,
+            source=event.source.value if event.source is not None else None,
+            timestamp=event.timestamp,
+            hidden=bool(getattr(event, 'hidden', False)),
+        )
+
+    def get_event_class(self) -> type[Event] | None:
+        if self.kind is None:
+            return None
+        key, _, value = self.kind.partition(':')
+        if key == 'action':
+            return ACTION_TYPE_TO_CLASS.get(value)
+        return OBSERVATION_TYPE_TO_CLASS.get(value)
 
 
 @dataclass
@@ -77,13 +123,62 @@ class EventFilter:
 
         # Text search in event content if query provided
         if self.query:
-            event_dict = event_to_dict(event)
-            event_str = json.dumps(event_dict).lower()
-            if self.query.lower() not in event_str:
+            if self.query.lower() not in get_search_text(event):
                 return False
 
         return True
 
+    def has_column_criteria(self) -> bool:
+        """Whether the filter checks anything `include_columns` can check."""
+        return bool(
+            self.include_types
+            or self.exclude_types is not None
+            or self.source
+            or self.start_date
+            or self.end_date
+            or self.exclude_hidden
+        )
+
+    def include_columns(self, columns: EventColumns) -> bool:
+        """Determine if an event may be included, given only its indexed columns.
+
+        This applies the same criteria as `include`, except for the query. An event
+        rejected here would be rejected by `include`.
+        """
+        if self.include_types or self.exclude_types is not None:
+            event_class = columns.get_event_class()
+            if event_class is not None:
+                if self.include_types and not issubclass(
+                    event_class, self.include_types
+                ):
+                    return False
+                if self.exclude_types is not None and issubclass(
+                    event_class, self.exclude_types
+                ):
+                    return False
+
+        if self.source and columns.source != self.source:
+            return False
+
+        if (
+            self.start_date
+            and columns.timestamp is not None
+            and columns.timestamp < self.start_date
+        ):
+            return False
+
+        if (
+            self.end_date
+            and columns.timestamp is not None
+            and columns.timestamp > self.end_date
+        ):
+            return False
+
+        if self.exclude_hidden and columns.hidden:
+            return False
+
+        return True
+
     def exclude(self, event: Event) -> bool:
         """Determine if an event should be excluded based on the filter criteria.
 
@@ -0,0 +1,146 @@
+"""Convert conversations stored as one file per event into the segmented event log.
+
+Usage:
+    python -m openhands.events.event_log_migration --file-store-path ~/.openhands
+"""
+
+import argparse
+
+from openhands.core.logger import openhands_logger as logger
+from openhands.events.event_lru_cache import EVENT_LRU_CACHE
+from openhands.events.event_store import EventLogFormat, EventStore
+from openhands.io import json as oh_json
+from openhands.storage import get_file_store
+from openhands.storage.files import FileStore
+from openhands.storage.locations import (
+    CONVERSATION_BASE_DIR,
+    get_conversation_dir,
+    get_conversation_events_dir,
+)
+
+
+def migrate_conversation(
+    file_store: FileStore,
+    sid: str,
+    user_id: str | None = None,
+    delete_legacy: bool = False,
+) -> int:
+    """Rewrite the events of a conversation as segments.
+
+    Events are copied as stored, without deserializing them. Ids with no event
+    are kept as `null` lines so the segments stay aligned on ids.
+
+    Args:
+        file_store: The file store holding the conversation
+        sid: The conversation id
+        user_id: The owner of the conversation, if any
+        delete_legacy: Whether to delete the per-event files and cache pages afterwards
+
+    Returns:
+        The number of events migrated. Conversations already using segments are skipped.
+    """
+    event_store = EventStore(sid, file_store, user_id)
+    if event_store.log_format == EventLogFormat.SEGMENTS:
+        logger.info(f'Conversation {sid} already uses the segmented event log')
+        return 0
+
+    num_events = 0
+    for start in range(0, event_store.cur_id, event_store.cache_size):
+        end = start + event_store.cache_size
+        cached = event_store._load_cache_page(start, end).events
+        lines = []
+        for id in range(start, min(end, event_store.cur_id)):
+            data = _read_legacy_event(event_store, id, start, cached)
+            if data is not None:
+                num_events += 1
+            lines.append(oh_json.dumps(data))
+        event_store._store_segment(start, lines)
+
+    event_store.log_format = EventLogFormat.SEGMENTS
+    event_store._cache_page_starts = []
+    event_store._write_manifest(event_store.cur_id)
+    EVENT_LRU_CACHE.invalidate(user_id, sid)
+    if delete_legacy:
+        conversation_dir = get_conversation_dir(sid, user_id)
+        file_store.delete(get_conversation_events_dir(sid, user_id))
+        file_store.delete(f'{conversation_dir}event_cache/')
+    logger.info(f'Migrated {num_events} events of conversation {sid}')
+    return num_events
+
+
+def _read_legacy_event(
+    event_store: EventStore, id: int, start: int, cached: list[dict] | None
+) -> dict | None:
+    if cached and id - start < len(cached):
+        return cached[id - start]
+    try:
+        return oh_json.decode(
+            event_store.file_store.read(
+                event_store._get_filename_for_id(id, event_store.user_id)
+            )
+        )
+    except FileNotFoundError:
+        return None
+
+
+def migrate_all_conversations(
+    file_store: FileStore, user_id: str | None = None, delete_legacy: bool = False
+) -> int:
+    """Migrate every conversation of a user, or every conversation without a user."""
+    if user_id:
+        conversations_dir = f'users/{user_id}/conversations/'
+    else:
+        conversations_dir = f'{CONVERSATION_BASE_DIR}/'
+    try:
+        paths = file_store.list(conversations_dir)
+    except FileNotFoundError:
+        return 0
+    num_events = 0
+    for path in paths:
+        sid = path.rstrip('/').split('/')[-1]
+        num_events += migrate_conversation(file_store, sid, user_id, delete_legacy)
+    return num_events
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Convert conversations to the segmented event log.'
+    )
+    parser.add_argument(
+        '--file-store',
+        type=str,
+        default='local',
+        help='Type of file store holding the conversations.',
+    )
+    parser.add_argument(
+        '--file-store-path',
+        type=str,
+        default='~/.openhands',
+        help='Path (or bucket) of the file store.',
+    )
+    parser.add_argument(
+        '--user-id',
+        type=str,
+        default=None,
+        help='Owner of the conversations to migrate.',
+    )
+    parser.add_argument(
+        '--conversation-id',
+        type=str,
+        default=None,
+        help='Migrate a single conversation instead of all of them.',
+    )
+    parser.add_argument(
+        '--delete-legacy',
+        action='store_true',
+        help='Delete the per-event files and cache pages after migrating.',
+    )
+    my_args = parser.parse_args()
+
+    store = get_file_store(my_args.file_store, my_args.file_store_path)
+    if my_args.conversation_id:
+        migrate_conversation(
+            store, my_args.conversation_id, my_args.user_id, my_args.delete_legacy
+        )
+    else:
+        migrate_all_conversations(store, my_args.user_id, my_args.delete_legacy)
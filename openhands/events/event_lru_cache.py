@@ -0,0 +1,100 @@
+import copy
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from openhands.events.event import Event
+
+_CacheKey = tuple[Hashable, str | None, str, int]
+
+
+class EventLRUCache:
+    """A process wide cache of decoded events, shared by every EventStore.
+
+    Events are immutable once stored, so entries never go stale; a conversation
+    only needs to be invalidated when it is deleted. The cache is bounded by the
+    approximate serialized size of the events it holds, and evicts the least
+    recently used events first.
+
+    Entries are keyed by the file store as well as by (user_id, sid, event id),
+    so distinct stores holding the same conversation ids never share events.
+    Callers get a shallow copy of the cached event, so setting attributes on it
+    is safe but nested values must not be mutated in place.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[_CacheKey, tuple[Event, int]] = OrderedDict()
+        self._num_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(
+        self, file_store: Hashable, user_id: str | None, sid: str, id: int
+    ) -> Event | None:
+        key = (file_store, user_id, sid, id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.copy(entry[0])
+
+    def put(
+        self,
+        file_store: Hashable,
+        user_id: str | None,
+        sid: str,
+        event: Event,
+        size: int,
+    ) -> None:
+        """Add an event, given the approximate size of its serialized form."""
+        if size > self.max_bytes:
+            return
+        key = (file_store, user_id, sid, event.id)
+        event = copy.copy(event)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._num_bytes -= previous[1]
+            self._entries[key] = (event, size)
+            self._num_bytes += size
+            while self._num_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._num_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, user_id: str | None, sid: str) -> None:
+        """Drop every cached event of a conversation."""
+        with self._lock:
+            keys = [key for key in self._entries if key[1] == user_id and key[2] == sid]
+            for key in keys:
+                _, size = self._entries.pop(key)
+                self._num_bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._num_bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'num_events': len(self._entries),
+                'num_bytes': self._num_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Setting EVENT_CACHE_MAX_BYTES to 0 disables the cache
+EVENT_LRU_CACHE = EventLRUCache(
+    int(os.getenv('EVENT_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+)
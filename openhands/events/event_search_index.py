@@ -0,0 +1,227 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from openhands.events.event import Event
+from openhands.events.event_filter import EventColumns, EventFilter, get_search_text
+
+# Indexing longer texts (screenshots, huge command outputs) would dominate the
+# size of the index, so those events are never pruned from query results
+MAX_INDEXED_TEXT_LENGTH = 64 * 1024
+
+
+def get_trigrams(text: str) -> set[str] | None:
+    """The trigrams of a search text, or None if it is too long to index."""
+    if len(text) > MAX_INDEXED_TEXT_LENGTH:
+        return None
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+@dataclass(frozen=True)
+class EventIndexEntry:
+    """What the search index records about an event."""
+
+    trigrams: set[str] | None
+    columns: EventColumns
+
+    @classmethod
+    def from_event(
+        cls, event: Event, event_json: str | None = None
+    ) -> 'EventIndexEntry':
+        """The entry of an event, searching `event_json` if it was serialized already."""
+        if event_json is None:
+            trigrams = get_trigrams(get_search_text(event))
+        elif len(event_json) > MAX_INDEXED_TEXT_LENGTH:
+            trigrams = None
+        else:
+            trigrams = get_trigrams(event_json.lower())
+        return cls(trigrams, EventColumns.from_event(event))
+
+
+class EventSearchIndexShard:
+    """The index of an aligned block of event ids, as stored beside the event log.
+
+    Each trigram maps to a bit mask of the ids in the block whose search text
+    contains it. The columns checked by `EventFilter.include_columns` are kept
+    as one list per column, indexed by offset in the block.
+    """
+
+    def __init__(self, start: int, size: int) -> None:
+        self.start = start
+        self.size = size
+        self.trigrams: dict[str, int] = {}
+        self.unpruned = 0  # Events too long to index, which always match a query
+        self.done = 0  # Ids accounted for, even if there was no event
+        self.kinds: list[str | None] = [None] * size
+        self.sources: list[str | None] = [None] * size
+        self.timestamps: list[str | None] = [None] * size
+        self.hidden = 0
+        self.has_columns = 0  # Shards stored before columns were indexed have none
+
+    def add(self, id: int, entry: EventIndexEntry) -> None:
+        offset = id - self.start
+        bit = 1 << offset
+        self.done |= bit
+        self.has_columns |= bit
+        self.kinds[offset] = entry.columns.kind
+        self.sources[offset] = entry.columns.source
+        self.timestamps[offset] = entry.columns.timestamp
+        if entry.columns.hidden:
+            self.hidden |= bit
+        if entry.trigrams is None:
+            self.unpruned |= bit
+            return
+        for trigram in entry.trigrams:
+            self.trigrams[trigram] = self.trigrams.get(trigram, 0) | bit
+
+    def skip(self, id: int) -> None:
+        """Account for an id which has no event."""
+        self.done |= 1 << (id - self.start)
+
+    def is_complete(self) -> bool:
+        return self.done == (1 << self.size) - 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'trigrams': self.trigrams,
+            'unpruned': self.unpruned,
+            'kinds': self.kinds,
+            'sources': self.sources,
+            'timestamps': self.timestamps,
+            'hidden': self.hidden,
+            'has_columns': self.has_columns,
+        }
+
+    @classmethod
+    def from_dict(
+        cls, start: int, size: int, data: dict[str, Any]
+    ) -> 'EventSearchIndexShard':
+        shard = cls(start, size)
+        shard.trigrams = data['trigrams']
+        shard.unpruned = data['unpruned']
+        shard.done = (1 << size) - 1
+        if 'has_columns' in data:
+            shard.kinds = data['kinds']
+            shard.sources = data['sources']
+            shard.timestamps = data['timestamps']
+            shard.hidden = data['hidden']
+            shard.has_columns = data['has_columns']
+        return shard
+
+    def get_candidate_mask(
+        self,
+        trigrams: set[str] | None,
+        filter: EventFilter | None,
+        decisions: dict[EventColumns, bool],
+    ) -> int:
+        """The ids which may pass the query trigrams and the column filter.
+
+        Ids not indexed yet are always included. `decisions` caches the result of
+        the filter for columns seen before, and can be shared between shards.
+        """
+        mask = self.done
+        if filter is not None:
+            # Timestamps only matter for a date range, and make every column unique
+            has_dates = bool(filter.start_date or filter.end_date)
+            offset = 0
+            remaining = mask & self.has_columns
+            while remaining:
+                if remaining & 1:
+                    columns = EventColumns(
+                        self.kinds[offset],
+                        self.sources[offset],
+                        self.timestamps[offset] if has_dates else None,
+                        bool(self.hidden >> offset & 1),
+                    )
+                    included = decisions.get(columns)
+                    if included is None:
+                        included = decisions[columns] = filter.include_columns(columns)
+                    if not included:
+                        mask &= ~(1 << offset)
+                remaining >>= 1
+                offset += 1
+        if trigrams:
+            text_mask = mask
+            for trigram in trigrams:
+                text_mask &= self.trigrams.get(trigram, 0)
+                if not text_mask:
+                    break
+            mask &= text_mask | self.unpruned
+        return mask | (~self.done & ((1 << self.size) - 1))
+
+
+class EventSearchIndex:
+    """An in memory index of the events of a conversation, for `EventFilter` searches.
+
+    The index only narrows down candidates: every event containing a query
+    contains all of its trigrams, and every event passing the filter passes
+    `EventFilter.include_columns`. The filter still has to check each candidate.
+    Events the index does not know about are always candidates.
+
+    The index is kept as one shard per block of ids, so stored shards are used
+    as they are loaded and a query only looks up its own trigrams in each.
+    """
+
+    def __init__(self, block_size: int) -> None:
+        self.block_size = block_size
+        self._shards: dict[int, EventSearchIndexShard] = {}
+        self._lock = threading.Lock()
+
+    def add(self, id: int, entry: EventIndexEntry) -> None:
+        start = id - id % self.block_size
+        with self._lock:
+            shard = self._shards.get(start)
+            if shard is None:
+                shard = self._shards[start] = EventSearchIndexShard(
+                    start, self.block_size
+                )
+            shard.add(id, entry)
+
+    def add_shard(self, start: int, data: dict[str, Any]) -> None:
+        """Add a stored shard, covering the ids [start, start + block_size)."""
+        with self._lock:
+            self._shards[start] = EventSearchIndexShard.from_dict(
+                start, self.block_size, data
+            )
+
+    def get_candidates(self, filter: EventFilter, ids: range) -> Iterator[int] | None:
+        """The ids, in the order of the range, of the events which may pass the filter.
+
+        Candidates are worked out a block at a time as they are consumed, so a
+        search stopping early does not check the whole conversation.
+
+        Returns:
+            None if the index can not narrow anything down, e.g. for a query
+            shorter than a trigram and no other criteria.
+        """
+        query_trigrams = get_trigrams(filter.query.lower()) if filter.query else None
+        column_filter = filter if filter.has_column_criteria() else None
+        if not query_trigrams and column_filter is None:
+            return None
+        return self._iter_candidates(query_trigrams, column_filter, ids)
+
+    def _iter_candidates(
+        self,
+        query_trigrams: set[str] | None,
+        column_filter: EventFilter | None,
+        ids: range,
+    ) -> Iterator[int]:
+        block_size = self.block_size
+        decisions: dict[EventColumns, bool] = {}
+        mask_start = None
+        mask: int | None = None
+        for id in ids:
+            offset = id % block_size
+            if id - offset != mask_start:
+                mask_start = id - offset
+                with self._lock:
+                    shard = self._shards.get(mask_start)
+                    mask = (
+                        shard.get_candidate_mask(
+                            query_trigrams, column_filter, decisions
+                        )
+                        if shard is not None
+                        else None
+                    )
+            if mask is None or mask >> offset & 1:
+                yield id
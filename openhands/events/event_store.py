@@ -1,26 +1,51 @@
 import json
-from dataclasses import dataclass
+import threading
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from enum import Enum
 from typing import Iterable
 
 from openhands.core.logger import openhands_logger as logger
 from openhands.events.event import Event, EventSource
 from openhands.events.event_filter import EventFilter
+from openhands.events.event_lru_cache import EVENT_LRU_CACHE
+from openhands.events.event_search_index import EventIndexEntry, EventSearchIndex
 from openhands.events.event_store_abc import EventStoreABC
 from openhands.events.serialization.event import event_from_dict
+from openhands.io import json as oh_json
 from openhands.storage.files import FileStore
 from openhands.storage.locations import (
     get_conversation_dir,
     get_conversation_event_filename,
+    get_conversation_event_index_dir,
+    get_conversation_event_log_dir,
+    get_conversation_event_manifest_filename,
     get_conversation_events_dir,
 )
 from openhands.utils.shutdown_listener import should_continue
 
 
+class EventLogFormat(str, Enum):
+    """On-disk layout of the events of a conversation."""
+
+    FILES = 'files'
+    """One `events/{id}.json` file per event, plus `event_cache/` pages."""
+
+    SEGMENTS = 'segments'
+    """JSONL segments of `cache_size` events in `event_log/`, each with an offset index.
+
+    New events are appended to the open segment, which stores without an
+    append of their own do by rewriting it; sealed segments are never written
+    again.
+    """
+
+
 @dataclass(frozen=True)
 class _CachePage:
     events: list[dict] | None
     start: int
     end: int
+    event_size: int = 0  # Average size of the serialized events in the page
 
     def covers(self, global_index: int) -> bool:
         if global_index < self.start:
@@ -36,6 +61,57 @@ class _CachePage:
         local_index = global_index - self.start
         return event_from_dict(self.events[local_index])
 
+    def get_event_size(self, global_index: int) -> int:
+        return self.event_size
+
+
+@dataclass(frozen=True)
+class _Segment:
+    """A segment of the event log: one JSON document per line, in id order.
+
+    `offsets[i]` is the position of line `i` and `offsets[-1]` the end of the
+    last complete line. Events are serialized with `ensure_ascii`, so these
+    positions are valid both as character and as byte offsets. A `null` line
+    marks an id with no event.
+    """
+
+    content: str | None
+    offsets: list[int]
+    start: int
+    end: int
+
+    def covers(self, global_index: int) -> bool:
+        if global_index < self.start:
+            return False
+        if global_index >= self.end:
+            return False
+        return True
+
+    def get_event(self, global_index: int) -> Event | None:
+        if not self.content:
+            return None
+        local_index = global_index - self.start
+        if local_index + 1 >= len(self.offsets):
+            return None
+        line = self.content[self.offsets[local_index] : self.offsets[local_index + 1]]
+        data = oh_json.decode(line)
+        if data is None:
+            return None
+        return event_from_dict(data)
+
+    def get_event_size(self, global_index: int) -> int:
+        local_index = global_index - self.start
+        return self.offsets[local_index + 1] - self.offsets[local_index]
+
+
+def _get_line_offsets(content: str) -> list[int]:
+    offsets = [0]
+    index = content.find('\n')
+    while index != -1:
+        offsets.append(index + 1)
+        index = content.find('\n', index + 1)
+    return offsets
+
 
 _DUMMY_PAGE = _CachePage(None, 1, -1)
 
@@ -50,10 +126,38 @@ class EventStore(EventStoreABC):
     file_store: FileStore
     user_id: str | None
     cur_id: int = -1  # We fix this in post init if it is not specified
-    cache_size: int = 25
+    cache_size: int = 25  # Also the number of events per segment of the event log
+    # The format used for new conversations. Existing conversations keep the
+    # format they were written in, so this is fixed in post init.
+    log_format: EventLogFormat = EventLogFormat.FILES
+    # Starts of the cache pages recorded in the manifest, in ascending order
+    _cache_page_starts: list[int] = field(default_factory=list, init=False, repr=False)
+    # The latest id recorded in the manifest, or -1 if there is no manifest
+    _manifest_cur_id: int = field(default=-1, init=False, repr=False)
+    # Index for filtered searches, loaded on the first one
+    _search_index: EventSearchIndex | None = field(default=None, init=False, repr=False)
+    _search_index_lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
 
     def __post_init__(self) -> None:
-        if self.cur_id >= 0:
+        manifest = self._read_manifest()
+        if manifest is not None and self._init_from_manifest(manifest):
+            return
+        if (
+            isinstance(manifest, dict)
+            and manifest.get('log_format') == EventLogFormat.FILES.value
+        ):
+            # Behind the event files, which are the only ones to list
+            segment_filenames = []
+        else:
+            segment_filenames = self._list_segment_filenames()
+        if segment_filenames:
+            self.log_format = EventLogFormat.SEGMENTS
+            if self.cur_id < 0:
+                self.cur_id = self._get_cur_id_from_segments(segment_filenames)
+            return
+        if self.cur_id >= 0 and self.log_format == EventLogFormat.FILES:
             return
         events = []
         try:
@@ -62,6 +166,11 @@ class EventStore(EventStoreABC):
         except FileNotFoundError:
             logger.debug(f'No events found for session {self.sid} at {events_dir}')
 
+        if events:
+            # Never mix formats within a conversation
+            self.log_format = EventLogFormat.FILES
+        if self.cur_id >= 0:
+            return
         if not events:
             self.cur_id = 0
             return
@@ -107,19 +216,34 @@ class EventStore(EventStoreABC):
         else:
             step = 1
 
-        cache_page = _DUMMY_PAGE
+        ids: Iterable[int] = range(start_id, end_id, step)
+        if filter and (filter.query or filter.has_column_criteria()):
+            # Only visit the events the index can not rule out
+            candidates = self._get_search_index().get_candidates(filter, ids)
+            if candidates is not None:
+                ids = candidates
+
+        cache_page: _CachePage | _Segment = _DUMMY_PAGE
         num_results = 0
-        for index in range(start_id, end_id, step):
+        for index in ids:
             if not should_continue():
                 return
-            if not cache_page.covers(index):
-                cache_page = self._load_cache_page_for_index(index)
-            event = cache_page.get_event(index)
+            event = EVENT_LRU_CACHE.get(self.file_store, self.user_id, self.sid, index)
             if event is None:
-                try:
-                    event = self.get_event(index)
-                except FileNotFoundError:
-                    event = None
+                if not cache_page.covers(index):
+                    cache_page = self._load_cache_page_for_index(index)
+                event = cache_page.get_event(index)
+                if event is None:
+                    try:
+                        event, size = self._read_event(index)
+                    except FileNotFoundError:
+                        event = None
+                else:
+                    size = cache_page.get_event_size(index)
+                if event is not None:
+                    EVENT_LRU_CACHE.put(
+                        self.file_store, self.user_id, self.sid, event, size
+                    )
             if event:
                 if not filter or filter.include(event):
                     yield event
@@ -127,11 +251,53 @@ class EventStore(EventStoreABC):
                     if limit and limit <= num_results:
                         return
 
+    def _get_search_index(self) -> EventSearchIndex:
+        """The search index of the events, built from the stored shards on first use."""
+        with self._search_index_lock:
+            if self._search_index is not None:
+                return self._search_index
+            index = EventSearchIndex(self.cache_size)
+            cur_id = self.cur_id
+            for start in range(0, cur_id, self.cache_size):
+                end = start + self.cache_size
+                shard = self._load_search_index_shard(start, end)
+                if shard is not None:
+                    index.add_shard(start, shard)
+                    continue
+                # Not stored yet, or the conversation predates the index
+                for event in self.search_events(start, min(end, cur_id) - 1):
+                    index.add(event.id, EventIndexEntry.from_event(event))
+            self._search_index = index
+            return index
+
+    def _get_filename_for_search_index_shard(self, start: int, end: int) -> str:
+        return f'{get_conversation_event_index_dir(self.sid, self.user_id)}{start}-{end}.json'
+
+    def _load_search_index_shard(self, start: int, end: int) -> dict | None:
+        try:
+            content = self.file_store.read(
+                self._get_filename_for_search_index_shard(start, end)
+            )
+            return oh_json.decode(content)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
     def get_event(self, id: int) -> Event:
+        event = EVENT_LRU_CACHE.get(self.file_store, self.user_id, self.sid, id)
+        if event is not None:
+            return event
+        event, size = self._read_event(id)
+        EVENT_LRU_CACHE.put(self.file_store, self.user_id, self.sid, event, size)
+        return event
+
+    def _read_event(self, id: int) -> tuple[Event, int]:
+        """Read an event from the file store, along with the size of its serialized form."""
+        if self.log_format == EventLogFormat.SEGMENTS:
+            return self._get_event_from_segment(id)
         filename = self._get_filename_for_id(id, self.user_id)
         content = self.file_store.read(filename)
-        data = json.loads(content)
-        return event_from_dict(data)
+        data = oh_json.decode(content)
+        return event_from_dict(data), len(content)
 
     def get_latest_event(self) -> Event:
         return self.get_event(self.cur_id - 1)
@@ -155,17 +321,218 @@ class EventStore(EventStoreABC):
         cache_filename = self._get_filename_for_cache(start, end)
         try:
             content = self.file_store.read(cache_filename)
-            events = json.loads(content)
+            events = oh_json.decode(content)
         except FileNotFoundError:
-            events = None
-        page = _CachePage(events, start, end)
+            return _CachePage(None, start, end)
+        page = _CachePage(events, start, end, len(content) // max(len(events), 1))
         return page
 
-    def _load_cache_page_for_index(self, index: int) -> _CachePage:
+    def _load_cache_page_for_index(self, index: int) -> _CachePage | _Segment:
         offset = index % self.cache_size
         index -= offset
+        if self.log_format == EventLogFormat.SEGMENTS:
+            return self._load_segment(index, index + self.cache_size)
+        # Pages written after resuming a conversation are not aligned, but the manifest knows where they are
+        page_index = bisect_right(self._cache_page_starts, index + offset) - 1
+        if page_index >= 0:
+            start = self._cache_page_starts[page_index]
+            if index + offset < start + self.cache_size:
+                return self._load_cache_page(start, start + self.cache_size)
         return self._load_cache_page(index, index + self.cache_size)
 
+    def _read_manifest(self) -> dict | None:
+        try:
+            content = self.file_store.read(
+                get_conversation_event_manifest_filename(self.sid, self.user_id)
+            )
+        except FileNotFoundError:
+            return None
+        try:
+            return oh_json.decode(content)
+        except json.JSONDecodeError:
+            logger.warning(f'Ignoring corrupt event manifest for session {self.sid}')
+            return None
+
+    def _init_from_manifest(self, manifest: dict) -> bool:
+        """Set up the store from its manifest, so no listing is needed.
+
+        The writer updates the manifest after each batch of events it stores,
+        so it is at most one batch behind, if the writer stopped in between.
+        The open segment says how many events it holds, and event files past
+        the manifest are found by reading them.
+
+        Returns:
+            Whether the manifest could be used.
+        """
+        try:
+            log_format = EventLogFormat(manifest['log_format'])
+            manifest_cur_id = int(manifest['cur_id'])
+            cache_page_starts = sorted(int(start) for start in manifest['pages'])
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f'Ignoring invalid event manifest for session {self.sid}')
+            return False
+        self.log_format = log_format
+        # Pages it records were written, even if later events are missing from it
+        self._cache_page_starts = cache_page_starts
+        self._manifest_cur_id = manifest_cur_id
+        if self.cur_id < 0:
+            if log_format == EventLogFormat.SEGMENTS:
+                cur_id = self._find_cur_id_in_segments(manifest_cur_id)
+            else:
+                cur_id = self._find_cur_id_in_files(manifest_cur_id)
+            if cur_id is None:
+                # The manifest is ahead of the log
+                logger.debug(f'Stale event manifest for session {self.sid}')
+                return False
+            self.cur_id = cur_id
+        return True
+
+    def _find_cur_id_in_files(self, cur_id: int) -> int:
+        """Read the events following the manifest until one is missing.
+
+        The manifest is current unless the writer stopped before updating it,
+        so this is a single read.
+        """
+        while True:
+            try:
+                self.file_store.read(self._get_filename_for_id(cur_id, self.user_id))
+            except FileNotFoundError:
+                return cur_id
+            cur_id += 1
+
+    def _find_cur_id_in_segments(self, cur_id: int) -> int | None:
+        id = cur_id
+        while id <= cur_id + self.cache_size:
+            start, end = self._get_segment_bounds_for_id(id)
+            num_lines = len(self._load_segment(start, end).offsets) - 1
+            if start + num_lines < id:
+                # The manifest is ahead of the log
+                return None
+            id = start + num_lines
+            if num_lines < self.cache_size:
+                return id
+        return None
+
+    def _write_manifest(self, cur_id: int) -> None:
+        """Record where the events are, so opening the store does not need to list them."""
+        self._manifest_cur_id = max(self._manifest_cur_id, cur_id)
+        if self.log_format == EventLogFormat.SEGMENTS:
+            segments = list(range(0, self._manifest_cur_id, self.cache_size))
+        else:
+            segments = []
+        manifest = {
+            'log_format': self.log_format.value,
+            'cur_id': self._manifest_cur_id,
+            'cache_size': self.cache_size,
+            'pages': self._cache_page_starts,
+            'segments': segments,
+        }
+        self.file_store.write(
+            get_conversation_event_manifest_filename(self.sid, self.user_id),
+            json.dumps(manifest),
+        )
+
+    def _get_filename_for_segment(self, start: int, end: int) -> str:
+        return f'{get_conversation_event_log_dir(self.sid, self.user_id)}{start}-{end}.jsonl'
+
+    def _get_filename_for_segment_index(self, start: int, end: int) -> str:
+        return (
+            f'{get_conversation_event_log_dir(self.sid, self.user_id)}{start}-{end}.idx'
+        )
+
+    def _get_segment_bounds_for_id(self, id: int) -> tuple[int, int]:
+        start = id - id % self.cache_size
+        return start, start + self.cache_size
+
+    def _list_segment_filenames(self) -> list[str]:
+        try:
+            filenames = self.file_store.list(
+                get_conversation_event_log_dir(self.sid, self.user_id)
+            )
+        except FileNotFoundError:
+            return []
+        return [filename for filename in filenames if filename.endswith('.jsonl')]
+
+    def _get_cur_id_from_segments(self, segment_filenames: list[str]) -> int:
+        """Find the next id from the last segment, which may still be open."""
+        last_start, last_end = max(
+            self._get_bounds_from_segment_filename(filename)
+            for filename in segment_filenames
+        )
+        segment = self._load_segment(last_start, last_end)
+        return last_start + len(segment.offsets) - 1
+
+    def _load_segment(self, start: int, end: int) -> _Segment:
+        """Read a whole segment, which is cheaper than seeking when reading many events."""
+        try:
+            content = self.file_store.read(self._get_filename_for_segment(start, end))
+        except FileNotFoundError:
+            return _Segment(None, [0], start, end)
+        return _Segment(content, _get_line_offsets(content), start, end)
+
+    def _read_segment_lines(self, start: int, end: int) -> tuple[list[str], bool]:
+        """The complete lines of a segment, and whether nothing follows them."""
+        segment = self._load_segment(start, end)
+        if not segment.content:
+            return [], True
+        lines = segment.content.split('\n')[: len(segment.offsets) - 1]
+        return lines, len(segment.content) == segment.offsets[-1]
+
+    def _get_event_from_segment(self, id: int) -> tuple[Event, int]:
+        """Seek to a single event using the offset index of its segment.
+
+        Only sealed segments have an index; the open segment is small enough to
+        read whole.
+        """
+        start, end = self._get_segment_bounds_for_id(id)
+        filename = self._get_filename_for_segment(start, end)
+        try:
+            offsets = oh_json.decode(
+                self.file_store.read(self._get_filename_for_segment_index(start, end))
+            )
+        except FileNotFoundError:
+            segment = self._load_segment(start, end)
+            event = segment.get_event(id)
+            if event is None:
+                raise FileNotFoundError(filename)
+            return event, segment.get_event_size(id)
+        local_index = id - start
+        if local_index < 0 or local_index + 1 >= len(offsets):
+            raise FileNotFoundError(filename)
+        line = self.file_store.read_range(
+            filename, offsets[local_index], offsets[local_index + 1]
+        )
+        data = oh_json.decode(line)
+        if data is None:
+            raise FileNotFoundError(filename)
+        return event_from_dict(data), len(line)
+
+    def _store_segment(self, start: int, lines: list[str], num_stored: int = 0) -> None:
+        """Append the lines of a segment after the first `num_stored`, which are stored already.
+
+        Once it holds `cache_size` lines it is sealed with an offset index.
+        """
+        end = start + self.cache_size
+        filename = self._get_filename_for_segment(start, end)
+        contents = ''.join(f'{line}\n' for line in lines[num_stored:])
+        if num_stored:
+            self.file_store.append(filename, contents)
+        else:
+            self.file_store.write(filename, contents)
+        if len(lines) >= self.cache_size:
+            offsets = [0]
+            for line in lines:
+                offsets.append(offsets[-1] + len(line) + 1)
+            self.file_store.write(
+                self._get_filename_for_segment_index(start, end),
+                json.dumps(offsets),
+            )
+
+    @staticmethod
+    def _get_bounds_from_segment_filename(filename: str) -> tuple[int, int]:
+        start, end = filename.split('/')[-1].split('.')[0].split('-')
+        return int(start), int(end)
+
     @staticmethod
     def _get_id_from_filename(filename: str) -> int:
         try:
@@ -0,0 +1,166 @@
+import threading
+import time
+from typing import Any, Callable, Generic, TypeVar
+
+from openhands.core.logger import openhands_logger as logger
+
+T = TypeVar('T')
+
+
+class GroupCommitWriter(Generic[T]):
+    """Writes items on a dedicated thread, coalescing them into batches.
+
+    A batch is written once `batch_size` items are pending, `interval` seconds
+    after the first of them was submitted, or as soon as `flush` is called.
+    Batches are written one at a time and in submission order.
+
+    A batch whose `write_batch` raises is retried up to `max_retries` times,
+    then logged and counted as failed, so `flush` never waits on a batch that
+    can not be written, but reports that it was not.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[list[T]], None],
+        interval: float,
+        batch_size: int,
+        name: str = 'group-commit-writer',
+        max_retries: int = 2,
+        retry_delay: float = 0.1,
+    ) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._write_batch = write_batch
+        self._cond = threading.Condition()
+        self._pending: list[T] = []
+        self._num_submitted = 0
+        self._num_written = 0
+        self._num_failed = 0
+        self._num_retries = 0
+        # Position in submission order of the first item that could not be written
+        self._first_failed: int | None = None
+        self._num_flushes = 0
+        self._last_flush_latency = 0.0
+        self._max_flush_latency = 0.0
+        self._total_flush_latency = 0.0
+        self._flush_requested = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item: T) -> bool:
+        """Queue an item for writing.
+
+        Returns:
+            False if the writer is closed, in which case the caller must write the item itself.
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            self._pending.append(item)
+            self._num_submitted += 1
+            if len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every item submitted so far has been written.
+
+        Returns:
+            False if the timeout expired first, or if any of these items could
+            not be written.
+        """
+        with self._cond:
+            target = self._num_submitted
+            if self._num_done < target:
+                self._flush_requested = True
+                self._cond.notify_all()
+                if not self._cond.wait_for(lambda: self._num_done >= target, timeout):
+                    return False
+            return self._first_failed is None or self._first_failed >= target
+
+    def close(self, timeout: float | None = None) -> None:
+        """Write the pending items and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                'queue_depth': len(self._pending),
+                'num_flushes': self._num_flushes,
+                'num_written': self._num_written,
+                'num_failed': self._num_failed,
+                'num_retries': self._num_retries,
+                'last_flush_latency': self._last_flush_latency,
+                'max_flush_latency': self._max_flush_latency,
+                'avg_flush_latency': (
+                    self._total_flush_latency / self._num_flushes
+                    if self._num_flushes
+                    else 0.0
+                ),
+            }
+
+    @property
+    def _num_done(self) -> int:
+        return self._num_written + self._num_failed
+
+    def _write_with_retries(self, batch: list[T]) -> bool:
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._write_batch(batch)
+                return True
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f'Failed to write a batch of {len(batch)} items: {e}')
+                    return False
+                logger.warning(
+                    f'Failed to write a batch of {len(batch)} items, retrying: {e}'
+                )
+                with self._cond:
+                    self._num_retries += 1
+                time.sleep(self.retry_delay * 2**attempt)
+        return False
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: bool(self._pending) or self._closed)
+                if not self._pending:
+                    return
+                # Give other items a chance to join the batch
+                deadline = time.monotonic() + self.interval
+                while (
+                    len(self._pending) < self.batch_size
+                    and not self._flush_requested
+                    and not self._closed
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._pending
+                self._pending = []
+                self._flush_requested = False
+
+            started_at = time.monotonic()
+            failed = not self._write_with_retries(batch)
+            latency = time.monotonic() - started_at
+
+            with self._cond:
+                if failed:
+                    if self._first_failed is None:
+                        self._first_failed = self._num_done
+                    self._num_failed += len(batch)
+                else:
+                    self._num_written += len(batch)
+                self._num_flushes += 1
+                self._last_flush_latency = latency
+                self._max_flush_latency = max(self._max_flush_latency, latency)
+                self._total_flush_latency += latency
+                self._cond.notify_all()
@@ -0,0 +1,133 @@
+import re
+from bisect import bisect
+from typing import Any, Iterable
+
+SECRET_PLACEHOLDER = '<secret_hidden>'
+
+# Beyond this length a substring search per secret beats the combined pattern,
+# as str.replace skips ahead much faster than the regex engine steps through.
+_MAX_PATTERN_TEXT_LENGTH = 4096
+
+
+class SecretRedactor:
+    """Replaces every occurrence of a set of secrets in nested event data.
+
+    The secrets are compiled once into a single pattern shaped like a trie, so a
+    string is scanned once whatever the number of secrets. Where secrets overlap
+    the longest one is hidden, and then the shorter ones in what is left visible.
+    """
+
+    def __init__(self, secrets: Iterable[str] = ()) -> None:
+        # Longest first, so a secret containing another is replaced whole
+        self._secrets = sorted({s for s in secrets if s}, key=lambda s: (-len(s), s))
+        self._pattern = _compile_trie_pattern(self._secrets) if self._secrets else None
+        # The pattern takes the longest match at the leftmost position, which only
+        # agrees with hiding the longest secrets first if no secret can start
+        # partway through another one
+        self._use_pattern = not _have_partial_overlaps(self._secrets)
+
+    def redact(self, data: Any) -> Any:
+        """Redact the strings in dicts, lists and tuples. Dicts and lists are updated in place."""
+        if self._pattern is None:
+            return data
+        return self._redact(data)
+
+    def has_secrets(self, data: Any) -> bool:
+        """Whether any string in dicts, lists and tuples holds a secret."""
+        if self._pattern is None:
+            return False
+        return self._has_secrets(data)
+
+    def _has_secrets(self, data: Any) -> bool:
+        if isinstance(data, str):
+            if len(data) > _MAX_PATTERN_TEXT_LENGTH:
+                return any(secret in data for secret in self._secrets)
+            assert self._pattern is not None
+            return self._pattern.search(data) is not None
+        if isinstance(data, dict):
+            return any(self._has_secrets(value) for value in data.values())
+        if isinstance(data, (list, tuple)):
+            return any(self._has_secrets(value) for value in data)
+        return False
+
+    def _redact(self, data: Any) -> Any:
+        if isinstance(data, str):
+            return self._redact_str(data)
+        if isinstance(data, dict):
+            for key, value in data.items():
+                data[key] = self._redact(value)
+        elif isinstance(data, list):
+            for i, value in enumerate(data):
+                data[i] = self._redact(value)
+        elif isinstance(data, tuple):
+            return tuple(self._redact(value) for value in data)
+        return data
+
+    def _redact_str(self, value: str) -> str:
+        if len(value) > _MAX_PATTERN_TEXT_LENGTH or not self._use_pattern:
+            return self._redact_longest_first(value)
+        assert self._pattern is not None
+        return self._pattern.sub(SECRET_PLACEHOLDER, value)
+
+    def _redact_longest_first(self, value: str) -> str:
+        # Find the spans to hide in the original string, so that a placeholder is
+        # never searched for the remaining secrets
+        spans: list[tuple[int, int]] = []
+        for secret in self._secrets:
+            start = value.find(secret)
+            while start != -1:
+                end = start + len(secret)
+                i = bisect(spans, (start, end))
+                if (i and spans[i - 1][1] > start) or (
+                    i < len(spans) and spans[i][0] < end
+                ):
+                    start = value.find(secret, start + 1)
+                else:
+                    spans.insert(i, (start, end))
+                    start = value.find(secret, end)
+        if not spans:
+            return value
+        parts = []
+        pos = 0
+        for start, end in spans:
+            parts.append(value[pos:start])
+            parts.append(SECRET_PLACEHOLDER)
+            pos = end
+        parts.append(value[pos:])
+        return ''.join(parts)
+
+
+def _have_partial_overlaps(words: list[str]) -> bool:
+    """Whether the end of a word is the start of another word (or of itself)."""
+    prefixes = {word[:i] for word in words for i in range(1, len(word))}
+    return any(word[i:] in prefixes for word in words for i in range(1, len(word)))
+
+
+def _compile_trie_pattern(words: list[str]) -> re.Pattern[str]:
+    """Compile an alternation of literal words, sharing their common prefixes.
+
+    A flat `a|b|c` alternation retries every word at every position; factoring the
+    prefixes means each position only follows the branch matching its characters.
+    """
+    trie: dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return re.compile(_trie_to_regex(trie))
+
+
+def _trie_to_regex(node: dict[str, dict]) -> str:
+    branches = [
+        re.escape(char) + _trie_to_regex(child)
+        for char, child in sorted(node.items())
+        if char
+    ]
+    if not branches:
+        return ''
+    regex = branches[0] if len(branches) == 1 else f'(?:{"|".join(branches)})'
+    if '' in node:
+        # A word ends here; the greedy ? still prefers the longer words
+        regex = f'(?:{regex})?'
+    return regex
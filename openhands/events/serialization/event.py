@@ -1,6 +1,8 @@
-from dataclasses import asdict
+import copy
+from dataclasses import asdict, dataclass, fields, is_dataclass
 from datetime import datetime
 from enum import Enum
+from functools import cache
 from typing import Any
 
 from pydantic import BaseModel
@@ -8,9 +10,9 @@ from pydantic import BaseModel
 from openhands.events import Event, EventSource
 from openhands.events.serialization.action import action_from_dict
 from openhands.events.serialization.observation import observation_from_dict
-from openhands.events.serialization.utils import remove_fields
+from openhands.events.serialization.utils import ATOMIC_TYPES, remove_fields
 from openhands.events.tool import ToolCallMetadata
-from openhands.llm.metrics import Cost, Metrics, ResponseLatency, TokenUsage
+from openhands.llm.metrics import Metrics
 
 # TODO: move `content` into `extras`
 TOP_KEYS = [
@@ -67,24 +69,7 @@ def event_from_dict(data: dict[str, Any]) -> 'Event':
             if key == 'tool_call_metadata':
                 value = ToolCallMetadata(**value)
             if key == 'llm_metrics':
-                metrics = Metrics()
-                if isinstance(value, dict):
-                    metrics.accumulated_cost = value.get('accumulated_cost', 0.0)
-                    for cost in value.get('costs', []):
-                        metrics._costs.append(Cost(**cost))
-                    metrics.response_latencies = [
-                        ResponseLatency(**latency)
-                        for latency in value.get('response_latencies', [])
-                    ]
-                    metrics.token_usages = [
-                        TokenUsage(**usage) for usage in value.get('token_usages', [])
-                    ]
-                    # Set accumulated token usage if available
-                    if 'accumulated_token_usage' in value:
-                        metrics._accumulated_token_usage = TokenUsage(
-                            **value.get('accumulated_token_usage', {})
-                        )
-                value = metrics
+                value = Metrics.from_dict(value if isinstance(value, dict) else {})
             setattr(evt, '_' + key, value)
     return evt
 
@@ -95,51 +80,94 @@ def _convert_pydantic_to_dict(obj: BaseModel | dict) -> dict:
     return obj
 
 
-def event_to_dict(event: 'Event') -> dict:
-    props = asdict(event)
-    d = {}
-    for key in TOP_KEYS:
-        if hasattr(event, key) and getattr(event, key) is not None:
-            d[key] = getattr(event, key)
-        elif hasattr(event, f'_{key}') and getattr(event, f'_{key}') is not None:
-            d[key] = getattr(event, f'_{key}')
-        if key == 'id' and d.get('id') == -1:
-            d.pop('id', None)
-        if key == 'timestamp' and 'timestamp' in d:
-            if isinstance(d['timestamp'], datetime):
-                d['timestamp'] = d['timestamp'].isoformat()
-        if key == 'source' and 'source' in d:
+def _copy_field_value(value: Any) -> Any:
+    """Copy a field value the way `dataclasses.asdict` does, without its generic dispatch."""
+    value_type = type(value)
+    if value_type in ATOMIC_TYPES or isinstance(value, Enum):
+        return value
+    if value_type is list:
+        return [_copy_field_value(v) for v in value]
+    if value_type is dict:
+        return {_copy_field_value(k): _copy_field_value(v) for k, v in value.items()}
+    if value_type is tuple:
+        return tuple(_copy_field_value(v) for v in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return asdict(value)
+    return copy.deepcopy(value)
+
+
+@dataclass(frozen=True)
+class _EventSerializer:
+    """The parts of `event_to_dict` that only depend on the class of the event."""
+
+    field_names: tuple[str, ...]
+    """The dataclass fields serialized as args or extras, in declaration order."""
+    has_success: bool
+
+    def to_dict(self, event: 'Event') -> dict:
+        d: dict[str, Any] = {}
+        for key in TOP_KEYS:
+            value = getattr(event, key, None)
+            if value is None:
+                value = getattr(event, f'_{key}', None)
+                if value is None:
+                    continue
+            d[key] = value
+        if d.get('id') == -1:
+            del d['id']
+        if isinstance(d.get('timestamp'), datetime):
+            d['timestamp'] = d['timestamp'].isoformat()
+        if 'source' in d:
             d['source'] = d['source'].value
-        if key == 'recall_type' and 'recall_type' in d:
-            d['recall_type'] = d['recall_type'].value
-        if key == 'tool_call_metadata' and 'tool_call_metadata' in d:
-            d['tool_call_metadata'] = d['tool_call_metadata'].model_dump()
-        if key == 'llm_metrics' and 'llm_metrics' in d:
+        if 'tool_call_metadata' in d:
+            # The model response holds litellm types pydantic warns about, and
+            # building those warnings costs more than the dump itself
+            d['tool_call_metadata'] = d['tool_call_metadata'].model_dump(warnings=False)
+        if 'llm_metrics' in d:
             d['llm_metrics'] = d['llm_metrics'].get()
-        props.pop(key, None)
-    if 'security_risk' in props and props['security_risk'] is None:
-        props.pop('security_risk')
-    if 'action' in d:
-        d['args'] = props
-        if event.timeout is not None:
-            d['timeout'] = event.timeout
-    elif 'observation' in d:
-        d['content'] = props.pop('content', '')
-
-        # props is a dict whose values can include a complex object like an instance of a BaseModel subclass
-        # such as CmdOutputMetadata
-        # we serialize it along with the rest
-        # we also handle the Enum conversion for RecallObservation
-        d['extras'] = {
-            k: (v.value if isinstance(v, Enum) else _convert_pydantic_to_dict(v))
-            for k, v in props.items()
+
+        props = {
+            name: _copy_field_value(getattr(event, name)) for name in self.field_names
         }
-        # Include success field for CmdOutputObservation
-        if hasattr(event, 'success'):
-            d['success'] = event.success
-    else:
-        raise ValueError(f'Event must be either action or observation. has: {event}')
-    return d
+        if 'security_risk' in props and props['security_risk'] is None:
+            props.pop('security_risk')
+        if 'action' in d:
+            d['args'] = props
+            if event.timeout is not None:
+                d['timeout'] = event.timeout
+        elif 'observation' in d:
+            d['content'] = props.pop('content', '')
+
+            # props is a dict whose values can include a complex object like an instance of a BaseModel subclass
+            # such as CmdOutputMetadata
+            # we serialize it along with the rest
+            # we also handle the Enum conversion for RecallObservation
+            d['extras'] = {
+                k: (v.value if isinstance(v, Enum) else _convert_pydantic_to_dict(v))
+                for k, v in props.items()
+            }
+            # Include success field for CmdOutputObservation
+            if self.has_success:
+                d['success'] = event.success  # type: ignore[attr-defined]
+        else:
+            raise ValueError(
+                f'Event must be either action or observation. has: {event}'
+            )
+        return d
+
+
+@cache
+def _get_event_serializer(event_class: type) -> _EventSerializer:
+    return _EventSerializer(
+        field_names=tuple(
+            f.name for f in fields(event_class) if f.name not in TOP_KEYS
+        ),
+        has_success=hasattr(event_class, 'success'),
+    )
+
+
+def event_to_dict(event: 'Event') -> dict:
+    return _get_event_serializer(type(event)).to_dict(event)
 
 
 def event_to_trajectory(event: 'Event', include_screenshots: bool = False) -> dict:
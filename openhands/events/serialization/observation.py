@@ -1,4 +1,3 @@
-import copy
 from typing import Any
 
 from openhands.events.event import RecallType
@@ -29,6 +28,7 @@ from openhands.events.observation.mcp import MCPObservation
 from openhands.events.observation.observation import Observation
 from openhands.events.observation.reject import UserRejectObservation
 from openhands.events.observation.success import SuccessObservation
+from openhands.events.serialization.utils import copy_value
 
 observations = (
     NullObservation,
@@ -104,7 +104,7 @@ def observation_from_dict(observation: dict) -> Observation:
     observation.pop('observation')
     observation.pop('message', None)
     content = observation.pop('content', '')
-    extras = copy.deepcopy(observation.pop('extras', {}))
+    extras = copy_value(observation.pop('extras', {}))
 
     extras = handle_observation_deprecated_extras(extras)
 
@@ -1,3 +1,21 @@
+import copy
+from typing import Any
+
+ATOMIC_TYPES = frozenset({str, int, float, bool, type(None)})
+
+
+def copy_value(value: Any) -> Any:
+    """Deep copy a value, with fast paths for the types JSON decodes to."""
+    value_type = type(value)
+    if value_type in ATOMIC_TYPES:
+        return value
+    if value_type is list:
+        return [copy_value(v) for v in value]
+    if value_type is dict:
+        return {k: copy_value(v) for k, v in value.items()}
+    return copy.deepcopy(value)
+
+
 def remove_fields(obj: dict | list | tuple, fields: set[str]) -> None:
     """Remove fields from an object.
 
@@ -1,7 +1,10 @@
 import asyncio
+import copy
 import queue
 import threading
+from bisect import insort
 from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 from functools import partial
@@ -9,7 +12,16 @@ from typing import Any, Callable
 
 from openhands.core.logger import openhands_logger as logger
 from openhands.events.event import Event, EventSource
-from openhands.events.event_store import EventStore
+from openhands.events.event_dispatcher import (
+    EventChannel,
+    EventDispatchMode,
+    get_event_dispatcher,
+)
+from openhands.events.event_lru_cache import EVENT_LRU_CACHE
+from openhands.events.event_search_index import EventIndexEntry, EventSearchIndexShard
+from openhands.events.event_store import EventLogFormat, EventStore
+from openhands.events.group_commit_writer import GroupCommitWriter
+from openhands.events.secret_redactor import SecretRedactor
 from openhands.events.serialization.event import event_from_dict, event_to_dict
 from openhands.io import json
 from openhands.storage import FileStore
@@ -31,6 +43,14 @@ class EventStreamSubscriber(str, Enum):
     TEST = 'test'
 
 
+# Subscribers whose callbacks block for long (agent steps, running actions). With
+# the asyncio dispatch mode they get a thread of their own, so that they do not
+# hold back the subscribers of other conversations sharing a worker.
+_BLOCKING_SUBSCRIBERS = frozenset(
+    {EventStreamSubscriber.AGENT_CONTROLLER, EventStreamSubscriber.RUNTIME}
+)
+
+
 async def session_exists(
     sid: str, file_store: FileStore, user_id: str | None = None
 ) -> bool:
@@ -41,6 +61,15 @@ async def session_exists(
         return False
 
 
+@dataclass
+class _PendingWrite:
+    """An event waiting to be written, with the page or segment it belongs to."""
+
+    event: Event
+    event_json: str
+    write_page: list
+
+
 class EventStream(EventStore):
     secrets: dict[str, str]
     # For each subscriber ID, there is a map of callback functions - useful
@@ -48,26 +77,90 @@ class EventStream(EventStore):
     _subscribers: dict[str, dict[str, Callable]]
     _lock: threading.Lock
     _queue: queue.Queue[Event]
-    _queue_thread: threading.Thread
+    _queue_thread: threading.Thread | None
+    _channel: EventChannel | None
     _queue_loop: asyncio.AbstractEventLoop | None
     _thread_pools: dict[str, dict[str, ThreadPoolExecutor]]
     _thread_loops: dict[str, dict[str, asyncio.AbstractEventLoop]]
     _write_page_cache: list[dict]
-
-    def __init__(self, sid: str, file_store: FileStore, user_id: str | None = None):
-        super().__init__(sid, file_store, user_id)
+    _write_segment: list[str]
+    _segment_lock: threading.Lock
+    _stored_segment: tuple[int, int]
+    _manifest_lock: threading.Lock
+    _writer: GroupCommitWriter[_PendingWrite] | None
+    _secret_redactor: SecretRedactor
+    _index_shards: dict[int, EventSearchIndexShard]
+    _index_resume_id: int
+
+    def __init__(
+        self,
+        sid: str,
+        file_store: FileStore,
+        user_id: str | None = None,
+        log_format: EventLogFormat = EventLogFormat.FILES,
+        write_behind_interval: float = 0.0,
+        write_behind_batch_size: int = 100,
+        dispatch_mode: EventDispatchMode = EventDispatchMode.THREADS,
+        dispatch_queue_size: int = 1000,
+    ):
+        """Create an event stream.
+
+        Args:
+            sid: The conversation id
+            file_store: Where the events are stored
+            user_id: The owner of the conversation, if any
+            log_format: The event log format to use if this is a new conversation
+            write_behind_interval: If positive, events are published as soon as they are added,
+                and written in batches on a background thread up to this many seconds later.
+                Call `flush` to wait until they are stored.
+            write_behind_batch_size: Number of pending events that triggers a write without
+                waiting for the interval
+            dispatch_mode: How events are delivered to subscribers
+            dispatch_queue_size: With the asyncio dispatch mode, the number of events a
+                subscriber may fall behind before delivery to later subscribers waits for it
+        """
+        super().__init__(sid, file_store, user_id, log_format=log_format)
         self._stop_flag = threading.Event()
         self._queue: queue.Queue[Event] = queue.Queue()
         self._thread_pools = {}
         self._thread_loops = {}
         self._queue_loop = None
-        self._queue_thread = threading.Thread(target=self._run_queue_loop)
-        self._queue_thread.daemon = True
-        self._queue_thread.start()
+        self._queue_thread = None
+        self._channel = None
+        if dispatch_mode == EventDispatchMode.ASYNCIO:
+            self._channel = get_event_dispatcher().open_channel(dispatch_queue_size)
+        else:
+            self._queue_thread = threading.Thread(target=self._run_queue_loop)
+            self._queue_thread.daemon = True
+            self._queue_thread.start()
         self._subscribers = {}
         self._lock = threading.Lock()
         self.secrets = {}
+        self._secret_redactor = SecretRedactor()
         self._write_page_cache = []
+        self._write_segment = []
+        self._segment_lock = threading.Lock()
+        # The start of the last segment written and how many of its lines are stored
+        self._stored_segment = (0, 0)
+        self._manifest_lock = threading.Lock()
+        if self.log_format == EventLogFormat.SEGMENTS:
+            # Continue the last segment if it is still open
+            start, end = self._get_segment_bounds_for_id(self.cur_id)
+            lines, complete = self._read_segment_lines(start, end)
+            self._write_segment = lines + ['null'] * (self.cur_id - start - len(lines))
+            # A line cut short is dropped by rewriting the segment
+            self._stored_segment = (start, len(lines) if complete else 0)
+        # Search index shards still missing events, and the first id this stream writes
+        self._index_shards = {}
+        self._index_resume_id = self.cur_id
+        self._writer = None
+        if write_behind_interval > 0:
+            self._writer = GroupCommitWriter(
+                self._write_events,
+                write_behind_interval,
+                write_behind_batch_size,
+                name=f'event-writer-{sid}',
+            )
 
     def _init_thread_loop(self, subscriber_id: str, callback_id: str) -> None:
         loop = asyncio.new_event_loop()
@@ -76,9 +169,38 @@ class EventStream(EventStore):
             self._thread_loops[subscriber_id] = {}
         self._thread_loops[subscriber_id][callback_id] = loop
 
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every event added so far is stored.
+
+        Returns:
+            False if the timeout expired first, or if some of these events
+            could not be stored.
+        """
+        if self._writer is None:
+            return True
+        return self._writer.flush(timeout)
+
+    def get_write_metrics(self) -> dict[str, Any]:
+        """Queue depth and flush latency of the background writer, if there is one."""
+        if self._writer is None:
+            return {}
+        return self._writer.get_metrics()
+
+    def get_dispatch_metrics(self) -> dict[str, Any]:
+        """Queue depths and lag of each subscriber, with the asyncio dispatch mode."""
+        if self._channel is None:
+            return {}
+        return self._channel.get_metrics()
+
     def close(self) -> None:
+        all_written = True
+        if self._writer is not None:
+            self._writer.close()
+            all_written = self._writer.get_metrics()['num_failed'] == 0
         self._stop_flag.set()
-        if self._queue_thread.is_alive():
+        if self._channel is not None:
+            self._channel.close()
+        if self._queue_thread is not None and self._queue_thread.is_alive():
             self._queue_thread.join()
 
         subscriber_ids = list(self._subscribers.keys())
@@ -91,6 +213,13 @@ class EventStream(EventStore):
         while not self._queue.empty():
             self._queue.get()
 
+        # Do not create a manifest (and so a conversation) for an empty stream,
+        # nor record events that could not be written
+        if not all_written:
+            logger.error(f'Some events of session {self.sid} could not be stored')
+        elif self.cur_id > 0 and self.cur_id != self._manifest_cur_id:
+            self._update_manifest(self.cur_id)
+
     def _clean_up_subscriber(self, subscriber_id: str, callback_id: str) -> None:
         if subscriber_id not in self._subscribers:
             logger.warning(f'Subscriber not found during cleanup: {subscriber_id}')
@@ -98,6 +227,8 @@ class EventStream(EventStore):
         if callback_id not in self._subscribers[subscriber_id]:
             logger.warning(f'Callback not found during cleanup: {callback_id}')
             return
+        if self._channel is not None:
+            self._channel.unsubscribe(subscriber_id, callback_id)
         if (
             subscriber_id in self._thread_loops
             and callback_id in self._thread_loops[subscriber_id]
@@ -134,8 +265,10 @@ class EventStream(EventStore):
         callback: Callable[[Event], None],
         callback_id: str,
     ) -> None:
-        initializer = partial(self._init_thread_loop, subscriber_id, callback_id)
-        pool = ThreadPoolExecutor(max_workers=1, initializer=initializer)
+        """Call back with each event added from now on.
+
+        With the asyncio dispatch mode the callback may also be a coroutine function.
+        """
         if subscriber_id not in self._subscribers:
             self._subscribers[subscriber_id] = {}
             self._thread_pools[subscriber_id] = {}
@@ -146,6 +279,16 @@ class EventStream(EventStore):
             )
 
         self._subscribers[subscriber_id][callback_id] = callback
+        if self._channel is not None:
+            self._channel.subscribe(
+                subscriber_id,
+                callback_id,
+                callback,
+                dedicated_thread=subscriber_id in _BLOCKING_SUBSCRIBERS,
+            )
+            return
+        initializer = partial(self._init_thread_loop, subscriber_id, callback_id)
+        pool = ThreadPoolExecutor(max_workers=1, initializer=initializer)
         self._thread_pools[subscriber_id][callback_id] = pool
 
     def unsubscribe(
@@ -174,20 +317,35 @@ class EventStream(EventStore):
 
             # Take a copy of the current write page
             current_write_page = self._write_page_cache
+            current_write_segment = self._write_segment
 
             data = event_to_dict(event)
-            data = self._replace_secrets(data)
-            event = event_from_dict(data)
-            current_write_page.append(data)
-
-            # If the page is full, create a new page for future events / other threads to use
-            if len(current_write_page) == self.cache_size:
-                self._write_page_cache = []
+            if self._secret_redactor.has_secrets(data):
+                # Only rebuilt when needed, so that subscribers never see the secrets
+                data = self._replace_secrets(data)
+                event = event_from_dict(data)
+            if self.log_format == EventLogFormat.SEGMENTS:
+                event_json = json.dumps(data)
+                current_write_segment.append(event_json)
+                # Segments are aligned on ids, so readers can find them without listing
+                if (event.id + 1) % self.cache_size == 0:
+                    self._write_segment = []
+            else:
+                current_write_page.append(data)
+
+                # If the page is full, create a new page for future events / other threads to use
+                if len(current_write_page) == self.cache_size:
+                    self._write_page_cache = []
 
         if event.id is not None:
             # Write the event to the store - this can take some time
-            event_json = json.dumps(data)
-            filename = self._get_filename_for_id(event.id, self.user_id)
+            if self.log_format == EventLogFormat.SEGMENTS:
+                filename = self._get_filename_for_segment(
+                    *self._get_segment_bounds_for_id(event.id)
+                )
+            else:
+                event_json = json.dumps(data)
+                filename = self._get_filename_for_id(event.id, self.user_id)
             if len(event_json) > 1_000_000:  # Roughly 1MB in bytes, ignoring encoding
                 logger.warning(
                     f'Saving event JSON over 1MB: {len(event_json):,} bytes, filename: {filename}',
@@ -197,11 +355,105 @@ class EventStream(EventStore):
                         'size': len(event_json),
                     },
                 )
-            self.file_store.write(filename, event_json)
+            if self.log_format == EventLogFormat.SEGMENTS:
+                write_page: list = current_write_segment
+            else:
+                write_page = current_write_page
+            # A copy, so subscribers changing the event do not change what is indexed
+            pending_write = _PendingWrite(copy.copy(event), event_json, write_page)
+            if self._writer is None or not self._writer.submit(pending_write):
+                self._write_events([pending_write])
+            EVENT_LRU_CACHE.put(
+                self.file_store, self.user_id, self.sid, event, len(event_json)
+            )
+        if self._channel is not None:
+            self._channel.publish(event)
+        else:
+            self._queue.put(event)
+
+    def _write_events(self, pending_writes: list[_PendingWrite]) -> None:
+        """Store events, writing each page or segment shared by several of them only once."""
+        if self.log_format == EventLogFormat.SEGMENTS:
+            last_writes: dict[int, _PendingWrite] = {}
+            for pending_write in pending_writes:
+                start, _ = self._get_segment_bounds_for_id(pending_write.event.id)
+                last_writes[start] = pending_write
+            for start in sorted(last_writes):
+                pending_write = last_writes[start]
+                self._store_write_segment(
+                    pending_write.event.id, pending_write.write_page
+                )
+        else:
+            for pending_write in pending_writes:
+                filename = self._get_filename_for_id(
+                    pending_write.event.id, self.user_id
+                )
+                self.file_store.write(filename, pending_write.event_json)
+
+            # Store the cache pages last - if they are not present during reads then they will simply be bypassed.
+            write_pages = {id(p.write_page): p.write_page for p in pending_writes}
+            for write_page in write_pages.values():
+                self._store_cache_page(write_page)
+
+        # Keep the manifest current, so that opening the store does not list the events
+        self._update_manifest(max(p.event.id for p in pending_writes) + 1)
+        self._index_events(pending_writes)
+
+    def _index_events(self, pending_writes: list[_PendingWrite]) -> None:
+        """Add stored events to the search index, storing each block of ids once it is complete."""
+        for pending_write in pending_writes:
+            event = pending_write.event
+            # The stored JSON is the text searched, so it is not serialized again
+            entry = EventIndexEntry.from_event(event, pending_write.event_json)
+            start = event.id - event.id % self.cache_size
+            with self._search_index_lock:
+                shard = self._index_shards.get(start)
+            if shard is None:
+                # Reads events back, so done without blocking searches
+                shard = self._start_search_index_shard(start)
+            with self._search_index_lock:
+                if self._search_index is not None:
+                    self._search_index.add(event.id, entry)
+                shard = self._index_shards.setdefault(start, shard)
+                shard.add(event.id, entry)
+                if not shard.is_complete():
+                    continue
+                del self._index_shards[shard.start]
+            self.file_store.write(
+                self._get_filename_for_search_index_shard(
+                    shard.start, shard.start + shard.size
+                ),
+                json.dumps(shard.to_dict()),
+            )
 
-            # Store the cache page last - if it is not present during reads then it will simply be bypassed.
-            self._store_cache_page(current_write_page)
-        self._queue.put(event)
+    def _start_search_index_shard(self, start: int) -> EventSearchIndexShard:
+        shard = EventSearchIndexShard(start, self.cache_size)
+        # The block may have been started before this stream was opened
+        resume_id = min(start + self.cache_size, self._index_resume_id)
+        if start < resume_id:
+            for event in self.search_events(start, resume_id - 1):
+                shard.add(event.id, EventIndexEntry.from_event(event))
+            for prior_id in range(start, resume_id):
+                shard.skip(prior_id)
+        return shard
+
+    def _store_write_segment(self, id: int, current_write_segment: list[str]) -> None:
+        """Append the events of the segment holding an event which are not stored yet."""
+        start, _ = self._get_segment_bounds_for_id(id)
+        with self._segment_lock:
+            # Copy inside the lock so a slower thread never stores a shorter segment after a longer one
+            lines = list(current_write_segment)
+            stored_start, num_stored = self._stored_segment
+            if stored_start != start:
+                num_stored = 0
+            if num_stored >= len(lines):
+                return
+            self._store_segment(start, lines, num_stored)
+            self._stored_segment = (start, len(lines))
+
+    def _update_manifest(self, cur_id: int) -> None:
+        with self._manifest_lock:
+            self._write_manifest(cur_id)
 
     def _store_cache_page(self, current_write_page: list[dict]):
         """Store a page in the cache. Reading individual events is slow when there are a lot of them, so we use pages."""
@@ -212,21 +464,20 @@ class EventStream(EventStore):
         contents = json.dumps(current_write_page)
         cache_filename = self._get_filename_for_cache(start, end)
         self.file_store.write(cache_filename, contents)
+        # Recorded in the manifest at the end of the batch
+        with self._manifest_lock:
+            insort(self._cache_page_starts, start)
 
     def set_secrets(self, secrets: dict[str, str]) -> None:
         self.secrets = secrets.copy()
+        self._secret_redactor = SecretRedactor(self.secrets.values())
 
     def update_secrets(self, secrets: dict[str, str]) -> None:
         self.secrets.update(secrets)
+        self._secret_redactor = SecretRedactor(self.secrets.values())
 
     def _replace_secrets(self, data: dict[str, Any]) -> dict[str, Any]:
-        for key in data:
-            if isinstance(data[key], dict):
-                data[key] = self._replace_secrets(data[key])
-            elif isinstance(data[key], str):
-                for secret in self.secrets.values():
-                    data[key] = data[key].replace(secret, '<secret_hidden>')
-        return data
+        return self._secret_redactor.redact(data)
 
     def _run_queue_loop(self) -> None:
         self._queue_loop = asyncio.new_event_loop()
@@ -10,6 +10,11 @@ from openhands.events.observation import CmdOutputMetadata
 from openhands.events.serialization import event_to_dict
 from openhands.llm.metrics import Metrics
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 
 class OpenHandsJSONEncoder(json.JSONEncoder):
     """Custom JSON encoder that handles datetime and event objects"""
@@ -47,10 +52,45 @@ def dumps(obj, **kwargs):
     return json.dumps(obj, **encoder_kwargs)
 
 
+# Integers of 19 digits or more may not fit in 64 bits, and orjson decodes
+# those as floats where the stdlib keeps them exact. Runs of digits are found
+# by mapping digits to 0 and everything else to a space, which is several
+# times faster than a regular expression.
+_DIGITS_TABLE = bytes(
+    ord('0') if chr(i) in '0123456789' else ord(' ') for i in range(256)
+)
+_LONG_DIGITS = b'0' * 19
+
+
+def _has_long_digits(json_str: str | bytes) -> bool:
+    if isinstance(json_str, str):
+        json_str = json_str.encode('utf-8', 'surrogatepass')
+    return _LONG_DIGITS in json_str.translate(_DIGITS_TABLE)
+
+
+def decode(json_str: str | bytes):
+    """Decode a JSON document, like json.loads but with orjson when it is installed.
+
+    Invalid documents raise json.JSONDecodeError; there is no repair, so this
+    is the one to use for stored data.
+    """
+    # orjson decodes to the same objects as the stdlib, but rejects some input
+    # the stdlib accepts (NaN, Infinity), so it only gets the first try
+    if orjson is not None:
+        if not _has_long_digits(json_str):
+            try:
+                return orjson.loads(json_str)
+            except orjson.JSONDecodeError:
+                pass
+    return json.loads(json_str)
+
+
 def loads(json_str, **kwargs):
     """Create a JSON object from str"""
     try:
-        return json.loads(json_str, **kwargs)
+        if kwargs:
+            return json.loads(json_str, **kwargs)
+        return decode(json_str)
     except json.JSONDecodeError:
         pass
     depth = 0
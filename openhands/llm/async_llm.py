@@ -1,15 +1,16 @@
 import asyncio
+import time
 from functools import partial
 from typing import Any, Callable
 
 from litellm import acompletion as litellm_acompletion
+from litellm.types.utils import ModelResponse
 
 from openhands.core.exceptions import UserCancelledError
 from openhands.core.logger import openhands_logger as logger
 from openhands.llm.llm import (
     LLM,
     LLM_RETRY_EXCEPTIONS,
-    REASONING_EFFORT_SUPPORTED_MODELS,
 )
 from openhands.utils.shutdown_listener import should_continue
 
@@ -20,21 +21,9 @@ class AsyncLLM(LLM):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
 
+        # Same arguments as the synchronous completion, e.g. for reasoning models
         self._async_completion = partial(
-            self._call_acompletion,
-            model=self.config.model,
-            api_key=self.config.api_key.get_secret_value()
-            if self.config.api_key
-            else None,
-            base_url=self.config.base_url,
-            api_version=self.config.api_version,
-            custom_llm_provider=self.config.custom_llm_provider,
-            max_tokens=self.config.max_output_tokens,
-            timeout=self.config.timeout,
-            temperature=self.config.temperature,
-            top_p=self.config.top_p,
-            drop_params=self.config.drop_params,
-            seed=self.config.seed,
+            self._call_acompletion, **self._completion_unwrapped.keywords
         )
 
         async_completion_unwrapped = self._async_completion
@@ -45,38 +34,23 @@ class AsyncLLM(LLM):
             retry_min_wait=self.config.retry_min_wait,
             retry_max_wait=self.config.retry_max_wait,
             retry_multiplier=self.config.retry_multiplier,
+            retry_listener=self.retry_listener,
         )
         async def async_completion_wrapper(*args: Any, **kwargs: Any) -> Any:
-            """Wrapper for the litellm acompletion function that adds logging and cost tracking."""
-            messages: list[dict[str, Any]] | dict[str, Any] = []
-
-            # some callers might send the model and messages directly
-            # litellm allows positional args, like completion(model, messages, **kwargs)
-            # see llm.py for more details
-            if len(args) > 1:
-                messages = args[1] if len(args) > 1 else args[0]
-                kwargs['messages'] = messages
-
-                # remove the first args, they're sent in kwargs
-                args = args[2:]
-            elif 'messages' in kwargs:
-                messages = kwargs['messages']
-
-            # Set reasoning effort for models that support it
-            if self.config.model.lower() in REASONING_EFFORT_SUPPORTED_MODELS:
-                kwargs['reasoning_effort'] = self.config.reasoning_effort
-
-            # ensure we work with a list of messages
-            messages = messages if isinstance(messages, list) else [messages]
-
-            # if we have no messages, something went very wrong
-            if not messages:
-                raise ValueError(
-                    'The messages list is empty. At least one message is required.'
+            """Wrapper for the litellm acompletion function that adds logging and cost tracking.
+
+            Requests and responses are handled as by the synchronous completion,
+            including function calling mocked for models which do not support it.
+            """
+            request = self._prepare_completion_request(args, kwargs)
+            cache_key, cached = self._read_completion_cache(
+                async_completion_unwrapped, request.kwargs
+            )
+            if cached is not None:
+                return self._process_completion_response(
+                    request, ModelResponse(**cached), 0.0, cached=True
                 )
 
-            self.log_prompt(messages)
-
             async def check_stopped() -> None:
                 while should_continue():
                     if (
@@ -91,16 +65,13 @@ class AsyncLLM(LLM):
 
             try:
                 # Directly call and await litellm_acompletion
-                resp = await async_completion_unwrapped(*args, **kwargs)
-
-                message_back = resp['choices'][0]['message']['content']
-                self.log_response(message_back)
-
-                # log costs and tokens used
-                self._post_completion(resp)
+                start_time = time.time()
+                resp = await async_completion_unwrapped(*request.args, **request.kwargs)
+                latency = time.time() - start_time
+                self._write_completion_cache(cache_key, resp)
 
                 # We do not support streaming in this method, thus return resp
-                return resp
+                return self._process_completion_response(request, resp, latency)
 
             except UserCancelledError:
                 logger.debug('LLM request cancelled by user.')
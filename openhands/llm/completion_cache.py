@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any
+
+from openhands.core.logger import openhands_logger as logger
+
+# Arguments of a completion call which do not change its response
+_IGNORED_PARAMS = frozenset(
+    {
+        'api_key',
+        'base_url',
+        'api_version',
+        'timeout',
+        'drop_params',
+        'client',
+        # request metadata, e.g. the session id for the litellm proxy
+        'extra_body',
+    }
+)
+
+
+class CompletionCache:
+    """LLM responses stored in a local directory, by a hash of the request.
+
+    Requests are identified by everything sent to the model: model, messages,
+    tools and sampling parameters, but not credentials, endpoints or timeouts.
+    Each response is a JSON file. When the files take more than `max_bytes`,
+    the least recently used ones are removed. Several processes may share the
+    directory: entries are written atomically, and a missing or corrupt entry
+    is a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._num_bytes = sum(size for _, size, _ in self._list_entries())
+
+    @staticmethod
+    def make_key(params: dict[str, Any]) -> str:
+        """The canonical hash of the arguments of a completion call."""
+        relevant = {
+            name: value
+            for name, value in params.items()
+            if name not in _IGNORED_PARAMS and value is not None
+        }
+        canonical = json.dumps(relevant, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring unreadable completion cache entry {path}: {e}')
+            return None
+        try:
+            # the modification time orders the entries for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        data = json.dumps(value, default=str).encode()
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            with self._lock:
+                try:
+                    self._num_bytes -= os.path.getsize(path)
+                except OSError:
+                    pass
+                os.replace(tmp_path, path)
+                self._num_bytes += len(data)
+                if self._num_bytes > self.max_bytes:
+                    self._evict()
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _evict(self) -> None:
+        # Other processes may have added or removed entries, so start from the files
+        entries = sorted(self._list_entries())
+        self._num_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._num_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._num_bytes -= size
+
+    def _list_entries(self) -> list[tuple[float, int, str]]:
+        """The (modification time, size, path) of every entry."""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.json')
+
+
+_caches: dict[str, CompletionCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_completion_cache(directory: str, max_bytes: int) -> CompletionCache:
+    """The cache of a directory, shared by the LLMs of this process using it."""
+    directory = os.path.abspath(directory)
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = _caches[directory] = CompletionCache(directory, max_bytes)
+        else:
+            cache.max_bytes = max_bytes
+        return cache
@@ -1,12 +1,15 @@
 import copy
+import hashlib
+import json
 import os
+import threading
 import time
 import warnings
+from collections import OrderedDict
+from dataclasses import dataclass
 from functools import partial
 from typing import Any, Callable
 
-import httpx
-
 from openhands.core.config import LLMConfig
 
 with warnings.catch_warnings():
@@ -23,9 +26,13 @@ from litellm.exceptions import (
 from litellm.types.utils import CostPerToken, ModelResponse, Usage
 from litellm.utils import create_pretrained_tokenizer
 
-from openhands.core.exceptions import LLMNoResponseError
+from openhands.core.exceptions import (
+    LLMCompletionCacheMissError,
+    LLMNoResponseError,
+)
 from openhands.core.logger import openhands_logger as logger
 from openhands.core.message import Message
+from openhands.llm.completion_cache import CompletionCache, get_completion_cache
 from openhands.llm.debug_mixin import DebugMixin
 from openhands.llm.fn_call_converter import (
     STOP_WORDS,
@@ -33,6 +40,7 @@ from openhands.llm.fn_call_converter import (
     convert_non_fncall_messages_to_fncall_messages,
 )
 from openhands.llm.metrics import Metrics
+from openhands.llm.model_capabilities import ModelCapabilities, get_model_capabilities
 from openhands.llm.retry_mixin import RetryMixin
 
 __all__ = ['LLM']
@@ -45,45 +53,6 @@ LLM_RETRY_EXCEPTIONS: tuple[type[Exception], ...] = (
     LLMNoResponseError,
 )
 
-# cache prompt supporting models
-# remove this when we gemini and deepseek are supported
-CACHE_PROMPT_SUPPORTED_MODELS = [
-    'claude-3-7-sonnet-20250219',
-    'claude-sonnet-3-7-latest',
-    'claude-3.7-sonnet',
-    'claude-3-5-sonnet-20241022',
-    'claude-3-5-sonnet-20240620',
-    'claude-3-5-haiku-20241022',
-    'claude-3-haiku-20240307',
-    'claude-3-opus-20240229',
-    'claude-sonnet-4-20250514',
-    'claude-opus-4-20250514',
-]
-
-# function calling supporting models
-FUNCTION_CALLING_SUPPORTED_MODELS = [
-    'claude-3-7-sonnet-20250219',
-    'claude-sonnet-3-7-latest',
-    'claude-3-5-sonnet',
-    'claude-3-5-sonnet-20240620',
-    'claude-3-5-sonnet-20241022',
-    'claude-3.5-haiku',
-    'claude-3-5-haiku-20241022',
-    'claude-sonnet-4-20250514',
-    'claude-opus-4-20250514',
-    'gpt-4o-mini',
-    'gpt-4o',
-    'o1-2024-12-17',
-    'o3-mini-2025-01-31',
-    'o3-mini',
-    'o3',
-    'o3-2025-04-16',
-    'o4-mini',
-    'o4-mini-2025-04-16',
-    'gemini-2.5-pro',
-    'gpt-4.1',
-]
-
 REASONING_EFFORT_SUPPORTED_MODELS = [
     'o1-2024-12-17',
     'o1',
@@ -102,6 +71,33 @@ MODELS_WITHOUT_STOP_WORDS = [
     'o1-2024-12-17',
 ]
 
+# maximum number of message token counts remembered by each LLM
+TOKEN_COUNT_CACHE_SIZE = 10_000
+
+# custom tokenizers loaded in this process, shared by the LLMs using them
+_pretrained_tokenizers: dict[str, dict] = {}
+_pretrained_tokenizers_lock = threading.Lock()
+
+
+def _get_pretrained_tokenizer(identifier: str) -> dict:
+    """Loads a Hugging Face tokenizer once per process, in the format expected by litellm."""
+    with _pretrained_tokenizers_lock:
+        if identifier not in _pretrained_tokenizers:
+            _pretrained_tokenizers[identifier] = create_pretrained_tokenizer(identifier)
+        return _pretrained_tokenizers[identifier]
+
+
+@dataclass
+class _CompletionRequest:
+    """The arguments of a completion call, with what is needed to process its response."""
+
+    args: tuple
+    kwargs: dict[str, Any]
+    messages: list[dict[str, Any]]
+    original_fncall_messages: list[dict[str, Any]]
+    mock_function_calling: bool
+    mock_fncall_tools: list | None
+
 
 class LLM(RetryMixin, DebugMixin):
     """The LLM class represents a Language Model instance.
@@ -154,9 +150,19 @@ class LLM(RetryMixin, DebugMixin):
 
         # if using a custom tokenizer, make sure it's loaded and accessible in the format expected by litellm
         if self.config.custom_tokenizer is not None:
-            self.tokenizer = create_pretrained_tokenizer(self.config.custom_tokenizer)
+            self.tokenizer = _get_pretrained_tokenizer(self.config.custom_tokenizer)
         else:
             self.tokenizer = None
+        # token counts of formatted messages, by content hash
+        self._token_counts: OrderedDict[str, int] = OrderedDict()
+        self._token_counts_lock = threading.Lock()
+
+        self.completion_cache: CompletionCache | None = None
+        if self.config.cache_completions:
+            self.completion_cache = get_completion_cache(
+                self.config.cache_completions_folder,
+                self.config.cache_completions_max_size,
+            )
 
         # set up the completion function
         kwargs: dict[str, Any] = {
@@ -209,176 +215,243 @@ class LLM(RetryMixin, DebugMixin):
         )
         def wrapper(*args: Any, **kwargs: Any) -> Any:
             """Wrapper for the litellm completion function. Logs the input and output of the completion function."""
-            from openhands.io import json
-
-            messages_kwarg: list[dict[str, Any]] | dict[str, Any] = []
-            mock_function_calling = not self.is_function_calling_active()
-
-            # some callers might send the model and messages directly
-            # litellm allows positional args, like completion(model, messages, **kwargs)
-            if len(args) > 1:
-                # ignore the first argument if it's provided (it would be the model)
-                # design wise: we don't allow overriding the configured values
-                # implementation wise: the partial function set the model as a kwarg already
-                # as well as other kwargs
-                messages_kwarg = args[1] if len(args) > 1 else args[0]
-                kwargs['messages'] = messages_kwarg
-
-                # remove the first args, they're sent in kwargs
-                args = args[2:]
-            elif 'messages' in kwargs:
-                messages_kwarg = kwargs['messages']
-
-            # ensure we work with a list of messages
-            messages: list[dict[str, Any]] = (
-                messages_kwarg if isinstance(messages_kwarg, list) else [messages_kwarg]
+            request = self._prepare_completion_request(args, kwargs)
+            cache_key, cached = self._read_completion_cache(
+                self._completion_unwrapped, request.kwargs
             )
+            if cached is not None:
+                return self._process_completion_response(
+                    request, ModelResponse(**cached), 0.0, cached=True
+                )
 
-            # handle conversion of to non-function calling messages if needed
-            original_fncall_messages = copy.deepcopy(messages)
-            mock_fncall_tools = None
-            # if the agent or caller has defined tools, and we mock via prompting, convert the messages
-            if mock_function_calling and 'tools' in kwargs:
-                add_in_context_learning_example = True
-                if (
-                    'openhands-lm' in self.config.model
-                    or 'devstral' in self.config.model
-                ):
-                    add_in_context_learning_example = False
+            # Record start time for latency measurement
+            start_time = time.time()
+            # we don't support streaming here, thus we get a ModelResponse
+            resp: ModelResponse = self._completion_unwrapped(
+                *request.args, **request.kwargs
+            )
+            latency = time.time() - start_time
+            self._write_completion_cache(cache_key, resp)
+            return self._process_completion_response(request, resp, latency)
 
-                messages = convert_fncall_messages_to_non_fncall_messages(
-                    messages,
-                    kwargs['tools'],
-                    add_in_context_learning_example=add_in_context_learning_example,
-                )
-                kwargs['messages'] = messages
-
-                # add stop words if the model supports it
-                if self.config.model not in MODELS_WITHOUT_STOP_WORDS:
-                    kwargs['stop'] = STOP_WORDS
-
-                mock_fncall_tools = kwargs.pop('tools')
-                if 'openhands-lm' in self.config.model:
-                    # If we don't have this, we might run into issue when serving openhands-lm
-                    # using SGLang
-                    # BadRequestError: litellm.BadRequestError: OpenAIException - Error code: 400 - {'object': 'error', 'message': '400', 'type': 'Failed to parse fc related info to json format!', 'param': None, 'code': 400}
-                    kwargs['tool_choice'] = 'none'
-                else:
-                    # tool_choice should not be specified when mocking function calling
-                    kwargs.pop('tool_choice', None)
-
-            # if we have no messages, something went very wrong
-            if not messages:
-                raise ValueError(
-                    'The messages list is empty. At least one message is required.'
-                )
+        self._completion = wrapper
 
-            # log the entire LLM prompt
-            self.log_prompt(messages)
+    def _prepare_completion_request(
+        self, args: tuple, kwargs: dict[str, Any]
+    ) -> _CompletionRequest:
+        """Prepare the arguments of a completion call, mocking function calling if the model does not support it."""
+        messages_kwarg: list[dict[str, Any]] | dict[str, Any] = []
+        mock_function_calling = not self.is_function_calling_active()
+
+        # some callers might send the model and messages directly
+        # litellm allows positional args, like completion(model, messages, **kwargs)
+        if len(args) > 1:
+            # ignore the first argument if it's provided (it would be the model)
+            # design wise: we don't allow overriding the configured values
+            # implementation wise: the partial function set the model as a kwarg already
+            # as well as other kwargs
+            messages_kwarg = args[1] if len(args) > 1 else args[0]
+            kwargs['messages'] = messages_kwarg
+
+            # remove the first args, they're sent in kwargs
+            args = args[2:]
+        elif 'messages' in kwargs:
+            messages_kwarg = kwargs['messages']
+
+        # ensure we work with a list of messages
+        messages: list[dict[str, Any]] = (
+            messages_kwarg if isinstance(messages_kwarg, list) else [messages_kwarg]
+        )
 
-            # set litellm modify_params to the configured value
-            # True by default to allow litellm to do transformations like adding a default message, when a message is empty
-            # NOTE: this setting is global; unlike drop_params, it cannot be overridden in the litellm completion partial
-            litellm.modify_params = self.config.modify_params
+        # handle conversion of to non-function calling messages if needed
+        original_fncall_messages = copy.deepcopy(messages)
+        mock_fncall_tools = None
+        # if the agent or caller has defined tools, and we mock via prompting, convert the messages
+        if mock_function_calling and 'tools' in kwargs:
+            add_in_context_learning_example = True
+            if 'openhands-lm' in self.config.model or 'devstral' in self.config.model:
+                add_in_context_learning_example = False
+
+            messages = convert_fncall_messages_to_non_fncall_messages(
+                messages,
+                kwargs['tools'],
+                add_in_context_learning_example=add_in_context_learning_example,
+            )
+            kwargs['messages'] = messages
+
+            # add stop words if the model supports it
+            if self.config.model not in MODELS_WITHOUT_STOP_WORDS:
+                kwargs['stop'] = STOP_WORDS
+
+            mock_fncall_tools = kwargs.pop('tools')
+            if 'openhands-lm' in self.config.model:
+                # If we don't have this, we might run into issue when serving openhands-lm
+                # using SGLang
+                # BadRequestError: litellm.BadRequestError: OpenAIException - Error code: 400 - {'object': 'error', 'message': '400', 'type': 'Failed to parse fc related info to json format!', 'param': None, 'code': 400}
+                kwargs['tool_choice'] = 'none'
+            else:
+                # tool_choice should not be specified when mocking function calling
+                kwargs.pop('tool_choice', None)
 
-            # if we're not using litellm proxy, remove the extra_body
-            if 'litellm_proxy' not in self.config.model:
-                kwargs.pop('extra_body', None)
+        # if we have no messages, something went very wrong
+        if not messages:
+            raise ValueError(
+                'The messages list is empty. At least one message is required.'
+            )
 
-            # Record start time for latency measurement
-            start_time = time.time()
-            # we don't support streaming here, thus we get a ModelResponse
-            resp: ModelResponse = self._completion_unwrapped(*args, **kwargs)
+        # log the entire LLM prompt
+        self.log_prompt(messages)
+
+        # set litellm modify_params to the configured value
+        # True by default to allow litellm to do transformations like adding a default message, when a message is empty
+        # NOTE: this setting is global; unlike drop_params, it cannot be overridden in the litellm completion partial
+        litellm.modify_params = self.config.modify_params
+
+        # if we're not using litellm proxy, remove the extra_body
+        if 'litellm_proxy' not in self.config.model:
+            kwargs.pop('extra_body', None)
+
+        return _CompletionRequest(
+            args=args,
+            kwargs=kwargs,
+            messages=messages,
+            original_fncall_messages=original_fncall_messages,
+            mock_function_calling=mock_function_calling,
+            mock_fncall_tools=mock_fncall_tools,
+        )
 
-            # Calculate and record latency
-            latency = time.time() - start_time
-            response_id = resp.get('id', 'unknown')
-            self.metrics.add_response_latency(latency, response_id)
+    def _read_completion_cache(
+        self, completion_fn: Callable, kwargs: dict[str, Any]
+    ) -> tuple[str | None, Any | None]:
+        """The cache key of a completion call and its cached response, if the completion cache is enabled.
 
-            non_fncall_response = copy.deepcopy(resp)
+        Raises:
+            LLMCompletionCacheMissError: If the cache is strict and has no response.
+        """
+        if self.completion_cache is None:
+            return None, None
+        # the configured arguments are bound to the completion function
+        params = {**getattr(completion_fn, 'keywords', {}), **kwargs}
+        cache_key = self.completion_cache.make_key(params)
+        cached = self.completion_cache.get(cache_key)
+        self.metrics.add_completion_cache_lookup(hit=cached is not None)
+        if cached is None and self.config.cache_completions_strict:
+            raise LLMCompletionCacheMissError(
+                f'No cached response for {self.config.model} in '
+                f'{self.config.cache_completions_folder} (key {cache_key})'
+            )
+        return cache_key, cached
 
-            # if we mocked function calling, and we have tools, convert the response back to function calling format
-            if mock_function_calling and mock_fncall_tools is not None:
-                if len(resp.choices) < 1:
-                    raise LLMNoResponseError(
-                        'Response choices is less than 1 - This is only seen in Gemini models so far. Response: '
-                        + str(resp)
-                    )
+    def _write_completion_cache(self, cache_key: str | None, response: Any) -> None:
+        """Store a response (or the chunks of a streamed one) for a cache key from `_read_completion_cache`."""
+        if self.completion_cache is None or cache_key is None:
+            return
+        if hasattr(response, 'model_dump'):
+            response = response.model_dump()
+        try:
+            self.completion_cache.put(cache_key, response)
+        except OSError as e:
+            logger.warning(f'Could not write to the completion cache: {e}')
 
-                non_fncall_response_message = resp.choices[0].message
-                # messages is already a list with proper typing from line 223
-                fn_call_messages_with_response = (
-                    convert_non_fncall_messages_to_fncall_messages(
-                        messages + [non_fncall_response_message], mock_fncall_tools
-                    )
-                )
-                fn_call_response_message = fn_call_messages_with_response[-1]
-                if not isinstance(fn_call_response_message, LiteLLMMessage):
-                    fn_call_response_message = LiteLLMMessage(
-                        **fn_call_response_message
-                    )
-                resp.choices[0].message = fn_call_response_message
+    def _process_completion_response(
+        self,
+        request: _CompletionRequest,
+        resp: ModelResponse,
+        latency: float,
+        cached: bool = False,
+    ) -> ModelResponse:
+        """Record, log and convert back the response to a prepared completion request.
+
+        Responses from the completion cache cost nothing.
+        """
+        from openhands.io import json
+
+        args, kwargs, messages = request.args, request.kwargs, request.messages
+        mock_function_calling = request.mock_function_calling
+        mock_fncall_tools = request.mock_fncall_tools
+        original_fncall_messages = request.original_fncall_messages
+
+        response_id = resp.get('id', 'unknown')
+        self.metrics.add_response_latency(latency, response_id)
+
+        non_fncall_response = copy.deepcopy(resp)
 
-            # Check if resp has 'choices' key with at least one item
-            if not resp.get('choices') or len(resp['choices']) < 1:
+        # if we mocked function calling, and we have tools, convert the response back to function calling format
+        if mock_function_calling and mock_fncall_tools is not None:
+            if len(resp.choices) < 1:
                 raise LLMNoResponseError(
                     'Response choices is less than 1 - This is only seen in Gemini models so far. Response: '
                     + str(resp)
                 )
 
-            message_back: str = resp['choices'][0]['message']['content'] or ''
-            tool_calls: list[ChatCompletionMessageToolCall] = resp['choices'][0][
-                'message'
-            ].get('tool_calls', [])
-            if tool_calls:
-                for tool_call in tool_calls:
-                    fn_name = tool_call.function.name
-                    fn_args = tool_call.function.arguments
-                    message_back += f'\nFunction call: {fn_name}({fn_args})'
-
-            # log the LLM response
-            self.log_response(message_back)
-
-            # post-process the response first to calculate cost
-            cost = self._post_completion(resp)
-
-            # log for evals or other scripts that need the raw completion
-            if self.config.log_completions:
-                assert self.config.log_completions_folder is not None
-                log_file = os.path.join(
-                    self.config.log_completions_folder,
-                    # use the metric model name (for draft editor)
-                    f'{self.metrics.model_name.replace("/", "__")}-{time.time()}.json',
+            non_fncall_response_message = resp.choices[0].message
+            # messages is already a list with proper typing from line 223
+            fn_call_messages_with_response = (
+                convert_non_fncall_messages_to_fncall_messages(
+                    messages + [non_fncall_response_message], mock_fncall_tools
                 )
+            )
+            fn_call_response_message = fn_call_messages_with_response[-1]
+            if not isinstance(fn_call_response_message, LiteLLMMessage):
+                fn_call_response_message = LiteLLMMessage(**fn_call_response_message)
+            resp.choices[0].message = fn_call_response_message
+
+        # Check if resp has 'choices' key with at least one item
+        if not resp.get('choices') or len(resp['choices']) < 1:
+            raise LLMNoResponseError(
+                'Response choices is less than 1 - This is only seen in Gemini models so far. Response: '
+                + str(resp)
+            )
 
-                # set up the dict to be logged
-                _d = {
-                    'messages': messages,
-                    'response': resp,
-                    'args': args,
-                    'kwargs': {
-                        k: v
-                        for k, v in kwargs.items()
-                        if k not in ('messages', 'client')
-                    },
-                    'timestamp': time.time(),
-                    'cost': cost,
-                }
-
-                # if non-native function calling, save messages/response separately
-                if mock_function_calling:
-                    # Overwrite response as non-fncall to be consistent with messages
-                    _d['response'] = non_fncall_response
-
-                    # Save fncall_messages/response separately
-                    _d['fncall_messages'] = original_fncall_messages
-                    _d['fncall_response'] = resp
-                with open(log_file, 'w') as f:
-                    f.write(json.dumps(_d))
-
-            return resp
+        message_back: str = resp['choices'][0]['message']['content'] or ''
+        tool_calls: list[ChatCompletionMessageToolCall] = resp['choices'][0][
+            'message'
+        ].get('tool_calls', [])
+        if tool_calls:
+            for tool_call in tool_calls:
+                fn_name = tool_call.function.name
+                fn_args = tool_call.function.arguments
+                message_back += f'\nFunction call: {fn_name}({fn_args})'
 
-        self._completion = wrapper
+        # log the LLM response
+        self.log_response(message_back)
+
+        # post-process the response first to calculate cost
+        cost = self._post_completion(resp, cached=cached)
+
+        # log for evals or other scripts that need the raw completion
+        if self.config.log_completions:
+            assert self.config.log_completions_folder is not None
+            log_file = os.path.join(
+                self.config.log_completions_folder,
+                # use the metric model name (for draft editor)
+                f'{self.metrics.model_name.replace("/", "__")}-{time.time()}.json',
+            )
+
+            # set up the dict to be logged
+            _d = {
+                'messages': messages,
+                'response': resp,
+                'args': args,
+                'kwargs': {
+                    k: v for k, v in kwargs.items() if k not in ('messages', 'client')
+                },
+                'timestamp': time.time(),
+                'cost': cost,
+            }
+
+            # if non-native function calling, save messages/response separately
+            if mock_function_calling:
+                # Overwrite response as non-fncall to be consistent with messages
+                _d['response'] = non_fncall_response
+
+                # Save fncall_messages/response separately
+                _d['fncall_messages'] = original_fncall_messages
+                _d['fncall_response'] = resp
+            with open(log_file, 'w') as f:
+                f.write(json.dumps(_d))
+
+        return resp
 
     @property
     def completion(self) -> Callable:
@@ -392,62 +465,8 @@ class LLM(RetryMixin, DebugMixin):
         if self._tried_model_info:
             return
         self._tried_model_info = True
-        try:
-            if self.config.model.startswith('openrouter'):
-                self.model_info = litellm.get_model_info(self.config.model)
-        except Exception as e:
-            logger.debug(f'Error getting model info: {e}')
-
-        if self.config.model.startswith('litellm_proxy/'):
-            # IF we are using LiteLLM proxy, get model info from LiteLLM proxy
-            # GET {base_url}/v1/model/info with litellm_model_id as path param
-            base_url = self.config.base_url.strip() if self.config.base_url else ''
-            if not base_url.startswith(('http://', 'https://')):
-                base_url = 'http://' + base_url
-
-            response = httpx.get(
-                f'{base_url}/v1/model/info',
-                headers={
-                    'Authorization': f'Bearer {self.config.api_key.get_secret_value() if self.config.api_key else None}'
-                },
-            )
-
-            resp_json = response.json()
-            if 'data' not in resp_json:
-                logger.error(
-                    f'Error getting model info from LiteLLM proxy: {resp_json}'
-                )
-            all_model_info = resp_json.get('data', [])
-            current_model_info = next(
-                (
-                    info
-                    for info in all_model_info
-                    if info['model_name']
-                    == self.config.model.removeprefix('litellm_proxy/')
-                ),
-                None,
-            )
-            if current_model_info:
-                self.model_info = current_model_info['model_info']
-                logger.debug(f'Got model info from litellm proxy: {self.model_info}')
-
-        # Last two attempts to get model info from NAME
-        if not self.model_info:
-            try:
-                self.model_info = litellm.get_model_info(
-                    self.config.model.split(':')[0]
-                )
-            # noinspection PyBroadException
-            except Exception:
-                pass
-        if not self.model_info:
-            try:
-                self.model_info = litellm.get_model_info(
-                    self.config.model.split('/')[-1]
-                )
-            # noinspection PyBroadException
-            except Exception:
-                pass
+        self._capabilities: ModelCapabilities = get_model_capabilities(self.config)
+        self.model_info = self._capabilities.model_info
         from openhands.io import json
 
         logger.debug(
@@ -495,11 +514,7 @@ class LLM(RetryMixin, DebugMixin):
 
         # Initialize function calling capability
         # Check if model name is in our supported list
-        model_name_supported = (
-            self.config.model in FUNCTION_CALLING_SUPPORTED_MODELS
-            or self.config.model.split('/')[-1] in FUNCTION_CALLING_SUPPORTED_MODELS
-            or any(m in self.config.model for m in FUNCTION_CALLING_SUPPORTED_MODELS)
-        )
+        model_name_supported = self._capabilities.supports_function_calling
 
         # Handle native_tool_calling user-defined configuration
         if self.config.native_tool_calling is None:
@@ -518,19 +533,11 @@ class LLM(RetryMixin, DebugMixin):
         Returns:
             bool: True if model is vision capable. Return False if model not supported by litellm.
         """
-        # litellm.supports_vision currently returns False for 'openai/gpt-...' or 'anthropic/claude-...' (with prefixes)
-        # but model_info will have the correct value for some reason.
-        # we can go with it, but we will need to keep an eye if model_info is correct for Vertex or other providers
-        # remove when litellm is updated to fix https://github.com/BerriAI/litellm/issues/5608
-        # Check both the full model name and the name after proxy prefix for vision support
-        return (
-            litellm.supports_vision(self.config.model)
-            or litellm.supports_vision(self.config.model.split('/')[-1])
-            or (
-                self.model_info is not None
-                and self.model_info.get('supports_vision', False)
-            )
-        )
+        return self._capabilities.supports_vision
+
+    def supports_response_schema(self) -> bool:
+        """Whether the model can be asked for a response following a JSON schema."""
+        return self._capabilities.supports_response_schema
 
     def is_caching_prompt_active(self) -> bool:
         """Check if prompt caching is supported and enabled for current model.
@@ -540,11 +547,8 @@ class LLM(RetryMixin, DebugMixin):
         """
         return (
             self.config.caching_prompt is True
-            and (
-                self.config.model in CACHE_PROMPT_SUPPORTED_MODELS
-                or self.config.model.split('/')[-1] in CACHE_PROMPT_SUPPORTED_MODELS
-            )
             # We don't need to look-up model_info, because only Anthropic models needs the explicit caching breakpoint
+            and self._capabilities.supports_prompt_caching
         )
 
     def is_function_calling_active(self) -> bool:
@@ -554,13 +558,14 @@ class LLM(RetryMixin, DebugMixin):
         """
         return self._function_calling_active
 
-    def _post_completion(self, response: ModelResponse) -> float:
+    def _post_completion(self, response: ModelResponse, cached: bool = False) -> float:
         """Post-process the completion response.
 
-        Logs the cost and usage stats of the completion call.
+        Logs the cost and usage stats of the completion call. Responses from the
+        completion cache cost nothing.
         """
         try:
-            cur_cost = self._completion_cost(response)
+            cur_cost = 0.0 if cached else self._completion_cost(response)
         except Exception:
             cur_cost = 0
 
@@ -667,12 +672,17 @@ class LLM(RetryMixin, DebugMixin):
             messages = self.format_messages_for_llm(messages_typed)
 
         # try to get the token count with the default litellm tokenizers
-        # or the custom tokenizer if set for this LLM configuration
+        # or the custom tokenizer if set for this LLM configuration.
+        # Messages are counted one by one, so that only the ones not seen before
+        # are tokenized, then the tokens priming the reply are added once.
         try:
-            return int(
+            num_tokens = sum(
+                self._get_message_token_count(message) for message in messages
+            )
+            return num_tokens + int(
                 litellm.token_counter(
                     model=self.config.model,
-                    messages=messages,
+                    messages=[],
                     custom_tokenizer=self.tokenizer,
                 )
             )
@@ -688,6 +698,29 @@ class LLM(RetryMixin, DebugMixin):
             )
             return 0
 
+    def _get_message_token_count(self, message: dict) -> int:
+        key = hashlib.sha1(
+            json.dumps(message, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        with self._token_counts_lock:
+            num_tokens = self._token_counts.get(key)
+            if num_tokens is not None:
+                self._token_counts.move_to_end(key)
+                return num_tokens
+        num_tokens = int(
+            litellm.token_counter(
+                model=self.config.model,
+                messages=[message],
+                custom_tokenizer=self.tokenizer,
+                count_response_tokens=True,
+            )
+        )
+        with self._token_counts_lock:
+            self._token_counts[key] = num_tokens
+            if len(self._token_counts) > TOKEN_COUNT_CACHE_SIZE:
+                self._token_counts.popitem(last=False)
+        return num_tokens
+
     def _is_local(self) -> bool:
         """Determines if the system is using a locally running LLM.
 
@@ -781,10 +814,13 @@ class LLM(RetryMixin, DebugMixin):
             messages = [messages]
 
         # set flags to know how to serialize the messages
+        cache_enabled = self.is_caching_prompt_active()
+        vision_enabled = self.vision_is_active()
+        function_calling_enabled = self.is_function_calling_active()
         for message in messages:
-            message.cache_enabled = self.is_caching_prompt_active()
-            message.vision_enabled = self.vision_is_active()
-            message.function_calling_enabled = self.is_function_calling_active()
+            message.cache_enabled = cache_enabled
+            message.vision_enabled = vision_enabled
+            message.function_calling_enabled = function_calling_enabled
             if 'deepseek' in self.config.model:
                 message.force_string_serializer = True
 
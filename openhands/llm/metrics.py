@@ -1,5 +1,8 @@
 import copy
 import time
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, TypeVar, overload
 
 from pydantic import BaseModel, Field
 
@@ -43,6 +46,117 @@ class TokenUsage(BaseModel):
             response_id=self.response_id,
         )
 
+    @property
+    def cache_read_ratio(self) -> float:
+        """The fraction of the prompt tokens read from the provider's prompt cache."""
+        return (
+            self.cache_read_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+        )
+
+    @property
+    def cache_write_ratio(self) -> float:
+        """The fraction of the prompt tokens written to the provider's prompt cache."""
+        return (
+            self.cache_write_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+        )
+
+
+R = TypeVar('R', bound=BaseModel)
+
+# Array type of each field of the records. Strings are stored as their index in
+# the string table of the Metrics, since model names repeat on every record.
+_STRING = 'S'
+_COST_FIELDS = {'model': _STRING, 'cost': 'd', 'timestamp': 'd'}
+_RESPONSE_LATENCY_FIELDS = {'model': _STRING, 'latency': 'd', 'response_id': _STRING}
+_TOKEN_USAGE_FIELDS = {
+    'model': _STRING,
+    'prompt_tokens': 'q',
+    'completion_tokens': 'q',
+    'cache_read_tokens': 'q',
+    'cache_write_tokens': 'q',
+    'context_window': 'q',
+    'per_turn_token': 'q',
+    'response_id': _STRING,
+}
+# Token counts summed over all the calls, except the context window which is the largest
+_TOKEN_TOTAL_FIELDS = (
+    'prompt_tokens',
+    'completion_tokens',
+    'cache_read_tokens',
+    'cache_write_tokens',
+    'context_window',
+    'per_turn_token',
+)
+
+
+class _Table:
+    """Records of one type, stored as one array per field."""
+
+    def __init__(self, record_type: type[BaseModel], fields: dict[str, str]) -> None:
+        self.record_type = record_type
+        self.fields = fields
+        self.columns = {
+            name: array('q' if typecode == _STRING else typecode)
+            for name, typecode in fields.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.columns['model'])
+
+    def append(self, values: dict[str, Any]) -> None:
+        for name, column in self.columns.items():
+            value = values[name]
+            column.append(float(value) if column.typecode == 'd' else int(value))
+
+    def clear(self) -> None:
+        for column in self.columns.values():
+            del column[:]
+
+
+class _RecordList(Sequence[R]):
+    """A list-like view of the records of a Metrics, built on access."""
+
+    def __init__(self, metrics: 'Metrics', table: _Table) -> None:
+        self._metrics = metrics
+        self._table = table
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @overload
+    def __getitem__(self, index: int) -> R: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[R]: ...
+
+    def __getitem__(self, index: int | slice) -> R | list[R]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('record index out of range')
+        return self._table.record_type(**self._metrics._get_row(self._table, index))
+
+    def __iter__(self) -> Iterator[R]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def append(self, record: R) -> None:
+        self._metrics._add_row(self._table, record.model_dump())
+
+    def extend(self, records: Iterable[R]) -> None:
+        for record in records:
+            self.append(record)
+
 
 class Metrics:
     """Metrics class can record various metrics during running and evaluation.
@@ -50,23 +164,26 @@ class Metrics:
       - accumulated_cost and costs
       - A list of ResponseLatency
       - A list of TokenUsage (one per call).
+      - The hits and misses of the completion cache.
+
+    The records are kept in arrays, one per field, rather than as pydantic
+    objects: `costs`, `response_latencies` and `token_usages` build the objects
+    when they are read. The accumulated cost and token usage are running totals.
     """
 
     def __init__(self, model_name: str = 'default') -> None:
-        self._accumulated_cost: float = 0.0
-        self._costs: list[Cost] = []
-        self._response_latencies: list[ResponseLatency] = []
         self.model_name = model_name
-        self._token_usages: list[TokenUsage] = []
-        self._accumulated_token_usage: TokenUsage = TokenUsage(
-            model=model_name,
-            prompt_tokens=0,
-            completion_tokens=0,
-            cache_read_tokens=0,
-            cache_write_tokens=0,
-            context_window=0,
-            response_id='',
-        )
+        self._strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+        self._costs = _Table(Cost, _COST_FIELDS)
+        self._response_latencies = _Table(ResponseLatency, _RESPONSE_LATENCY_FIELDS)
+        self._token_usages = _Table(TokenUsage, _TOKEN_USAGE_FIELDS)
+        self._accumulated_cost: float = 0.0
+        self._accumulated_tokens = array('q', [0] * len(_TOKEN_TOTAL_FIELDS))
+        self._accumulated_token_model = model_name
+        self._accumulated_token_response_id = ''
+        self._completion_cache_hits = 0
+        self._completion_cache_misses = 0
 
     @property
     def accumulated_cost(self) -> float:
@@ -79,55 +196,85 @@ class Metrics:
         self._accumulated_cost = value
 
     @property
-    def costs(self) -> list[Cost]:
-        return self._costs
+    def costs(self) -> _RecordList[Cost]:
+        return _RecordList(self, self._costs)
+
+    @costs.setter
+    def costs(self, value: Iterable[Cost]) -> None:
+        self._set_records(self._costs, value)
 
     @property
-    def response_latencies(self) -> list[ResponseLatency]:
-        if not hasattr(self, '_response_latencies'):
-            self._response_latencies = []
-        return self._response_latencies
+    def response_latencies(self) -> _RecordList[ResponseLatency]:
+        return _RecordList(self, self._response_latencies)
 
     @response_latencies.setter
-    def response_latencies(self, value: list[ResponseLatency]) -> None:
-        self._response_latencies = value
+    def response_latencies(self, value: Iterable[ResponseLatency]) -> None:
+        self._set_records(self._response_latencies, value)
 
     @property
-    def token_usages(self) -> list[TokenUsage]:
-        if not hasattr(self, '_token_usages'):
-            self._token_usages = []
-        return self._token_usages
+    def token_usages(self) -> _RecordList[TokenUsage]:
+        return _RecordList(self, self._token_usages)
 
     @token_usages.setter
-    def token_usages(self, value: list[TokenUsage]) -> None:
-        self._token_usages = value
+    def token_usages(self, value: Iterable[TokenUsage]) -> None:
+        self._set_records(self._token_usages, value)
 
     @property
     def accumulated_token_usage(self) -> TokenUsage:
-        """Get the accumulated token usage, initializing it if it doesn't exist."""
-        if not hasattr(self, '_accumulated_token_usage'):
-            self._accumulated_token_usage = TokenUsage(
-                model=self.model_name,
-                prompt_tokens=0,
-                completion_tokens=0,
-                cache_read_tokens=0,
-                cache_write_tokens=0,
-                context_window=0,
-                response_id='',
-            )
-        return self._accumulated_token_usage
+        return TokenUsage(
+            model=self._accumulated_token_model,
+            response_id=self._accumulated_token_response_id,
+            **dict(zip(_TOKEN_TOTAL_FIELDS, self._accumulated_tokens)),
+        )
+
+    @accumulated_token_usage.setter
+    def accumulated_token_usage(self, value: TokenUsage) -> None:
+        self._accumulated_tokens = array(
+            'q', [getattr(value, name) for name in _TOKEN_TOTAL_FIELDS]
+        )
+        self._accumulated_token_model = value.model
+        self._accumulated_token_response_id = value.response_id
+
+    @property
+    def num_records(self) -> tuple[int, int, int]:
+        """The number of cost, response latency and token usage records."""
+        return (
+            len(self._costs),
+            len(self._response_latencies),
+            len(self._token_usages),
+        )
+
+    @property
+    def completion_cache_hits(self) -> int:
+        return self._completion_cache_hits
+
+    @property
+    def completion_cache_misses(self) -> int:
+        return self._completion_cache_misses
+
+    def add_completion_cache_lookup(self, hit: bool) -> None:
+        if hit:
+            self._completion_cache_hits += 1
+        else:
+            self._completion_cache_misses += 1
 
     def add_cost(self, value: float) -> None:
         if value < 0:
             raise ValueError('Added cost cannot be negative.')
         self._accumulated_cost += value
-        self._costs.append(Cost(cost=value, model=self.model_name))
+        self._add_row(
+            self._costs,
+            {'model': self.model_name, 'cost': value, 'timestamp': time.time()},
+        )
 
     def add_response_latency(self, value: float, response_id: str) -> None:
-        self._response_latencies.append(
-            ResponseLatency(
-                latency=max(0.0, value), model=self.model_name, response_id=response_id
-            )
+        self._add_row(
+            self._response_latencies,
+            {
+                'model': self.model_name,
+                'latency': max(0.0, value),
+                'response_id': response_id,
+            },
         )
 
     def add_token_usage(
@@ -144,70 +291,107 @@ class Metrics:
         # Token each turn for calculating context usage.
         per_turn_token = prompt_tokens + completion_tokens
 
-        usage = TokenUsage(
-            model=self.model_name,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            cache_read_tokens=cache_read_tokens,
-            cache_write_tokens=cache_write_tokens,
-            context_window=context_window,
-            per_turn_token=per_turn_token,
-            response_id=response_id,
-        )
-        self._token_usages.append(usage)
-
-        # Update accumulated token usage using the __add__ operator
-        self._accumulated_token_usage = self.accumulated_token_usage + TokenUsage(
-            model=self.model_name,
-            prompt_tokens=prompt_tokens,
-            completion_tokens=completion_tokens,
-            cache_read_tokens=cache_read_tokens,
-            cache_write_tokens=cache_write_tokens,
-            context_window=context_window,
-            per_turn_token=per_turn_token,
-            response_id='',
-        )
+        usage = {
+            'model': self.model_name,
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'cache_read_tokens': cache_read_tokens,
+            'cache_write_tokens': cache_write_tokens,
+            'context_window': context_window,
+            'per_turn_token': per_turn_token,
+            'response_id': response_id,
+        }
+        self._add_row(self._token_usages, usage)
+        self._add_token_totals(usage)
 
     def merge(self, other: 'Metrics') -> None:
         """Merge 'other' metrics into this one."""
         self._accumulated_cost += other.accumulated_cost
-        self._costs += other._costs
-        # use the property so older picked objects that lack the field won't crash
-        self.token_usages += other.token_usages
-        self.response_latencies += other.response_latencies
-
-        # Merge accumulated token usage using the __add__ operator
-        self._accumulated_token_usage = (
-            self.accumulated_token_usage + other.accumulated_token_usage
+        self.add_records(other)
+        self._completion_cache_hits += other.completion_cache_hits
+        self._completion_cache_misses += other.completion_cache_misses
+        self._add_token_totals(
+            dict(zip(_TOKEN_TOTAL_FIELDS, other._accumulated_tokens))
         )
 
+    def add_records(
+        self, other: 'Metrics', start: tuple[int, int, int] = (0, 0, 0)
+    ) -> None:
+        """Append the records of 'other' from `start`, a `num_records` of it.
+
+        The accumulated totals are left as they are.
+        """
+        for table, other_table, first in zip(
+            (self._costs, self._response_latencies, self._token_usages),
+            (other._costs, other._response_latencies, other._token_usages),
+            start,
+        ):
+            for name, column in table.columns.items():
+                other_column = other_table.columns[name][first:]
+                if table.fields[name] == _STRING:
+                    column.extend(self._intern(other._strings[i]) for i in other_column)
+                else:
+                    column.extend(other_column)
+
+    def totals(self) -> 'Metrics':
+        """A copy of these metrics with the accumulated totals but no records."""
+        metrics = Metrics(model_name=self.model_name)
+        metrics._accumulated_cost = self._accumulated_cost
+        metrics._accumulated_tokens = array('q', self._accumulated_tokens)
+        metrics._accumulated_token_model = self._accumulated_token_model
+        metrics._accumulated_token_response_id = self._accumulated_token_response_id
+        metrics._completion_cache_hits = self._completion_cache_hits
+        metrics._completion_cache_misses = self._completion_cache_misses
+        return metrics
+
     def get(self) -> dict:
         """Return the metrics in a dictionary."""
         return {
             'accumulated_cost': self._accumulated_cost,
             'accumulated_token_usage': self.accumulated_token_usage.model_dump(),
-            'costs': [cost.model_dump() for cost in self._costs],
-            'response_latencies': [
-                latency.model_dump() for latency in self._response_latencies
-            ],
-            'token_usages': [usage.model_dump() for usage in self._token_usages],
+            'costs': self._get_rows(self._costs),
+            'response_latencies': self._get_rows(self._response_latencies),
+            'token_usages': self._get_rows(self._token_usages),
+            'completion_cache_hits': self._completion_cache_hits,
+            'completion_cache_misses': self._completion_cache_misses,
         }
 
+    @classmethod
+    def from_dict(cls, data: dict[str, Any], model_name: str = 'default') -> 'Metrics':
+        """The metrics returned by `get`."""
+        metrics = cls(model_name=model_name)
+        metrics._accumulated_cost = data.get('accumulated_cost', 0.0)
+        for table, key in (
+            (metrics._costs, 'costs'),
+            (metrics._response_latencies, 'response_latencies'),
+            (metrics._token_usages, 'token_usages'),
+        ):
+            defaults = {
+                name: info.get_default(call_default_factory=True)
+                for name, info in table.record_type.model_fields.items()
+            }
+            for row in data.get(key, []):
+                metrics._add_row(table, {**defaults, **row})
+        if 'accumulated_token_usage' in data:
+            metrics.accumulated_token_usage = TokenUsage(
+                **data['accumulated_token_usage']
+            )
+        metrics._completion_cache_hits = data.get('completion_cache_hits', 0)
+        metrics._completion_cache_misses = data.get('completion_cache_misses', 0)
+        return metrics
+
     def reset(self) -> None:
         self._accumulated_cost = 0.0
-        self._costs = []
-        self._response_latencies = []
-        self._token_usages = []
-        # Reset accumulated token usage with a new instance
-        self._accumulated_token_usage = TokenUsage(
-            model=self.model_name,
-            prompt_tokens=0,
-            completion_tokens=0,
-            cache_read_tokens=0,
-            cache_write_tokens=0,
-            context_window=0,
-            response_id='',
-        )
+        self._costs.clear()
+        self._response_latencies.clear()
+        self._token_usages.clear()
+        self._strings = []
+        self._string_ids = {}
+        self._accumulated_tokens = array('q', [0] * len(_TOKEN_TOTAL_FIELDS))
+        self._accumulated_token_model = self.model_name
+        self._accumulated_token_response_id = ''
+        self._completion_cache_hits = 0
+        self._completion_cache_misses = 0
 
     def log(self) -> str:
         """Log the metrics."""
@@ -215,6 +399,9 @@ class Metrics:
         logs = ''
         for key, value in metrics.items():
             logs += f'{key}: {value}\n'
+        usage = self.accumulated_token_usage
+        logs += f'cache_read_ratio: {usage.cache_read_ratio:.2f}\n'
+        logs += f'cache_write_ratio: {usage.cache_write_ratio:.2f}\n'
         return logs
 
     def copy(self) -> 'Metrics':
@@ -223,3 +410,70 @@ class Metrics:
 
     def __repr__(self) -> str:
         return f'Metrics({self.get()}'
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # rebuilt from the string table
+        del state['_string_ids']
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        if isinstance(state.get('_costs'), list):
+            # pickled before the records were stored in arrays
+            legacy = state
+            self.__init__(legacy.get('model_name', 'default'))  # type: ignore[misc]
+            self._accumulated_cost = legacy.get('_accumulated_cost', 0.0)
+            self.costs = legacy['_costs']
+            self.response_latencies = legacy.get('_response_latencies', [])
+            self.token_usages = legacy.get('_token_usages', [])
+            if '_accumulated_token_usage' in legacy:
+                self.accumulated_token_usage = legacy['_accumulated_token_usage']
+            self._completion_cache_hits = legacy.get('_completion_cache_hits', 0)
+            self._completion_cache_misses = legacy.get('_completion_cache_misses', 0)
+            return
+        self.__dict__.update(state)
+        self._string_ids = {string: i for i, string in enumerate(self._strings)}
+
+    def _intern(self, string: str) -> int:
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = self._string_ids[string] = len(self._strings)
+            self._strings.append(string)
+        return string_id
+
+    def _add_row(self, table: _Table, values: dict[str, Any]) -> None:
+        table.append(
+            {
+                name: self._intern(values[name])
+                if typecode == _STRING
+                else values[name]
+                for name, typecode in table.fields.items()
+            }
+        )
+
+    def _get_row(self, table: _Table, index: int) -> dict[str, Any]:
+        return {
+            name: self._strings[column[index]]
+            if table.fields[name] == _STRING
+            else column[index]
+            for name, column in table.columns.items()
+        }
+
+    def _get_rows(self, table: _Table) -> list[dict[str, Any]]:
+        return [self._get_row(table, i) for i in range(len(table))]
+
+    def _set_records(self, table: _Table, records: Iterable[BaseModel]) -> None:
+        records = list(records)
+        table.clear()
+        for record in records:
+            self._add_row(table, record.model_dump())
+
+    def _add_token_totals(self, usage: dict[str, int]) -> None:
+        totals = self._accumulated_tokens
+        for i, name in enumerate(_TOKEN_TOTAL_FIELDS):
+            if name == 'context_window':
+                totals[i] = max(totals[i], usage[name])
+            elif name == 'per_turn_token':
+                totals[i] = usage[name]
+            else:
+                totals[i] += usage[name]
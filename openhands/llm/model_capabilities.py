@@ -0,0 +1,266 @@
+import json
+import os
+import tempfile
+import threading
+import warnings
+from dataclasses import asdict, dataclass
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any
+
+import httpx
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore')
+    import litellm
+
+from litellm import ModelInfo
+
+from openhands.core.config import LLMConfig
+from openhands.core.logger import openhands_logger as logger
+
+# cache prompt supporting models
+# remove this when we gemini and deepseek are supported
+CACHE_PROMPT_SUPPORTED_MODELS = [
+    'claude-3-7-sonnet-20250219',
+    'claude-sonnet-3-7-latest',
+    'claude-3.7-sonnet',
+    'claude-3-5-sonnet-20241022',
+    'claude-3-5-sonnet-20240620',
+    'claude-3-5-haiku-20241022',
+    'claude-3-haiku-20240307',
+    'claude-3-opus-20240229',
+    'claude-sonnet-4-20250514',
+    'claude-opus-4-20250514',
+]
+
+# function calling supporting models
+FUNCTION_CALLING_SUPPORTED_MODELS = [
+    'claude-3-7-sonnet-20250219',
+    'claude-sonnet-3-7-latest',
+    'claude-3-5-sonnet',
+    'claude-3-5-sonnet-20240620',
+    'claude-3-5-sonnet-20241022',
+    'claude-3.5-haiku',
+    'claude-3-5-haiku-20241022',
+    'claude-sonnet-4-20250514',
+    'claude-opus-4-20250514',
+    'gpt-4o-mini',
+    'gpt-4o',
+    'o1-2024-12-17',
+    'o3-mini-2025-01-31',
+    'o3-mini',
+    'o3',
+    'o3-2025-04-16',
+    'o4-mini',
+    'o4-mini-2025-04-16',
+    'gemini-2.5-pro',
+    'gpt-4.1',
+]
+
+
+@dataclass(frozen=True)
+class ModelCapabilities:
+    """What a model supports, looked up once per process for each model.
+
+    Function calling and prompt caching follow the models OpenHands was
+    evaluated with, the rest comes from litellm or the litellm proxy.
+    """
+
+    model_info: ModelInfo | None
+    supports_vision: bool
+    supports_function_calling: bool
+    supports_prompt_caching: bool
+    supports_response_schema: bool
+
+
+# Capabilities by model, base URL and custom provider
+_capabilities: dict[tuple[str, str | None, str | None], ModelCapabilities] = {}
+_snapshots_loaded: set[str] = set()
+_capabilities_lock = threading.Lock()
+
+
+def get_model_capabilities(config: LLMConfig) -> ModelCapabilities:
+    """The capabilities of the model of an LLM config, looked up on first use.
+
+    With `model_info_cache_file` set, the capabilities known in this process are
+    saved to that file and loaded from it, so that other processes do not look
+    them up again. Snapshots from another version of litellm are ignored.
+    """
+    key = (config.model, config.base_url, config.custom_llm_provider)
+    snapshot_file = config.model_info_cache_file
+    with _capabilities_lock:
+        if snapshot_file and snapshot_file not in _snapshots_loaded:
+            _snapshots_loaded.add(snapshot_file)
+            _load_snapshot(snapshot_file)
+        capabilities = _capabilities.get(key)
+    if capabilities is not None:
+        return capabilities
+
+    model_info, complete = _get_model_info(config)
+    capabilities = ModelCapabilities(
+        model_info=model_info,
+        supports_vision=_supports_vision(config, model_info),
+        supports_function_calling=(
+            config.model in FUNCTION_CALLING_SUPPORTED_MODELS
+            or config.model.split('/')[-1] in FUNCTION_CALLING_SUPPORTED_MODELS
+            or any(m in config.model for m in FUNCTION_CALLING_SUPPORTED_MODELS)
+        ),
+        supports_prompt_caching=(
+            config.model in CACHE_PROMPT_SUPPORTED_MODELS
+            or config.model.split('/')[-1] in CACHE_PROMPT_SUPPORTED_MODELS
+        ),
+        supports_response_schema=_supports_response_schema(config),
+    )
+    if not complete:
+        # look it up again next time, the proxy may be back
+        return capabilities
+    with _capabilities_lock:
+        capabilities = _capabilities.setdefault(key, capabilities)
+        if snapshot_file:
+            _save_snapshot(snapshot_file)
+    return capabilities
+
+
+def clear_model_capabilities() -> None:
+    """Forget the capabilities looked up so far, and the snapshots loaded."""
+    with _capabilities_lock:
+        _capabilities.clear()
+        _snapshots_loaded.clear()
+
+
+def _get_model_info(config: LLMConfig) -> tuple[ModelInfo | None, bool]:
+    """The model info of the config, and whether the lookup completed."""
+    model_info: ModelInfo | None = None
+    complete = True
+    try:
+        if config.model.startswith('openrouter'):
+            model_info = litellm.get_model_info(config.model)
+    except Exception as e:
+        logger.debug(f'Error getting model info: {e}')
+
+    if config.model.startswith('litellm_proxy/'):
+        # IF we are using LiteLLM proxy, get model info from LiteLLM proxy
+        # GET {base_url}/v1/model/info with litellm_model_id as path param
+        base_url = config.base_url.strip() if config.base_url else ''
+        if not base_url.startswith(('http://', 'https://')):
+            base_url = 'http://' + base_url
+
+        response = httpx.get(
+            f'{base_url}/v1/model/info',
+            headers={
+                'Authorization': f'Bearer {config.api_key.get_secret_value() if config.api_key else None}'
+            },
+        )
+
+        resp_json = response.json()
+        if 'data' not in resp_json:
+            logger.error(f'Error getting model info from LiteLLM proxy: {resp_json}')
+            complete = False
+        all_model_info = resp_json.get('data', [])
+        current_model_info = next(
+            (
+                info
+                for info in all_model_info
+                if info['model_name'] == config.model.removeprefix('litellm_proxy/')
+            ),
+            None,
+        )
+        if current_model_info:
+            model_info = current_model_info['model_info']
+            logger.debug(f'Got model info from litellm proxy: {model_info}')
+
+    # Last two attempts to get model info from NAME
+    if not model_info:
+        try:
+            model_info = litellm.get_model_info(config.model.split(':')[0])
+        # noinspection PyBroadException
+        except Exception:
+            pass
+    if not model_info:
+        try:
+            model_info = litellm.get_model_info(config.model.split('/')[-1])
+        # noinspection PyBroadException
+        except Exception:
+            pass
+    return model_info, complete
+
+
+def _supports_vision(config: LLMConfig, model_info: ModelInfo | None) -> bool:
+    # litellm.supports_vision currently returns False for 'openai/gpt-...' or 'anthropic/claude-...' (with prefixes)
+    # but model_info will have the correct value for some reason.
+    # we can go with it, but we will need to keep an eye if model_info is correct for Vertex or other providers
+    # remove when litellm is updated to fix https://github.com/BerriAI/litellm/issues/5608
+    # Check both the full model name and the name after proxy prefix for vision support
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return bool(
+            litellm.supports_vision(config.model)
+            or litellm.supports_vision(config.model.split('/')[-1])
+            or (model_info is not None and model_info.get('supports_vision', False))
+        )
+
+
+def _supports_response_schema(config: LLMConfig) -> bool:
+    try:
+        return litellm.supports_response_schema(
+            model=config.model, custom_llm_provider=config.custom_llm_provider
+        )
+    except Exception:
+        return False
+
+
+def _litellm_version() -> str:
+    try:
+        return version('litellm')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def _load_snapshot(path: str) -> None:
+    try:
+        with open(path, encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        logger.warning(f'Ignoring unreadable model info cache {path}: {e}')
+        return
+    if snapshot.get('litellm_version') != _litellm_version():
+        return
+    for entry in snapshot.get('models', []):
+        try:
+            key = (entry['model'], entry['base_url'], entry['custom_llm_provider'])
+            _capabilities.setdefault(key, ModelCapabilities(**entry['capabilities']))
+        except (KeyError, TypeError):
+            continue
+
+
+def _save_snapshot(path: str) -> None:
+    snapshot: dict[str, Any] = {
+        'litellm_version': _litellm_version(),
+        'models': [
+            {
+                'model': model,
+                'base_url': base_url,
+                'custom_llm_provider': custom_llm_provider,
+                'capabilities': asdict(capabilities),
+            }
+            for (model, base_url, custom_llm_provider), capabilities in (
+                _capabilities.items()
+            )
+        ],
+    }
+    directory = os.path.dirname(path) or '.'
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    except OSError as e:
+        logger.warning(f'Could not save the model info cache to {path}: {e}')
+        return
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, default=str)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f'Could not save the model info cache to {path}: {e}')
+        os.remove(tmp_path)
@@ -1,6 +1,8 @@
 import asyncio
 from functools import partial
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
+
+from litellm import ModelResponseStream
 
 from openhands.core.exceptions import UserCancelledError
 from openhands.core.logger import openhands_logger as logger
@@ -8,6 +10,13 @@ from openhands.llm.async_llm import LLM_RETRY_EXCEPTIONS, AsyncLLM
 from openhands.llm.llm import REASONING_EFFORT_SUPPORTED_MODELS
 
 
+async def _replay_chunks(
+    chunks: list[dict[str, Any]],
+) -> AsyncIterator[ModelResponseStream]:
+    for chunk in chunks:
+        yield ModelResponseStream(**chunk)
+
+
 class StreamingLLM(AsyncLLM):
     """Streaming LLM class."""
 
@@ -70,9 +79,17 @@ class StreamingLLM(AsyncLLM):
 
             self.log_prompt(messages)
 
+            cache_key, cached = self._read_completion_cache(
+                async_streaming_completion_unwrapped, kwargs
+            )
+            chunks: list[dict[str, Any]] = []
+
             try:
-                # Directly call and await litellm_acompletion
-                resp = await async_streaming_completion_unwrapped(*args, **kwargs)
+                if cached is not None:
+                    resp = _replay_chunks(cached)
+                else:
+                    # Directly call and await litellm_acompletion
+                    resp = await async_streaming_completion_unwrapped(*args, **kwargs)
 
                 # For streaming we iterate over the chunks
                 async for chunk in resp:
@@ -89,10 +106,20 @@ class StreamingLLM(AsyncLLM):
                     message_back = chunk['choices'][0]['delta'].get('content', '')
                     if message_back:
                         self.log_response(message_back)
-                    self._post_completion(chunk)
+                    self._post_completion(chunk, cached=cached is not None)
+                    if cache_key is not None and cached is None:
+                        chunks.append(
+                            chunk.model_dump()
+                            if hasattr(chunk, 'model_dump')
+                            else chunk
+                        )
 
                     yield chunk
 
+                # only complete streams are cached
+                if cached is None:
+                    self._write_completion_cache(cache_key, chunks)
+
             except UserCancelledError:
                 logger.debug('LLM request cancelled by user.')
                 raise
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import contextmanager
 from typing import Any
 
@@ -8,6 +10,7 @@ from pydantic import BaseModel
 
 from openhands.controller.state.state import State
 from openhands.core.config.condenser_config import CondenserConfig
+from openhands.core.logger import openhands_logger as logger
 from openhands.events.action.agent import CondensationAction
 from openhands.memory.view import View
 
@@ -149,8 +152,20 @@ class RollingCondenser(Condenser, ABC):
     The rolling history is generated by `View.from_events`, which analyzes all events in the history and produces a `View` object representing what will be sent to the LLM.
 
     If `should_condense` says so, the condenser is then responsible for generating a `Condensation` object from the `View` object. This will be added to the event history which should -- when given to `get_view` -- produce the condensed `View` to be passed to the LLM.
+
+    With a `background_size`, the condensation of a view of at least that many events is computed on a background thread, and returned by the first call to `condense` after it is ready, as long as no other condensation happened in the meantime. The condensation only blocks the agent when `should_condense` says so before then. Subclasses use `_get_num_events_ahead` to forget the events a condensation at the limit would, so condensing ahead of time does not make it happen more often.
     """
 
+    def __init__(self, background_size: int | None = None):
+        super().__init__()
+        self.background_size = background_size
+        self._background_condensation: (
+            Future[tuple[Condensation, dict[str, Any]]] | None
+        ) = None
+        # The ids of the events of the view being condensed in the background
+        self._background_event_ids: list[int] = []
+        self._background_metadata = threading.local()
+
     @abstractmethod
     def should_condense(self, view: View) -> bool:
         """Determine if a view should be condensed."""
@@ -160,11 +175,72 @@ class RollingCondenser(Condenser, ABC):
         """Get the condensation from a view."""
 
     def condense(self, view: View) -> View | Condensation:
+        background_condensation = self._take_background_condensation(view)
+        if background_condensation is not None:
+            return background_condensation
+
         # If we trigger the condenser-specific condensation threshold, compute and return
         # the condensation.
         if self.should_condense(view):
+            # A condensation still running in the background is outdated by this one
+            self._background_condensation = None
             return self.get_condensation(view)
 
+        if (
+            self.background_size is not None
+            and len(view) >= self.background_size
+            and self._background_condensation is None
+        ):
+            self._background_event_ids = [event.id for event in view]
+            self._background_condensation = _BACKGROUND_EXECUTOR.submit(
+                self._get_condensation_in_background, view
+            )
+
         # Otherwise we're safe to just return the view.
+        return view
+
+    def _get_num_events_ahead(self, condensation_size: int, view: View) -> int:
+        """How many events short of `condensation_size` the view is, if it is condensed in the background."""
+        if getattr(self._background_metadata, 'batch', None) is None:
+            return 0
+        return max(0, condensation_size - len(view))
+
+    def add_metadata(self, key: str, value: Any) -> None:
+        batch = getattr(self._background_metadata, 'batch', None)
+        if batch is None:
+            super().add_metadata(key, value)
         else:
-            return view
+            # Added to the batch of the step which returns the condensation
+            batch[key] = value
+
+    def _get_condensation_in_background(
+        self, view: View
+    ) -> tuple[Condensation, dict[str, Any]]:
+        self._background_metadata.batch = {}
+        try:
+            return self.get_condensation(view), self._background_metadata.batch
+        finally:
+            self._background_metadata.batch = None
+
+    def _take_background_condensation(self, view: View) -> Condensation | None:
+        """The condensation computed in the background, if it is ready and still applies to the view."""
+        future = self._background_condensation
+        if future is None or not future.done():
+            return None
+        self._background_condensation = None
+        try:
+            condensation, metadata = future.result()
+        except Exception as e:
+            logger.warning(f'Background condensation failed: {e}')
+            return None
+        # Events are only ever appended to the view until it is condensed
+        event_ids = self._background_event_ids
+        if [event.id for event in view[: len(event_ids)]] != event_ids:
+            return None
+        for key, value in metadata.items():
+            self.add_metadata(key, value)
+        return condensation
+
+
+# Runs the condensations started ahead of time by the rolling condensers of this process
+_BACKGROUND_EXECUTOR = ThreadPoolExecutor(thread_name_prefix='background-condensation')
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from litellm import supports_response_schema
 from pydantic import BaseModel
 
 from openhands.core.config.condenser_config import LLMAttentionCondenserConfig
@@ -22,7 +21,13 @@ class ImportantEventSelection(BaseModel):
 class LLMAttentionCondenser(RollingCondenser):
     """Rolling condenser strategy that uses an LLM to select the most important events when condensing the history."""
 
-    def __init__(self, llm: LLM, max_size: int = 100, keep_first: int = 1):
+    def __init__(
+        self,
+        llm: LLM,
+        max_size: int = 100,
+        keep_first: int = 1,
+        background_threshold: float | None = None,
+    ):
         if keep_first >= max_size // 2:
             raise ValueError(
                 f'keep_first ({keep_first}) must be less than half of max_size ({max_size})'
@@ -31,27 +36,39 @@ class LLMAttentionCondenser(RollingCondenser):
             raise ValueError(f'keep_first ({keep_first}) cannot be negative')
         if max_size < 1:
             raise ValueError(f'max_size ({keep_first}) cannot be non-positive')
+        if background_threshold is not None and not 0 < background_threshold <= 1:
+            raise ValueError(
+                f'background_threshold ({background_threshold}) must be between 0 and 1'
+            )
 
         self.max_size = max_size
         self.keep_first = keep_first
         self.llm = llm
 
         # This condenser relies on the `response_schema` feature, which is not supported by all LLMs
-        if not supports_response_schema(
-            model=self.llm.config.model,
-            custom_llm_provider=self.llm.config.custom_llm_provider,
-        ):
+        if not self.llm.supports_response_schema():
             raise ValueError(
                 "The LLM model must support the 'response_schema' parameter to use the LLMAttentionCondenser."
             )
 
-        super().__init__()
+        super().__init__(
+            background_size=(
+                int(max_size * background_threshold)
+                if background_threshold is not None
+                else None
+            )
+        )
 
     def get_condensation(self, view: View) -> Condensation:
         target_size = self.max_size // 2
         head_event_ids = [event.id for event in view.events[: self.keep_first]]
 
         events_from_tail = target_size - len(head_event_ids)
+        # Ahead of the limit, as many fewer so as many events are forgotten
+        events_from_tail = max(
+            0,
+            events_from_tail - self._get_num_events_ahead(self.max_size + 1, view),
+        )
 
         message: str = """You will be given a list of actions, observations, and thoughts from a coding agent.
         Each item in the list has an identifier. Please sort the identifiers in order of how important the
@@ -124,6 +141,7 @@ class LLMAttentionCondenser(RollingCondenser):
             llm=LLM(config=llm_config),
             max_size=config.max_size,
             keep_first=config.keep_first,
+            background_threshold=config.background_threshold,
         )
 
 
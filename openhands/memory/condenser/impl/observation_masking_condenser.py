@@ -8,18 +8,29 @@ from openhands.memory.condenser.condenser import Condensation, Condenser, View
 
 
 class ObservationMaskingCondenser(Condenser):
-    """A condenser that masks the values of observations outside of a recent attention window."""
+    """A condenser that masks the values of observations outside of a recent attention window.
+
+    With a `mask_chunk_size` above one, the observations are masked `mask_chunk_size` events at a time instead of one event per step, so that the prompt sent to the LLM keeps the same prefix, which the provider can cache, until the next chunk is masked.
+    """
+
+    def __init__(self, attention_window: int = 5, mask_chunk_size: int = 1):
+        if mask_chunk_size < 1:
+            raise ValueError(f'mask_chunk_size ({mask_chunk_size}) must be positive')
 
-    def __init__(self, attention_window: int = 5):
         self.attention_window = attention_window
+        self.mask_chunk_size = mask_chunk_size
 
         super().__init__()
 
     def condense(self, view: View) -> View | Condensation:
         """Replace the content of observations outside of the attention window with a placeholder."""
+        masked_size = len(view) - self.attention_window
+        # Only mask whole chunks, aligned on the start of the view
+        masked_size -= masked_size % self.mask_chunk_size
+
         results: list[Event] = []
         for i, event in enumerate(view):
-            if isinstance(event, Observation) and i < len(view) - self.attention_window:
+            if isinstance(event, Observation) and i < masked_size:
                 results.append(AgentCondensationObservation('<MASKED>'))
             else:
                 results.append(event)
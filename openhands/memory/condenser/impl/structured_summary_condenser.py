@@ -170,6 +170,7 @@ class StructuredSummaryCondenser(RollingCondenser):
         max_size: int = 100,
         keep_first: int = 1,
         max_event_length: int = 10_000,
+        background_threshold: float | None = None,
     ):
         if keep_first >= max_size // 2:
             raise ValueError(
@@ -179,6 +180,10 @@ class StructuredSummaryCondenser(RollingCondenser):
             raise ValueError(f'keep_first ({keep_first}) cannot be negative')
         if max_size < 1:
             raise ValueError(f'max_size ({max_size}) cannot be non-positive')
+        if background_threshold is not None and not 0 < background_threshold <= 1:
+            raise ValueError(
+                f'background_threshold ({background_threshold}) must be between 0 and 1'
+            )
 
         if not llm.is_function_calling_active():
             raise ValueError(
@@ -190,7 +195,13 @@ class StructuredSummaryCondenser(RollingCondenser):
         self.max_event_length = max_event_length
         self.llm = llm
 
-        super().__init__()
+        super().__init__(
+            background_size=(
+                int(max_size * background_threshold)
+                if background_threshold is not None
+                else None
+            )
+        )
 
     def _truncate(self, content: str) -> str:
         """Truncate the content to fit within the specified maximum event length."""
@@ -202,6 +213,11 @@ class StructuredSummaryCondenser(RollingCondenser):
         # Number of events to keep from the tail -- target size, minus however many
         # prefix events from the head, minus one for the summarization event
         events_from_tail = target_size - len(head) - 1
+        # Ahead of the limit, as many fewer so the same events are forgotten
+        events_from_tail = max(
+            0,
+            events_from_tail - self._get_num_events_ahead(self.max_size + 1, view),
+        )
 
         summary_event = (
             view[self.keep_first]
@@ -211,7 +227,7 @@ class StructuredSummaryCondenser(RollingCondenser):
 
         # Identify events to be forgotten (those not in head or tail)
         forgotten_events = []
-        for event in view[self.keep_first : -events_from_tail]:
+        for event in view[self.keep_first : len(view) - events_from_tail]:
             if not isinstance(event, AgentCondensationObservation):
                 forgotten_events.append(event)
 
@@ -322,6 +338,7 @@ Capture all relevant information, especially:
             max_size=config.max_size,
             keep_first=config.keep_first,
             max_event_length=config.max_event_length,
+            background_threshold=config.background_threshold,
         )
 
 
@@ -1,3 +1,4 @@
+from dataclasses import dataclass, field
 from typing import Generator
 
 from litellm import ModelResponse
@@ -49,12 +50,33 @@ from openhands.utils.prompt import (
 )
 
 
+@dataclass
+class _ConvertedEvent:
+    """The messages an event converts to, as left by `_process_action` or `_process_observation`."""
+
+    event: Event
+    max_message_chars: int | None
+    vision_is_active: bool
+    messages: list[Message]
+    pending_tool_call_action_messages: dict[str, Message] = field(default_factory=dict)
+    tool_call_id_to_message: dict[str, Message] = field(default_factory=dict)
+
+
+def _copy_message(message: Message) -> Message:
+    # Messages get their flags set and content added once handed out, so the cached
+    # ones are never returned themselves. Their content items are shared: they are
+    # replaced, not modified, by the formatting and prompt caching below.
+    return message.model_copy(update={'content': list(message.content)})
+
+
 class ConversationMemory:
     """Processes event history into a coherent conversation for the agent."""
 
     def __init__(self, config: AgentConfig, prompt_manager: PromptManager):
         self.agent_config = config
         self.prompt_manager = prompt_manager
+        # The conversion of the events seen in the last call to `process_events`, by event id
+        self._converted_events: dict[int, _ConvertedEvent] = {}
 
     def process_events(
         self,
@@ -90,27 +112,31 @@ class ConversationMemory:
         # Process regular events
         pending_tool_call_action_messages: dict[str, Message] = {}
         tool_call_id_to_message: dict[str, Message] = {}
+        converted_events: dict[int, _ConvertedEvent] = {}
 
         for i, event in enumerate(events):
-            # create a regular message from an event
-            if isinstance(event, Action):
-                messages_to_add = self._process_action(
-                    action=event,
-                    pending_tool_call_action_messages=pending_tool_call_action_messages,
-                    vision_is_active=vision_is_active,
-                )
-            elif isinstance(event, Observation):
-                messages_to_add = self._process_observation(
-                    obs=event,
-                    tool_call_id_to_message=tool_call_id_to_message,
-                    max_message_chars=max_message_chars,
-                    vision_is_active=vision_is_active,
-                    enable_som_visual_browsing=self.agent_config.enable_som_visual_browsing,
-                    current_index=i,
-                    events=events,
+            # create a regular message from an event, or reuse the one from a previous call
+            converted = self._converted_events.get(event.id)
+            if (
+                converted is None
+                or converted.event is not event
+                or converted.max_message_chars != max_message_chars
+                or converted.vision_is_active != vision_is_active
+            ):
+                converted = self._convert_event(
+                    event, i, events, max_message_chars, vision_is_active
                 )
-            else:
-                raise ValueError(f'Unknown event type: {type(event)}')
+            if self._is_cacheable(event):
+                converted_events[event.id] = converted
+
+            messages_to_add = [_copy_message(message) for message in converted.messages]
+            for (
+                response_id,
+                message,
+            ) in converted.pending_tool_call_action_messages.items():
+                pending_tool_call_action_messages[response_id] = _copy_message(message)
+            for tool_call_id, message in converted.tool_call_id_to_message.items():
+                tool_call_id_to_message[tool_call_id] = _copy_message(message)
 
             # Check pending tool call action messages and see if they are complete
             _response_ids_to_remove = []
@@ -140,6 +166,9 @@ class ConversationMemory:
 
             messages += messages_to_add
 
+        # Only keep the events still in the history, so condensed ones are released
+        self._converted_events = converted_events
+
         # Apply final filtering so that the messages in context don't have unmatched tool calls
         # and tool responses, for example
         messages = list(ConversationMemory._filter_unmatched_tool_calls(messages))
@@ -149,6 +178,52 @@ class ConversationMemory:
 
         return messages
 
+    def _convert_event(
+        self,
+        event: Event,
+        current_index: int,
+        events: list[Event],
+        max_message_chars: int | None,
+        vision_is_active: bool,
+    ) -> _ConvertedEvent:
+        """Converts a single event, capturing the tool call messages it leaves pending."""
+        converted = _ConvertedEvent(
+            event=event,
+            max_message_chars=max_message_chars,
+            vision_is_active=vision_is_active,
+            messages=[],
+        )
+        if isinstance(event, Action):
+            converted.messages = self._process_action(
+                action=event,
+                pending_tool_call_action_messages=converted.pending_tool_call_action_messages,
+                vision_is_active=vision_is_active,
+            )
+        elif isinstance(event, Observation):
+            converted.messages = self._process_observation(
+                obs=event,
+                tool_call_id_to_message=converted.tool_call_id_to_message,
+                max_message_chars=max_message_chars,
+                vision_is_active=vision_is_active,
+                enable_som_visual_browsing=self.agent_config.enable_som_visual_browsing,
+                current_index=current_index,
+                events=events,
+            )
+        else:
+            raise ValueError(f'Unknown event type: {type(event)}')
+        return converted
+
+    @staticmethod
+    def _is_cacheable(event: Event) -> bool:
+        """Whether the conversion of an event depends on the event alone."""
+        if event.id == Event.INVALID_ID:
+            return False
+        # Knowledge recalls leave out the microagents of earlier recalls in the history
+        return not (
+            isinstance(event, RecallObservation)
+            and event.recall_type == RecallType.KNOWLEDGE
+        )
+
     def _apply_user_message_formatting(self, messages: list[Message]) -> list[Message]:
         """Applies formatting rules, such as adding newlines between consecutive user messages."""
         formatted_messages = []
@@ -157,10 +232,12 @@ class ConversationMemory:
             # Add double newline between consecutive user messages
             if msg.role == 'user' and prev_role == 'user' and len(msg.content) > 0:
                 # Find the first TextContent in the message to add newlines
-                for content_item in msg.content:
+                for i, content_item in enumerate(msg.content):
                     if isinstance(content_item, TextContent):
                         # Prepend two newlines to ensure visual separation
-                        content_item.text = '\n\n' + content_item.text
+                        msg.content[i] = content_item.model_copy(
+                            update={'text': '\n\n' + content_item.text}
+                        )
                         break
             formatted_messages.append(msg)
             prev_role = msg.role  # Update prev_role after processing each message
@@ -602,15 +679,21 @@ class ConversationMemory:
         For new Anthropic API, we only need to mark the last user or tool message as cacheable.
         """
         if len(messages) > 0 and messages[0].role == 'system':
-            messages[0].content[-1].cache_prompt = True
+            self._set_cache_prompt(messages[0])
         # NOTE: this is only needed for anthropic
         for message in reversed(messages):
             if message.role in ('user', 'tool'):
-                message.content[
-                    -1
-                ].cache_prompt = True  # Last item inside the message content
+                self._set_cache_prompt(message)
                 break
 
+    @staticmethod
+    def _set_cache_prompt(message: Message) -> None:
+        """Marks the last item inside the message content as cacheable."""
+        # A copy, as content items may be shared with the messages of other steps
+        message.content[-1] = message.content[-1].model_copy(
+            update={'cache_prompt': True}
+        )
+
     def _filter_agents_in_microagent_obs(
         self, obs: RecallObservation, current_index: int, events: list[Event]
     ) -> list[MicroagentKnowledge]:
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from typing import overload
+from itertools import islice
+from typing import Any, overload
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr, model_serializer
 
 from openhands.core.logger import openhands_logger as logger
 from openhands.events.action.agent import CondensationAction
@@ -18,10 +19,51 @@ class View(BaseModel):
 
     events: list[Event]
 
+    # A view of the first events of a list that is only appended to, which
+    # `events` copies out of the first time it is used
+    _shared_events: list[Event] | None = PrivateAttr(default=None)
+    _num_shared_events: int = PrivateAttr(default=0)
+
+    @classmethod
+    def _of_prefix(cls, events: list[Event], num_events: int) -> View:
+        view = cls.model_construct()
+        view._shared_events = events
+        view._num_shared_events = num_events
+        return view
+
+    def _copy_shared_events(self) -> None:
+        if self._shared_events is not None:
+            self.__dict__['events'] = self._shared_events[: self._num_shared_events]
+            self._shared_events = None
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'events' and self._shared_events is not None:
+            self._copy_shared_events()
+            return self.__dict__['events']
+        return super().__getattr__(name)  # type: ignore[misc]
+
+    @model_serializer(mode='wrap')
+    def _serialize(self, handler: Any) -> Any:
+        self._copy_shared_events()
+        return handler(self)
+
+    def __repr_args__(self) -> Any:
+        self._copy_shared_events()
+        return super().__repr_args__()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, View):
+            return NotImplemented
+        return self.events == other.events
+
     def __len__(self) -> int:
+        if self._shared_events is not None:
+            return self._num_shared_events
         return len(self.events)
 
     def __iter__(self):
+        if self._shared_events is not None:
+            return islice(self._shared_events, self._num_shared_events)
         return iter(self.events)
 
     # To preserve list-like indexing, we ideally support slicing and position-based indexing.
@@ -39,6 +81,11 @@ class View(BaseModel):
             start, stop, step = key.indices(len(self))
             return [self[i] for i in range(start, stop, step)]
         elif isinstance(key, int):
+            if self._shared_events is not None:
+                index = key + self._num_shared_events if key < 0 else key
+                if not 0 <= index < self._num_shared_events:
+                    raise IndexError('list index out of range')
+                return self._shared_events[index]
             return self.events[key]
         else:
             raise ValueError(f'Invalid key type: {type(key)}')
@@ -46,32 +93,106 @@ class View(BaseModel):
     @staticmethod
     def from_events(events: list[Event]) -> View:
         """Create a view from a list of events, respecting the semantics of any condensation events."""
-        forgotten_event_ids: set[int] = set()
-        for event in events:
-            if isinstance(event, CondensationAction):
-                forgotten_event_ids.update(event.forgotten)
-                # Make sure we also forget the condensation action itself
-                forgotten_event_ids.add(event.id)
-
-        kept_events = [event for event in events if event.id not in forgotten_event_ids]
-
-        # If we have a summary, insert it at the specified offset.
-        summary: str | None = None
-        summary_offset: int | None = None
-
-        # The relevant summary is always in the last condensation event (i.e., the most recent one).
-        for event in reversed(events):
-            if isinstance(event, CondensationAction):
-                if event.summary is not None and event.summary_offset is not None:
-                    summary = event.summary
-                    summary_offset = event.summary_offset
-                    break
-
-        if summary is not None and summary_offset is not None:
-            logger.info(f'Inserting summary at offset {summary_offset}')
-
-            kept_events.insert(
-                summary_offset, AgentCondensationObservation(content=summary)
-            )
-
+        kept_events, _, _ = _apply_condensations(events)
         return View(events=kept_events)
+
+
+def _apply_condensations(
+    events: list[Event],
+) -> tuple[list[Event], set[int], int | None]:
+    """The events kept by the condensation actions, the ids they forget, and the summary offset."""
+    forgotten_event_ids: set[int] = set()
+    for event in events:
+        if isinstance(event, CondensationAction):
+            forgotten_event_ids.update(event.forgotten)
+            # Make sure we also forget the condensation action itself
+            forgotten_event_ids.add(event.id)
+
+    kept_events = [event for event in events if event.id not in forgotten_event_ids]
+
+    # If we have a summary, insert it at the specified offset.
+    summary: str | None = None
+    summary_offset: int | None = None
+
+    # The relevant summary is always in the last condensation event (i.e., the most recent one).
+    for event in reversed(events):
+        if isinstance(event, CondensationAction):
+            if event.summary is not None and event.summary_offset is not None:
+                summary = event.summary
+                summary_offset = event.summary_offset
+                break
+
+    if summary is not None and summary_offset is not None:
+        logger.info(f'Inserting summary at offset {summary_offset}')
+
+        kept_events.insert(
+            summary_offset, AgentCondensationObservation(content=summary)
+        )
+
+    return kept_events, forgotten_event_ids, summary_offset
+
+
+class IncrementalView:
+    """Keeps the view of a growing list of events, such as a state's history, up to date.
+
+    Events appended to the list are processed on their own. The view is only
+    rebuilt from scratch when a condensation action arrives, or when the list is
+    replaced or changed other than by appending.
+    """
+
+    def __init__(self) -> None:
+        self._events: list[Event] | None = None
+        self._num_events = 0
+        self._last_event: Event | None = None
+        self._kept_events: list[Event] = []
+        self._forgotten_event_ids: set[int] = set()
+        # A summary offset past the kept events moves as events are appended
+        self._summary_offset_pending = False
+        self._view: View | None = None
+
+    def get_view(self, events: list[Event]) -> View:
+        """The view of the events, the same object as long as they do not change."""
+        num_events = len(events)
+        if (
+            self._view is not None
+            and events is self._events
+            and num_events >= self._num_events
+            and (
+                self._num_events == 0
+                or events[self._num_events - 1] is self._last_event
+            )
+        ):
+            if num_events == self._num_events:
+                return self._view
+            new_events = events[self._num_events :]
+            if not self._summary_offset_pending and not any(
+                isinstance(event, CondensationAction) for event in new_events
+            ):
+                self._kept_events.extend(
+                    event
+                    for event in new_events
+                    if event.id not in self._forgotten_event_ids
+                )
+                self._set_view(events)
+                return self._view
+        self._rebuild(events)
+        return self._view
+
+    def _rebuild(self, events: list[Event]) -> None:
+        kept_events, self._forgotten_event_ids, summary_offset = _apply_condensations(
+            events
+        )
+        self._summary_offset_pending = (
+            summary_offset is not None and not 0 <= summary_offset < len(kept_events)
+        )
+        self._kept_events = kept_events
+        self._set_view(events)
+
+    def _set_view(self, events: list[Event]) -> None:
+        self._events = events
+        self._num_events = len(events)
+        self._last_event = events[-1] if events else None
+        # The events were checked when they were added to the history. The kept
+        # events are only appended to until the next rebuild, so views handed
+        # out earlier still see the events they had.
+        self._view = View._of_prefix(self._kept_events, len(self._kept_events))
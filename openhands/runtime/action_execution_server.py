@@ -7,13 +7,11 @@ NOTE: this will be executed inside the docker sandbox.
 
 import argparse
 import asyncio
-import base64
 import json
 import mimetypes
 import os
 import shutil
 import sys
-import tempfile
 import time
 import traceback
 from contextlib import asynccontextmanager
@@ -23,7 +21,7 @@ from zipfile import ZipFile
 from binaryornot.check import is_binary
 from fastapi import Depends, FastAPI, HTTPException, Request, UploadFile
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import APIKeyHeader
 try:
     from openhands_aci.editor.editor import OHEditor
@@ -131,7 +129,6 @@ except ImportError:
     
     OPENHANDS_ACI_AVAILABLE = False
 from pydantic import BaseModel
-from starlette.background import BackgroundTask
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from uvicorn import run
 
@@ -167,8 +164,15 @@ from openhands.runtime.file_viewer_server import start_file_viewer_server
 from openhands.runtime.mcp.proxy import MCPProxyManager
 from openhands.runtime.plugins import ALL_PLUGINS, JupyterPlugin, Plugin, VSCodePlugin
 from openhands.runtime.utils import find_available_tcp_port
+from openhands.runtime.utils.archive import ZipStream
 from openhands.runtime.utils.bash import BashSession
-from openhands.runtime.utils.files import insert_lines, read_lines
+from openhands.runtime.utils.files import (
+    RANGE_READ_MIN_BYTES,
+    insert_lines,
+    read_data_url,
+    read_line_range,
+    read_lines,
+)
 from openhands.runtime.utils.memory_monitor import MemoryMonitor
 from openhands.runtime.utils.runtime_init import init_user_and_working_directory
 from openhands.runtime.utils.system_stats import get_system_stats
@@ -284,7 +288,14 @@ class ActionExecutor:
             self.user_id = _updated_user_id
 
         self.bash_session: BashSession | 'WindowsPowershellSession' | None = None  # type: ignore[name-defined]
+        # Shell sessions started by the commands addressing them by name
+        self.named_bash_sessions: dict[str, BashSession | 'WindowsPowershellSession'] = {}  # type: ignore[name-defined]
         self.lock = asyncio.Lock()
+        self._named_bash_session_locks: dict[str, asyncio.Lock] = {}
+        # Each named session keeps a tmux session and its output pipe until the runtime stops
+        self.max_named_bash_sessions = int(
+            os.environ.get('MAX_NAMED_BASH_SESSIONS', 16)
+        )
         self.plugins: dict[str, Plugin] = {}
         self.file_editor = OHEditor(workspace_root=self._initial_cwd)
         self.browser: BrowserEnv | None = None
@@ -295,6 +306,11 @@ class ActionExecutor:
         self.last_execution_time = self.start_time
         self._initialized = False
 
+        # Media files are sent whole and base64 encoded, which takes several times their size in memory
+        self.max_media_file_bytes = (
+            int(os.environ.get('MAX_MEDIA_FILE_SIZE_MB', 100)) * 1024 * 1024
+        )
+
         self.max_memory_gb: int | None = None
         if _override_max_memory_gb := os.environ.get('RUNTIME_MAX_MEMORY_GB', None):
             self.max_memory_gb = int(_override_max_memory_gb)
@@ -350,7 +366,9 @@ class ActionExecutor:
         # If we get here, the browser is ready
         logger.debug('Browser is ready')
 
-    def _create_bash_session(self, cwd: str | None = None):
+    def _create_bash_session(
+        self, cwd: str | None = None, history_limit: int | None = None
+    ):
         if sys.platform == 'win32':
             return WindowsPowershellSession(  # type: ignore[name-defined]
                 work_dir=cwd or self._initial_cwd,
@@ -368,6 +386,7 @@ class ActionExecutor:
                     os.environ.get('NO_CHANGE_TIMEOUT_SECONDS', 10)
                 ),
                 max_memory_mb=self.max_memory_gb * 1024 if self.max_memory_gb else None,
+                history_limit=history_limit,
             )
             bash_session.initialize()
             return bash_session
@@ -423,7 +442,7 @@ class ActionExecutor:
                 IPythonRunCellAction(code=f'import os; os.chdir(r"{cwd}")')
             )
 
-    async def _init_bash_commands(self):
+    async def _init_bash_commands(self, session_id: str | None = None):
         INIT_COMMANDS = []
         is_local_runtime = os.environ.get('LOCAL_RUNTIME_MODE') == '1'
         is_windows = sys.platform == 'win32'
@@ -467,7 +486,7 @@ class ActionExecutor:
 
         logger.info(f'Initializing by running {len(INIT_COMMANDS)} bash commands...')
         for command in INIT_COMMANDS:
-            action = CmdRunAction(command=command)
+            action = CmdRunAction(command=command, session_id=session_id)
             action.set_hard_timeout(300)
             logger.debug(f'Executing init command: {command}')
             obs = await self.run(action)
@@ -479,7 +498,13 @@ class ActionExecutor:
         logger.debug('Bash init commands completed')
 
     async def run_action(self, action) -> Observation:
-        async with self.lock:
+        lock = self.lock
+        if isinstance(action, CmdRunAction) and action.session_id is not None:
+            # A named session only waits for its own previous command
+            lock = self._named_bash_session_locks.setdefault(
+                action.session_id, asyncio.Lock()
+            )
+        async with lock:
             action_type = action.action
             observation = await getattr(self, action_type)(action)
             return observation
@@ -491,6 +516,17 @@ class ActionExecutor:
             bash_session = self.bash_session
             if action.is_static:
                 bash_session = self._create_bash_session(action.cwd)
+            elif action.session_id is not None:
+                if (
+                    action.session_id not in self.named_bash_sessions
+                    and len(self.named_bash_sessions) >= self.max_named_bash_sessions
+                ):
+                    self._named_bash_session_locks.pop(action.session_id, None)
+                    return ErrorObservation(
+                        f'Too many shell sessions: the limit is {self.max_named_bash_sessions}. '
+                        f'Use one of the existing sessions: {", ".join(sorted(self.named_bash_sessions))}.'
+                    )
+                bash_session = await self._get_named_bash_session(action.session_id)
             assert bash_session is not None
             obs = await call_sync_from_async(bash_session.execute, action)
             return obs
@@ -498,6 +534,20 @@ class ActionExecutor:
             logger.error(f'Error running command: {e}')
             return ErrorObservation(str(e))
 
+    async def _get_named_bash_session(self, session_id: str):
+        """The shell session of a name, started in the initial working directory on first use."""
+        bash_session = self.named_bash_sessions.get(session_id)
+        if bash_session is None:
+            logger.debug(f'Initializing bash session {session_id!r}')
+            history_limit = os.environ.get('NAMED_SESSION_HISTORY_LIMIT')
+            bash_session = await call_sync_from_async(
+                self._create_bash_session,
+                history_limit=int(history_limit) if history_limit else None,
+            )
+            self.named_bash_sessions[session_id] = bash_session
+            await self._init_bash_commands(session_id)
+        return bash_session
+
     async def run_ipython(self, action: IPythonRunCellAction) -> Observation:
         assert self.bash_session is not None
         if 'jupyter' in self.plugins:
@@ -567,35 +617,33 @@ class ActionExecutor:
         working_dir = self.bash_session.cwd
         filepath = self._resolve_path(action.path, working_dir)
         try:
-            if filepath.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.gif')):
-                with open(filepath, 'rb') as file:
-                    image_data = file.read()
-                    encoded_image = base64.b64encode(image_data).decode('utf-8')
-                    mime_type, _ = mimetypes.guess_type(filepath)
-                    if mime_type is None:
-                        mime_type = 'image/png'  # default to PNG if mime type cannot be determined
-                    encoded_image = f'data:{mime_type};base64,{encoded_image}'
-
-                return FileReadObservation(path=filepath, content=encoded_image)
-            elif filepath.lower().endswith('.pdf'):
-                with open(filepath, 'rb') as file:
-                    pdf_data = file.read()
-                    encoded_pdf = base64.b64encode(pdf_data).decode('utf-8')
-                    encoded_pdf = f'data:application/pdf;base64,{encoded_pdf}'
-                return FileReadObservation(path=filepath, content=encoded_pdf)
-            elif filepath.lower().endswith(('.mp4', '.webm', '.ogg')):
-                with open(filepath, 'rb') as file:
-                    video_data = file.read()
-                    encoded_video = base64.b64encode(video_data).decode('utf-8')
-                    mime_type, _ = mimetypes.guess_type(filepath)
-                    if mime_type is None:
-                        mime_type = 'video/mp4'  # default to MP4 if MIME type cannot be determined
-                    encoded_video = f'data:{mime_type};base64,{encoded_video}'
-
-                return FileReadObservation(path=filepath, content=encoded_video)
-
-            with open(filepath, 'r', encoding='utf-8') as file:
-                lines = read_lines(file.readlines(), action.start, action.end)
+            if filepath.lower().endswith(
+                ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.pdf', '.mp4', '.webm', '.ogg')
+            ):
+                file_size = os.path.getsize(filepath)
+                if file_size > self.max_media_file_bytes:
+                    return ErrorObservation(
+                        f'File is too large to read: {filepath} is {file_size} bytes, '
+                        f'the limit is {self.max_media_file_bytes} bytes.'
+                    )
+                if filepath.lower().endswith('.pdf'):
+                    mime_type = 'application/pdf'
+                elif filepath.lower().endswith(('.mp4', '.webm', '.ogg')):
+                    # default to MP4 if MIME type cannot be determined
+                    mime_type = mimetypes.guess_type(filepath)[0] or 'video/mp4'
+                else:
+                    # default to PNG if mime type cannot be determined
+                    mime_type = mimetypes.guess_type(filepath)[0] or 'image/png'
+                return FileReadObservation(
+                    path=filepath, content=read_data_url(filepath, mime_type)
+                )
+
+            if os.path.getsize(filepath) >= RANGE_READ_MIN_BYTES:
+                # Only read the requested lines of large files
+                lines = read_line_range(filepath, action.start, action.end)
+            else:
+                with open(filepath, 'r', encoding='utf-8') as file:
+                    lines = read_lines(file.readlines(), action.start, action.end)
         except FileNotFoundError:
             return ErrorObservation(
                 f'File not found: {filepath}. Your current working directory is {working_dir}.'
@@ -710,6 +758,8 @@ class ActionExecutor:
         self.memory_monitor.stop_monitoring()
         if self.bash_session is not None:
             self.bash_session.close()
+        for bash_session in self.named_bash_sessions.values():
+            bash_session.close()
         if self.browser is not None:
             self.browser.close()
 
@@ -963,13 +1013,9 @@ if __name__ == '__main__':
                         status_code=400, detail='Recursive uploads must be zip files'
                     )
 
-                zip_path = os.path.join(full_dest_path, file.filename)
-                with open(zip_path, 'wb') as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-
-                # Extract the zip file
-                shutil.unpack_archive(zip_path, full_dest_path)
-                os.remove(zip_path)  # Remove the zip file after extraction
+                # Extract the zip file from the upload, without copying it
+                with ZipFile(file.file) as zipf:
+                    zipf.extractall(full_dest_path)
 
                 logger.debug(
                     f'Uploaded file {file.filename} and extracted to {destination}'
@@ -994,7 +1040,7 @@ if __name__ == '__main__':
             raise HTTPException(status_code=500, detail=str(e))
 
     @app.get('/download_files')
-    def download_file(path: str):
+    def download_file(path: str, compresslevel: int | None = None):
         logger.debug('Downloading files')
         try:
             if not os.path.isabs(path):
@@ -1005,21 +1051,21 @@ if __name__ == '__main__':
             if not os.path.exists(path):
                 raise HTTPException(status_code=404, detail='File not found')
 
-            with tempfile.NamedTemporaryFile(suffix='.zip', delete=False) as temp_zip:
-                with ZipFile(temp_zip, 'w') as zipf:
-                    for root, _, files in os.walk(path):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            zipf.write(
-                                file_path, arcname=os.path.relpath(file_path, path)
-                            )
-                return FileResponse(
-                    path=temp_zip.name,
-                    media_type='application/zip',
-                    filename=f'{os.path.basename(path)}.zip',
-                    background=BackgroundTask(lambda: os.unlink(temp_zip.name)),
-                )
+            try:
+                zip_stream = ZipStream(path, compresslevel=compresslevel)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+            # The zip is written while it is sent, nothing is stored on disk
+            filename = f'{os.path.basename(path)}.zip'
+            return StreamingResponse(
+                iter(zip_stream),
+                media_type='application/zip',
+                headers={'Content-Disposition': f'attachment; filename="{filename}"'},
+            )
 
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
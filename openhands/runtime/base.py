@@ -904,8 +904,11 @@ fi
         raise NotImplementedError('This method is not implemented in the base class.')
 
     @abstractmethod
-    def copy_from(self, path: str) -> Path:
-        """Zip all files in the sandbox and return a path in the local filesystem."""
+    def copy_from(self, path: str, compresslevel: int | None = None) -> Path:
+        """Zip all files in the sandbox and return a path in the local filesystem.
+
+        With a `compresslevel` from 0 to 9, the files are deflated at that level.
+        """
         raise NotImplementedError('This method is not implemented in the base class.')
 
     # ====================================================================
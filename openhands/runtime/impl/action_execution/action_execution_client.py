@@ -2,8 +2,7 @@ import os
 import tempfile
 import threading
 from pathlib import Path
-from typing import Any
-from zipfile import ZipFile
+from typing import Any, BinaryIO
 
 import httpcore
 import httpx
@@ -45,6 +44,7 @@ from openhands.events.serialization.action import ACTION_TYPE_TO_CLASS
 from openhands.integrations.provider import PROVIDER_TOKEN_TYPE
 from openhands.runtime.base import Runtime
 from openhands.runtime.plugins import PluginRequirement
+from openhands.runtime.utils.archive import ZipStream
 from openhands.runtime.utils.request import send_request
 from openhands.utils.http_session import HttpSession
 from openhands.utils.tenacity_stop import stop_if_should_exit
@@ -78,6 +78,8 @@ class ActionExecutionClient(Runtime):
     ):
         self.session = HttpSession()
         self.action_semaphore = threading.Semaphore(1)  # Ensure one action at a time
+        # Commands of named shell sessions run alongside other actions, one at a time per session
+        self._named_session_semaphores: dict[str, threading.Semaphore] = {}
         self._runtime_closed: bool = False
         self._vscode_token: str | None = None  # initial dummy value
         self._last_updated_mcp_stdio_servers: list[MCPStdioServerConfig] = []
@@ -156,10 +158,12 @@ class ActionExecutionClient(Runtime):
         except httpx.TimeoutException:
             raise TimeoutError('List files operation timed out')
 
-    def copy_from(self, path: str) -> Path:
+    def copy_from(self, path: str, compresslevel: int | None = None) -> Path:
         """Zip all files in the sandbox and return as a stream of bytes."""
         try:
-            params = {'path': path}
+            params: dict[str, str | int] = {'path': path}
+            if compresslevel is not None:
+                params['compresslevel'] = compresslevel
             with self.session.stream(
                 'GET',
                 f'{self.action_execution_server_url}/download_files',
@@ -182,41 +186,14 @@ class ActionExecutionClient(Runtime):
         if not os.path.exists(host_src):
             raise FileNotFoundError(f'Source file {host_src} does not exist')
 
-        temp_zip_path: str | None = None  # Define temp_zip_path outside the try block
-
+        file_to_upload: BinaryIO | ZipStream | None = None
         try:
-            params = {'destination': sandbox_dest, 'recursive': str(recursive).lower()}
-            file_to_upload = None
-            upload_data = {}
-
             if recursive:
-                # Create and write the zip file inside the try block
-                with tempfile.NamedTemporaryFile(
-                    suffix='.zip', delete=False
-                ) as temp_zip:
-                    temp_zip_path = temp_zip.name
-
-                try:
-                    with ZipFile(temp_zip_path, 'w') as zipf:
-                        for root, _, files in os.walk(host_src):
-                            for file in files:
-                                file_path = os.path.join(root, file)
-                                arcname = os.path.relpath(
-                                    file_path, os.path.dirname(host_src)
-                                )
-                                zipf.write(file_path, arcname)
-
-                    self.log(
-                        'debug',
-                        f'Opening temporary zip file for upload: {temp_zip_path}',
-                    )
-                    file_to_upload = open(temp_zip_path, 'rb')
-                    upload_data = {'file': file_to_upload}
-                except Exception as e:
-                    # Ensure temp file is cleaned up if zipping fails
-                    if temp_zip_path and os.path.exists(temp_zip_path):
-                        os.unlink(temp_zip_path)
-                    raise e  # Re-raise the exception after cleanup attempt
+                # The zip is written while it is uploaded, nothing is stored on disk
+                file_to_upload = ZipStream(host_src, os.path.dirname(host_src))
+                upload_data = {
+                    'file': (f'{os.path.basename(host_src)}.zip', file_to_upload)
+                }
             else:
                 file_to_upload = open(host_src, 'rb')
                 upload_data = {'file': file_to_upload}
@@ -238,16 +215,6 @@ class ActionExecutionClient(Runtime):
             if file_to_upload:
                 file_to_upload.close()
 
-            # Cleanup the temporary zip file if it was created
-            if temp_zip_path and os.path.exists(temp_zip_path):
-                try:
-                    os.unlink(temp_zip_path)
-                except Exception as e:
-                    self.log(
-                        'error',
-                        f'Failed to delete temporary zip file {temp_zip_path}: {e}',
-                    )
-
     def get_vscode_token(self) -> str:
         if self.vscode_enabled and self.runtime_initialized:
             if self._vscode_token is not None:  # cached value
@@ -280,7 +247,12 @@ class ActionExecutionClient(Runtime):
             # We don't block the command if this is a default timeout action
             action.set_hard_timeout(self.config.sandbox.timeout, blocking=False)
 
-        with self.action_semaphore:
+        action_semaphore = self.action_semaphore
+        if isinstance(action, CmdRunAction) and action.session_id is not None:
+            action_semaphore = self._named_session_semaphores.setdefault(
+                action.session_id, threading.Semaphore(1)
+            )
+        with action_semaphore:
             if not action.runnable:
                 if isinstance(action, AgentThinkAction):
                     return AgentThinkObservation('Your thought has been logged.')
@@ -797,7 +797,7 @@ class CLIRuntime(Runtime):
             logger.error(f'Error listing files: {str(e)}')
             return []
 
-    def copy_from(self, path: str) -> Path:
+    def copy_from(self, path: str, compresslevel: int | None = None) -> Path:
         """Zip all files in the sandbox and return a path in the local filesystem."""
         if not self._runtime_initialized:
             raise RuntimeError('Runtime not initialized')
@@ -812,7 +812,9 @@ class CLIRuntime(Runtime):
         temp_zip.close()
 
         try:
-            with zipfile.ZipFile(temp_zip.name, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            with zipfile.ZipFile(
+                temp_zip.name, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+            ) as zipf:
                 if os.path.isdir(source_path):
                     # Add all files in the directory
                     for root, _, files in os.walk(source_path):
@@ -0,0 +1,149 @@
+import io
+import os
+import threading
+from typing import Iterator
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+# Formats that are compressed already, deflating them again only costs CPU
+COMPRESSED_EXTENSIONS = frozenset(
+    {
+        '.7z',
+        '.avi',
+        '.br',
+        '.bz2',
+        '.docx',
+        '.gif',
+        '.gz',
+        '.jar',
+        '.jpeg',
+        '.jpg',
+        '.mkv',
+        '.mov',
+        '.mp3',
+        '.mp4',
+        '.ogg',
+        '.png',
+        '.pptx',
+        '.rar',
+        '.tgz',
+        '.webm',
+        '.webp',
+        '.whl',
+        '.woff',
+        '.woff2',
+        '.xlsx',
+        '.xz',
+        '.zip',
+        '.zst',
+    }
+)
+
+ZIP_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class ZipStream:
+    """A zip archive of the files under a path, written while it is read.
+
+    A thread writes the archive into a pipe, so the archive is never stored
+    as a whole, on disk or in memory, and the first bytes are available as
+    soon as the first file is read. Files are stored as they are, unless a
+    `compresslevel` from 1 to 9 is given to deflate them. Files in
+    COMPRESSED_EXTENSIONS are always stored.
+
+    The stream is read like a file or iterated over in chunks. It can only be
+    seeked back to the start, which writes the archive again, so that an
+    upload of it can be retried.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        arcname_base: str | None = None,
+        compresslevel: int | None = None,
+    ) -> None:
+        if compresslevel is not None and not 0 <= compresslevel <= 9:
+            raise ValueError(f'Invalid compression level: {compresslevel}')
+        self.path = path
+        self.arcname_base = path if arcname_base is None else arcname_base
+        self.compresslevel = compresslevel
+        self._reader: io.BufferedReader | None = None
+        self._writer_thread: threading.Thread | None = None
+        self._error: BaseException | None = None
+
+    def read(self, size: int = -1) -> bytes:
+        if self._reader is None:
+            self._start()
+        assert self._reader is not None
+        data = self._reader.read(size)
+        if not data and size != 0:
+            self._finish()
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if offset != 0 or whence != os.SEEK_SET:
+            raise io.UnsupportedOperation('ZipStream can only be seeked to 0')
+        self.close()
+        return 0
+
+    def close(self) -> None:
+        if self._reader is None:
+            return
+        # the writer stops with a broken pipe if it is still writing
+        self._reader.close()
+        self._reader = None
+        if self._writer_thread is not None:
+            self._writer_thread.join()
+            self._writer_thread = None
+        self._error = None
+
+    def __iter__(self) -> Iterator[bytes]:
+        try:
+            while chunk := self.read(ZIP_STREAM_CHUNK_SIZE):
+                yield chunk
+        finally:
+            self.close()
+
+    def __enter__(self) -> 'ZipStream':
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        read_fd, write_fd = os.pipe()
+        self._reader = os.fdopen(read_fd, 'rb')
+        self._error = None
+        self._writer_thread = threading.Thread(
+            target=self._write, args=(write_fd,), daemon=True
+        )
+        self._writer_thread.start()
+
+    def _finish(self) -> None:
+        if self._writer_thread is not None:
+            self._writer_thread.join()
+            self._writer_thread = None
+        if self._error is not None:
+            raise self._error
+
+    def _write(self, write_fd: int) -> None:
+        try:
+            with os.fdopen(write_fd, 'wb') as pipe, ZipFile(pipe, 'w') as zipf:
+                for root, _, files in os.walk(self.path):
+                    for file in files:
+                        file_path = os.path.join(root, file)
+                        stored = (
+                            not self.compresslevel
+                            or os.path.splitext(file)[1].lower()
+                            in COMPRESSED_EXTENSIONS
+                        )
+                        zipf.write(
+                            file_path,
+                            arcname=os.path.relpath(file_path, self.arcname_base),
+                            compress_type=ZIP_STORED if stored else ZIP_DEFLATED,
+                            compresslevel=None if stored else self.compresslevel,
+                        )
+        except BrokenPipeError:
+            # the reader was closed before the end of the archive
+            pass
+        except Exception as e:
+            self._error = e
@@ -1,5 +1,8 @@
 import os
 import re
+import select
+import shlex
+import tempfile
 import time
 import traceback
 import uuid
@@ -173,8 +176,117 @@ def _remove_command_prefix(command_output: str, command: str) -> str:
     return command_output.lstrip().removeprefix(command.lstrip()).lstrip()
 
 
+_PS1_END_BYTES = CMD_OUTPUT_PS1_END.strip().encode()
+
+
+class _PaneOutputLog:
+    """The raw output of a tmux pane, appended to a file by `tmux pipe-pane`.
+
+    Polling reads only the bytes written since the previous poll, so that the
+    cost of waiting for a command does not grow with the size of its output.
+    The pane itself is only captured once the end of a PS1 prompt shows up in
+    the new bytes.
+    """
+
+    # Past this size the bytes already read are dropped, so a command printing
+    # a lot of output does not fill the disk
+    MAX_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, pane: libtmux.Pane) -> None:
+        fd, self.path = tempfile.mkstemp(prefix='openhands-pane-', suffix='.log')
+        os.close(fd)
+        pane.cmd('pipe-pane', f'cat >> {shlex.quote(self.path)}')
+        # Opened for writing too, to truncate it through the handle. The shell
+        # may delete the file in the shared temp directory, but both ends keep it.
+        self._file = open(self.path, 'r+b')
+        # The end of the bytes already scanned, in case a marker is split between polls
+        self._tail = b''
+
+    def poll(self) -> tuple[bool, int]:
+        """Whether new output was written since the last poll, and how many PS1 prompts it ends."""
+        new_output = self._file.read()
+        if not new_output:
+            return False, 0
+        output = self._tail + new_output
+        self._tail = output[-(len(_PS1_END_BYTES) - 1) :]
+        num_prompts = output.count(_PS1_END_BYTES)
+        if self._file.tell() >= self.MAX_SIZE:
+            os.ftruncate(self._file.fileno(), 0)
+            self._file.seek(0)
+            # Output written between the read and the truncation is lost, so
+            # report a possible prompt for the pane to be checked
+            num_prompts = max(num_prompts, 1)
+        return True, num_prompts
+
+    def reset(self) -> None:
+        """Drop the output written so far."""
+        os.ftruncate(self._file.fileno(), 0)
+        self._file.seek(0)
+        self._tail = b''
+
+    def close(self) -> None:
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class _PromptFifo:
+    """A named pipe the shell writes to from PROMPT_COMMAND, right before each prompt.
+
+    Waiting on it returns as soon as a command completes instead of at the
+    next poll. Programs which never return to the prompt, such as TUIs or
+    nested shells without the hook, are still caught by polling.
+    """
+
+    def __init__(self) -> None:
+        self._directory = tempfile.mkdtemp(prefix='openhands-prompt-')
+        # The shell may run as another user
+        os.chmod(self._directory, 0o711)
+        self.path = os.path.join(self._directory, 'prompt')
+        os.mkfifo(self.path)
+        # Readable too, since the shell opens it read-write. Others can not
+        # list the directory to find it.
+        os.chmod(self.path, 0o666)
+        # Opened for writing too, so that reads never hit the end of the file
+        # when the shell closes its end
+        self._fd = os.open(self.path, os.O_RDWR | os.O_NONBLOCK)
+
+    @property
+    def notify_command(self) -> str:
+        """The shell command to run before each prompt."""
+        # Opening read-write does not block, even if nobody reads the pipe anymore.
+        # Errors are dropped, polling still notices the prompt.
+        return f'echo 2>/dev/null 1<>{shlex.quote(self.path)}'
+
+    def wait(self, timeout: float) -> bool:
+        """Wait for the next prompt, and whether one was notified before the timeout."""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            while os.read(self._fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        os.close(self._fd)
+        try:
+            os.remove(self.path)
+            os.rmdir(self._directory)
+        except OSError:
+            pass
+
+
 class BashSession:
     POLL_INTERVAL = 0.5
+    # How often to look for the prompt once the shell said it is printing it
+    PROMPT_POLL_INTERVAL = 0.01
+    # How long to wait for the first prompt of the shell
+    STARTUP_TIMEOUT_SECONDS = 10
     HISTORY_LIMIT = 10_000
     PS1 = CmdOutputMetadata.to_ps1_prompt()
 
@@ -184,12 +296,17 @@ class BashSession:
         username: str | None = None,
         no_change_timeout_seconds: int = 30,
         max_memory_mb: int | None = None,
+        history_limit: int | None = None,
     ):
         self.NO_CHANGE_TIMEOUT_SECONDS = no_change_timeout_seconds
         self.work_dir = work_dir
         self.username = username
         self._initialized = False
         self.max_memory_mb = max_memory_mb
+        # Lines of output kept by tmux, the output of a command beyond it is truncated
+        self.history_limit = (
+            history_limit if history_limit is not None else self.HISTORY_LIMIT
+        )
 
     def initialize(self) -> None:
         self.server = libtmux.Server()
@@ -219,8 +336,9 @@ class BashSession:
 
         # Set history limit to a large number to avoid losing history
         # https://unix.stackexchange.com/questions/43414/unlimited-history-in-tmux
-        self.session.set_option('history-limit', str(self.HISTORY_LIMIT), _global=True)
-        self.session.history_limit = self.HISTORY_LIMIT
+        # The option is set on this session only, other sessions may use other limits
+        self.session.set_option('history-limit', str(self.history_limit))
+        self.session.history_limit = self.history_limit
         # We need to create a new pane because the initial pane's history limit is (default) 2000
         _initial_window = self.session.active_window
         self.window = self.session.new_window(
@@ -231,13 +349,18 @@ class BashSession:
         self.pane = self.window.active_pane
         logger.debug(f'pane: {self.pane}; history_limit: {self.session.history_limit}')
         _initial_window.kill_window()
+        self._output_log = _PaneOutputLog(self.pane)
+        self._prompt_fifo = _PromptFifo()
 
-        # Configure bash to use simple PS1 and disable PS2
+        # Configure bash to use simple PS1 and disable PS2, and to notify us of each prompt
         self.pane.send_keys(
-            f'export PROMPT_COMMAND=\'export PS1="{self.PS1}"\'; export PS2=""'
+            f'export PROMPT_COMMAND=\'export PS1="{self.PS1}"; {self._prompt_fifo.notify_command}\'; export PS2=""'
         )
-        time.sleep(0.1)  # Wait for command to take effect
+        # Wait for command to take effect: the command line itself contains the
+        # end of the PS1 prompt once, the first prompt it sets contains it again.
+        self._wait_for_ps1_ends(2, timeout=self.STARTUP_TIMEOUT_SECONDS)
         self._clear_screen()
+        self._output_log.reset()
 
         # Store the last command for interactive input handling
         self.prev_status: BashCommandStatus | None = None
@@ -253,6 +376,14 @@ class BashSession:
         """Ensure the session is closed when the object is destroyed."""
         self.close()
 
+    def _wait_for_ps1_ends(self, count: int, timeout: float) -> None:
+        deadline = time.time() + timeout
+        while count > 0 and time.time() < deadline:
+            _, ps1_ends = self._output_log.poll()
+            count -= ps1_ends
+            if count > 0:
+                time.sleep(self.PROMPT_POLL_INTERVAL)
+
     def _get_pane_content(self) -> str:
         """Capture the current pane content and update the buffer."""
         content = '\n'.join(
@@ -264,11 +395,22 @@ class BashSession:
         )
         return content
 
+    def _capture_pane_with_matches(self) -> tuple[str, list[re.Match]]:
+        _start_time = time.time()
+        logger.debug(f'GETTING PANE CONTENT at {_start_time}')
+        pane_content = self._get_pane_content()
+        logger.debug(f'PANE CONTENT GOT after {time.time() - _start_time:.2f} seconds')
+        logger.debug(f'BEGIN OF PANE CONTENT: {pane_content.split("\n")[:10]}')
+        logger.debug(f'END OF PANE CONTENT: {pane_content.split("\n")[-10:]}')
+        return pane_content, CmdOutputMetadata.matches_ps1_metadata(pane_content)
+
     def close(self) -> None:
         """Clean up the session."""
         if self._closed:
             return
         self.session.kill_session()
+        self._output_log.close()
+        self._prompt_fifo.close()
         self._closed = True
 
     @property
@@ -284,7 +426,8 @@ class BashSession:
     def _clear_screen(self) -> None:
         """Clear the tmux pane screen and history."""
         self.pane.send_keys('C-l', enter=False)
-        time.sleep(0.1)
+        # Wait for the prompt to be redrawn on the cleared screen
+        self._wait_for_ps1_ends(1, timeout=0.1)
         self.pane.cmd('clear-history')
 
     def _get_command_output(
@@ -432,6 +575,7 @@ class BashSession:
         """Reset the content buffer for a new command."""
         # Clear the current content
         self._clear_screen()
+        self._output_log.reset()
 
     def _combine_outputs_between_matches(
         self,
@@ -587,20 +731,10 @@ class BashSession:
                 )
 
         # Loop until the command completes or times out
+        prompt_expected_until = 0.0
         while should_continue():
-            _start_time = time.time()
-            logger.debug(f'GETTING PANE CONTENT at {_start_time}')
-            cur_pane_output = self._get_pane_content()
-            logger.debug(
-                f'PANE CONTENT GOT after {time.time() - _start_time:.2f} seconds'
-            )
-            logger.debug(f'BEGIN OF PANE CONTENT: {cur_pane_output.split("\n")[:10]}')
-            logger.debug(f'END OF PANE CONTENT: {cur_pane_output.split("\n")[-10:]}')
-            ps1_matches = CmdOutputMetadata.matches_ps1_metadata(cur_pane_output)
-            current_ps1_count = len(ps1_matches)
-
-            if cur_pane_output != last_pane_output:
-                last_pane_output = cur_pane_output
+            has_new_output, ps1_ends = self._output_log.poll()
+            if has_new_output:
                 last_change_time = time.time()
                 logger.debug(f'CONTENT UPDATED DETECTED at {last_change_time}')
 
@@ -608,15 +742,19 @@ class BashSession:
             # Condition 1: A new prompt has appeared since the command started.
             # Condition 2: The prompt count hasn't increased (potentially because the initial one scrolled off),
             # BUT the *current* visible pane ends with a prompt, indicating completion.
-            if (
-                current_ps1_count > initial_ps1_count
-                or cur_pane_output.rstrip().endswith(CMD_OUTPUT_PS1_END.rstrip())
-            ):
-                return self._handle_completed_command(
-                    command,
-                    pane_content=cur_pane_output,
-                    ps1_matches=ps1_matches,
-                )
+            # The pane is only captured when a prompt was printed since the last poll.
+            if ps1_ends:
+                cur_pane_output, ps1_matches = self._capture_pane_with_matches()
+                current_ps1_count = len(ps1_matches)
+                if (
+                    current_ps1_count > initial_ps1_count
+                    or cur_pane_output.rstrip().endswith(CMD_OUTPUT_PS1_END.rstrip())
+                ):
+                    return self._handle_completed_command(
+                        command,
+                        pane_content=cur_pane_output,
+                        ps1_matches=ps1_matches,
+                    )
 
             # Timeout checks should only trigger if a new prompt hasn't appeared yet.
 
@@ -631,6 +769,7 @@ class BashSession:
                 not action.blocking
                 and time_since_last_change >= self.NO_CHANGE_TIMEOUT_SECONDS
             ):
+                cur_pane_output, ps1_matches = self._capture_pane_with_matches()
                 return self._handle_nochange_timeout_command(
                     command,
                     pane_content=cur_pane_output,
@@ -644,6 +783,7 @@ class BashSession:
             )
             if action.timeout and elapsed_time >= action.timeout:
                 logger.debug('Hard timeout triggered.')
+                cur_pane_output, ps1_matches = self._capture_pane_with_matches()
                 return self._handle_hard_timeout_command(
                     command,
                     pane_content=cur_pane_output,
@@ -651,6 +791,13 @@ class BashSession:
                     timeout=action.timeout,
                 )
 
-            logger.debug(f'SLEEPING for {self.POLL_INTERVAL} seconds for next poll')
-            time.sleep(self.POLL_INTERVAL)
+            if time.time() < prompt_expected_until:
+                # PROMPT_COMMAND runs right before the prompt is printed
+                time.sleep(self.PROMPT_POLL_INTERVAL)
+            else:
+                logger.debug(
+                    f'WAITING up to {self.POLL_INTERVAL} seconds for the prompt'
+                )
+                if self._prompt_fifo.wait(self.POLL_INTERVAL):
+                    prompt_expected_until = time.time() + self.POLL_INTERVAL
         raise RuntimeError('Bash session was likely interrupted...')
@@ -1,4 +1,10 @@
+import base64
+import io
 import os
+import threading
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
 from pathlib import Path
 
 from openhands.events.observation import (
@@ -68,6 +74,124 @@ def read_lines(all_lines: list[str], start: int = 0, end: int = -1) -> list[str]
         return all_lines[begin:end]
 
 
+# Files from this size on are read by line range instead of all at once
+RANGE_READ_MIN_BYTES = 1 << 20
+
+
+class LineIndex:
+    """The number of lines of a file starting before each of its blocks.
+
+    Locating a line only scans the block containing the end of the previous
+    line, so reading a range of lines costs the size of the range instead of
+    the size of the file. The index takes 8 bytes per block.
+
+    Only newlines are counted, so the index can not locate the lines of a file
+    which also ends lines with a lone carriage return; `has_lone_cr` tells.
+    """
+
+    def __init__(self, path: str, block_size: int = 1 << 16) -> None:
+        stat = os.stat(path)
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self.block_size = block_size
+        # The number of newlines before the start of each block
+        self._newlines_before = array('q', [0])
+        last_byte = b''
+        lone_crs = 0
+        with open(path, 'rb') as file:
+            while block := file.read(block_size):
+                self._newlines_before.append(
+                    self._newlines_before[-1] + block.count(b'\n')
+                )
+                lone_crs += block.count(b'\r') - block.count(b'\r\n')
+                if last_byte == b'\r' and block[:1] == b'\n':
+                    # a \r\n split between blocks
+                    lone_crs -= 1
+                last_byte = block[-1:]
+        self.size = stat.st_size
+        self.has_lone_cr = lone_crs > 0
+        num_newlines = self._newlines_before[-1]
+        self.num_lines = num_newlines + (last_byte not in (b'', b'\n'))
+
+    def line_offset(self, file: io.BufferedReader, line: int) -> int:
+        """The offset of the start of a line in the file, or its size after the last line."""
+        if line <= 0:
+            return 0
+        if line > self._newlines_before[-1]:
+            return self.size
+        # The block containing the newline ending the previous line
+        block = bisect_left(self._newlines_before, line) - 1
+        file.seek(block * self.block_size)
+        data = file.read(self.block_size)
+        position = -1
+        for _ in range(line - self._newlines_before[block]):
+            position = data.index(b'\n', position + 1)
+        return block * self.block_size + position + 1
+
+
+_line_indexes: OrderedDict[str, LineIndex] = OrderedDict()
+_line_indexes_lock = threading.Lock()
+_LINE_INDEX_CACHE_SIZE = 16
+
+
+def get_line_index(path: str) -> LineIndex:
+    """The line index of a file, reused until the file changes."""
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    with _line_indexes_lock:
+        index = _line_indexes.get(path)
+        if index is not None and index.version == (stat.st_mtime_ns, stat.st_size):
+            _line_indexes.move_to_end(path)
+            return index
+    index = LineIndex(path)
+    with _line_indexes_lock:
+        _line_indexes[path] = index
+        _line_indexes.move_to_end(path)
+        while len(_line_indexes) > _LINE_INDEX_CACHE_SIZE:
+            _line_indexes.popitem(last=False)
+    return index
+
+
+def read_line_range(path: str, start: int = 0, end: int = -1) -> list[str]:
+    """The lines of a text file `read_lines` returns, reading only those lines."""
+    if start <= 0 and end == -1:
+        # The whole file, which needs no index
+        with open(path, encoding='utf-8') as file:
+            return file.readlines()
+    index = get_line_index(path)
+    if index.has_lone_cr:
+        # universal newlines end a line on a lone \r too, read the whole file
+        with open(path, encoding='utf-8') as file:
+            return read_lines(file.readlines(), start, end)
+    num_lines = index.num_lines
+    # The same range as `read_lines`
+    if end == -1:
+        begin = min(max(start, 0), num_lines)
+        stop = num_lines
+    else:
+        begin = max(0, min(start, num_lines - 2))
+        stop = min(max(begin + 1, min(max(end, 0), num_lines)), num_lines)
+    with open(path, 'rb') as file:
+        begin_offset = index.line_offset(file, begin)
+        stop_offset = index.line_offset(file, stop)
+        file.seek(begin_offset)
+        data = file.read(stop_offset - begin_offset)
+    # Decoded like `open(path, encoding='utf-8').readlines()`
+    return io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').readlines()
+
+
+# A multiple of 3 bytes, so that the base64 of consecutive chunks can be concatenated
+_BASE64_CHUNK_SIZE = 3 << 20
+
+
+def read_data_url(path: str, mime_type: str) -> str:
+    """The content of a file as a base64 data URL, encoded a chunk at a time."""
+    parts = [f'data:{mime_type};base64,']
+    with open(path, 'rb') as file:
+        while chunk := file.read(_BASE64_CHUNK_SIZE):
+            parts.append(base64.b64encode(chunk).decode('ascii'))
+    return ''.join(parts)
+
+
 async def read_file(
     path: str,
     workdir: str,
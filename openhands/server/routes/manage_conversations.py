@@ -10,6 +10,7 @@ from jinja2 import Environment, FileSystemLoader
 from pydantic import BaseModel, Field
 
 from openhands.events.event_filter import EventFilter
+from openhands.events.event_lru_cache import EVENT_LRU_CACHE
 from openhands.events.stream import EventStream
 from openhands.events.action import (
     ChangeAgentStateAction,
@@ -291,6 +292,7 @@ async def delete_conversation(
     runtime_cls = get_runtime_cls(config.runtime)
     await runtime_cls.delete(conversation_id)
     await conversation_store.delete_metadata(conversation_id)
+    EVENT_LRU_CACHE.invalidate(user_id, conversation_id)
     return True
 
 
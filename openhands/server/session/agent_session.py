@@ -15,6 +15,8 @@ from openhands.core.logger import OpenHandsLoggerAdapter
 from openhands.core.schema.agent import AgentState
 from openhands.events.action import ChangeAgentStateAction, MessageAction
 from openhands.events.event import Event, EventSource
+from openhands.events.event_dispatcher import EventDispatchMode
+from openhands.events.event_store import EventLogFormat
 from openhands.events.stream import EventStream
 from openhands.integrations.provider import (
     CUSTOM_SECRETS_TYPE,
@@ -64,16 +66,35 @@ class AgentSession:
         file_store: FileStore,
         status_callback: Callable | None = None,
         user_id: str | None = None,
+        event_log_format: EventLogFormat = EventLogFormat.FILES,
+        event_write_behind_interval: float = 0.0,
+        event_write_behind_batch_size: int = 100,
+        event_dispatch_mode: EventDispatchMode = EventDispatchMode.THREADS,
+        event_dispatch_queue_size: int = 1000,
     ) -> None:
         """Initializes a new instance of the Session class
 
         Parameters:
         - sid: The session ID
         - file_store: Instance of the FileStore
+        - event_log_format: The event log format to use if this is a new conversation
+        - event_write_behind_interval: Maximum delay before events are written, 0 to write them synchronously
+        - event_write_behind_batch_size: Number of pending events that triggers a write
+        - event_dispatch_mode: How events are delivered to subscribers
+        - event_dispatch_queue_size: Number of events a subscriber may fall behind with the asyncio dispatch mode
         """
 
         self.sid = sid
-        self.event_stream = EventStream(sid, file_store, user_id)
+        self.event_stream = EventStream(
+            sid,
+            file_store,
+            user_id,
+            log_format=event_log_format,
+            write_behind_interval=event_write_behind_interval,
+            write_behind_batch_size=event_write_behind_batch_size,
+            dispatch_mode=event_dispatch_mode,
+            dispatch_queue_size=event_dispatch_queue_size,
+        )
         self.file_store = file_store
         self._status_callback = status_callback
         self.user_id = user_id
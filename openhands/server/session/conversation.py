@@ -1,6 +1,7 @@
 import asyncio
 
 from openhands.core.config import OpenHandsConfig
+from openhands.events.event_store import EventLogFormat
 from openhands.events.stream import EventStream
 from openhands.runtime import get_runtime_cls
 from openhands.runtime.base import Runtime
@@ -27,7 +28,12 @@ class ServerConversation:
         self.config = config
         self.file_store = file_store
         self.user_id = user_id
-        self.event_stream = EventStream(sid, file_store, user_id)
+        self.event_stream = EventStream(
+            sid,
+            file_store,
+            user_id,
+            log_format=EventLogFormat(config.event_log_format),
+        )
         if config.security.security_analyzer:
             self.security_analyzer = options.SecurityAnalyzers.get(
                 config.security.security_analyzer, SecurityAnalyzer
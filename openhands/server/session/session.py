@@ -18,6 +18,8 @@ from openhands.core.logger import OpenHandsLoggerAdapter
 from openhands.core.schema import AgentState
 from openhands.events.action import MessageAction, NullAction
 from openhands.events.event import Event, EventSource
+from openhands.events.event_dispatcher import EventDispatchMode
+from openhands.events.event_store import EventLogFormat
 from openhands.events.observation import (
     AgentStateChangedObservation,
     CmdOutputObservation,
@@ -27,6 +29,7 @@ from openhands.events.observation.agent import RecallObservation
 from openhands.events.observation.error import ErrorObservation
 from openhands.events.serialization import event_from_dict, event_to_dict
 from openhands.events.stream import EventStreamSubscriber
+from openhands.llm.async_llm import AsyncLLM
 from openhands.llm.llm import LLM
 from openhands.server.session.agent_session import AgentSession
 from openhands.server.session.conversation_init_data import ConversationInitData
@@ -72,6 +75,11 @@ class Session:
             file_store,
             status_callback=self.queue_status_message,
             user_id=user_id,
+            event_log_format=EventLogFormat(config.event_log_format),
+            event_write_behind_interval=config.event_write_behind_interval,
+            event_write_behind_batch_size=config.event_write_behind_batch_size,
+            event_dispatch_mode=EventDispatchMode(config.event_dispatch_mode),
+            event_dispatch_queue_size=config.event_dispatch_queue_size,
         )
         self.agent_session.event_stream.subscribe(
             EventStreamSubscriber.SERVER, self.on_event, self.sid
@@ -234,7 +242,9 @@ class Session:
     def _create_llm(self, agent_cls: str | None) -> LLM:
         """Initialize LLM, extracted for testing."""
         agent_name = agent_cls if agent_cls is not None else 'agent'
-        return LLM(
+        agent_config = self.config.get_agent_config(agent_name)
+        llm_cls = AsyncLLM if agent_config.enable_async_step else LLM
+        return llm_cls(
             config=self.config.get_llm_config_from_agent(agent_name),
             retry_listener=self._notify_on_llm_retry,
         )
@@ -413,8 +423,8 @@ class Session:
             )
 
             # Create new LLM instance instead of modifying existing one for session isolation
-            from openhands.llm.llm import LLM
-            novel_llm = LLM(
+            llm_cls = AsyncLLM if isinstance(controller.agent.llm, AsyncLLM) else LLM
+            novel_llm = llm_cls(
                 config=novel_llm_config,
                 retry_listener=self._notify_on_llm_retry,
             )
@@ -10,6 +10,28 @@ class FileStore:
     def read(self, path: str) -> str:
         pass
 
+    def read_range(self, path: str, start: int, end: int) -> str:
+        """Read the bytes in [start, end) of a file as text.
+
+        Stores that can seek or issue ranged requests should override this; the
+        default reads the whole file. Offsets are byte offsets, so callers must
+        only use this on ASCII content or on offsets that fall on character
+        boundaries.
+        """
+        return self.read(path).encode('utf-8')[start:end].decode('utf-8')
+
+    def append(self, path: str, contents: str) -> None:
+        """Add text to the end of a file, creating it if needed.
+
+        Stores that can append in place should override this; the default
+        rewrites the whole file.
+        """
+        try:
+            existing = self.read(path)
+        except FileNotFoundError:
+            existing = ''
+        self.write(path, existing + contents)
+
     @abstractmethod
     def list(self, path: str) -> list[str]:
         pass
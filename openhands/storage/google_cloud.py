@@ -49,6 +49,17 @@ class GoogleCloudFileStore(FileStore):
         except NotFound:
             raise FileNotFoundError(f'File not found: {path}')
 
+    def read_range(self, path: str, start: int, end: int) -> str:
+        if not GOOGLE_CLOUD_AVAILABLE:
+            raise ImportError("Google Cloud Storage not available")
+        if end <= start:
+            return ''
+        blob = self.bucket.blob(path)
+        try:
+            return blob.download_as_bytes(start=start, end=end - 1).decode('utf-8')
+        except NotFound:
+            raise FileNotFoundError(f'File not found: {path}')
+
     def write(self, path: str, contents: str) -> None:
         if not GOOGLE_CLOUD_AVAILABLE:
             raise ImportError("Google Cloud Storage not available")
@@ -12,6 +12,20 @@ def get_conversation_events_dir(sid: str, user_id: str | None = None) -> str:
     return f'{get_conversation_dir(sid, user_id)}events/'
 
 
+def get_conversation_event_log_dir(sid: str, user_id: str | None = None) -> str:
+    return f'{get_conversation_dir(sid, user_id)}event_log/'
+
+
+def get_conversation_event_index_dir(sid: str, user_id: str | None = None) -> str:
+    return f'{get_conversation_dir(sid, user_id)}event_index/'
+
+
+def get_conversation_event_manifest_filename(
+    sid: str, user_id: str | None = None
+) -> str:
+    return f'{get_conversation_dir(sid, user_id)}event_manifest.json'
+
+
 def get_conversation_event_filename(
     sid: str, id: int, user_id: str | None = None
 ) -> str:
@@ -22,6 +22,9 @@ class InMemoryFileStore(FileStore):
             raise FileNotFoundError(path)
         return self.files[path]
 
+    def append(self, path: str, contents: str) -> None:
+        self.files[path] = self.files.get(path, '') + contents
+
     def list(self, path: str) -> list[str]:
         files = []
         for file in self.files:
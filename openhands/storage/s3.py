@@ -81,6 +81,24 @@ class S3FileStore(FileStore):
                 f"Error: Failed to read from bucket '{self.bucket}' at path {path}: {e}"
             )
 
+    def read_range(self, path: str, start: int, end: int) -> str:
+        if end <= start:
+            return ''
+        try:
+            response: GetObjectOutputDict = self.client.get_object(
+                Bucket=self.bucket, Key=path, Range=f'bytes={start}-{end - 1}'
+            )
+            with response['Body'] as stream:
+                return str(stream.read().decode('utf-8'))
+        except botocore.exceptions.ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchKey':
+                raise FileNotFoundError(
+                    f"Error: The object key '{path}' does not exist in bucket '{self.bucket}'."
+                )
+            raise FileNotFoundError(
+                f"Error: Failed to read from bucket '{self.bucket}' at path {path}: {e}"
+            )
+
     def list(self, path: str) -> list[str]:
         if not path or path == '/':
             path = ''
@@ -62,6 +62,20 @@ class WebHookFileStore(FileStore):
         """
         return self.file_store.read(path)
 
+    def read_range(self, path: str, start: int, end: int) -> str:
+        """
+        Read a byte range from a file.
+
+        Args:
+            path: The path to read from
+            start: The offset of the first byte to read
+            end: The offset one past the last byte to read
+
+        Returns:
+            The contents of the range
+        """
+        return self.file_store.read_range(path, start, end)
+
     def list(self, path: str) -> list[str]:
         """
         List files in a directory.
@@ -3,6 +3,8 @@
 import os
 import sys
 import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
@@ -572,6 +574,71 @@ def test_stateful_cmd(temp_dir, runtime_cls):
         _close_test_runtime(runtime)
 
 
+@pytest.mark.skipif(
+    sys.platform == 'win32', reason='Named sessions are tested on Linux only'
+)
+def test_named_sessions_run_in_parallel(temp_dir, runtime_cls):
+    if runtime_cls == CLIRuntime:
+        pytest.skip('CLIRuntime does not keep shell sessions')
+    runtime, config = _load_runtime(temp_dir, runtime_cls)
+    try:
+        obs = _run_cmd_action(runtime, 'mkdir -p test && cd test')
+        assert obs.exit_code == 0
+
+        # A command still running in a named session does not block the others
+        watcher = CmdRunAction(
+            command='sleep 5 && echo watcher done', session_id='watcher'
+        )
+        watcher.set_hard_timeout(30, blocking=True)
+        with ThreadPoolExecutor() as executor:
+            watcher_obs = executor.submit(runtime.run_action, watcher)
+            time.sleep(1)
+            start_time = time.time()
+            obs = _run_cmd_action(runtime, 'pwd')
+            assert time.time() - start_time < 5
+            assert not watcher_obs.done()
+            assert (
+                obs.content.strip() == f'{config.workspace_mount_path_in_sandbox}/test'
+            )
+            assert 'watcher done' in watcher_obs.result().content
+
+        # Each session keeps its own working directory
+        obs = runtime.run_action(CmdRunAction(command='pwd', session_id='watcher'))
+        assert obs.content.strip() == config.workspace_mount_path_in_sandbox
+    finally:
+        _close_test_runtime(runtime)
+
+
+@pytest.mark.skipif(
+    sys.platform == 'win32', reason='Named sessions are tested on Linux only'
+)
+def test_named_sessions_are_limited(temp_dir, runtime_cls):
+    if runtime_cls == CLIRuntime:
+        pytest.skip('CLIRuntime does not keep shell sessions')
+    runtime, config = _load_runtime(
+        temp_dir,
+        runtime_cls,
+        runtime_startup_env_vars={'MAX_NAMED_BASH_SESSIONS': '2'},
+    )
+    try:
+        for session_id in ('first', 'second'):
+            obs = runtime.run_action(
+                CmdRunAction(command='echo hi', session_id=session_id)
+            )
+            assert obs.exit_code == 0
+
+        obs = runtime.run_action(CmdRunAction(command='echo hi', session_id='third'))
+        assert isinstance(obs, ErrorObservation)
+        assert 'Too many shell sessions' in obs.content
+        assert 'first, second' in obs.content
+
+        # The existing sessions are still usable
+        obs = runtime.run_action(CmdRunAction(command='echo hi', session_id='first'))
+        assert obs.exit_code == 0
+    finally:
+        _close_test_runtime(runtime)
+
+
 def test_failed_cmd(temp_dir, runtime_cls):
     runtime, config = _load_runtime(temp_dir, runtime_cls)
     try:
@@ -794,6 +861,26 @@ def test_copy_from_directory(temp_dir, runtime_cls):
         _close_test_runtime(runtime)
 
 
+def test_copy_from_with_compresslevel(temp_dir, runtime_cls):
+    runtime, config = _load_runtime(temp_dir, runtime_cls)
+    sandbox_dir = config.workspace_mount_path_in_sandbox
+    try:
+        obs = _run_cmd_action(
+            runtime,
+            f'mkdir -p {sandbox_dir}/text && seq 10000 > {sandbox_dir}/text/numbers.txt',
+        )
+        assert obs.exit_code == 0
+
+        result = runtime.copy_from(f'{sandbox_dir}/text', compresslevel=9)
+        with zipfile.ZipFile(result) as zip_file:
+            (info,) = zip_file.infolist()
+            assert info.compress_type == zipfile.ZIP_DEFLATED
+            assert info.compress_size < info.file_size
+        result.unlink()
+    finally:
+        _close_test_runtime(runtime)
+
+
 @pytest.mark.skipif(
     is_windows(), reason='Test uses Linux-specific file permissions and sudo commands'
 )
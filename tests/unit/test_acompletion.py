@@ -46,7 +46,7 @@ def mock_response():
 
 @contextmanager
 def _patch_http():
-    with patch('openhands.llm.llm.httpx.get', MagicMock()) as mock_http:
+    with patch('openhands.llm.model_capabilities.httpx.get', MagicMock()) as mock_http:
         mock_http.json.return_value = {
             'data': [
                 {'model_name': 'some_model'},
@@ -1,4 +1,5 @@
 import asyncio
+import threading
 from unittest.mock import ANY, AsyncMock, MagicMock, patch
 from uuid import uuid4
 
@@ -23,12 +24,14 @@ from openhands.events.action.message import SystemMessageAction
 from openhands.events.event import RecallType
 from openhands.events.observation import (
     AgentStateChangedObservation,
+    CmdOutputObservation,
     ErrorObservation,
 )
 from openhands.events.observation.agent import RecallObservation
 from openhands.events.observation.empty import NullObservation
 from openhands.events.serialization import event_to_dict
 from openhands.llm import LLM
+from openhands.llm.async_llm import AsyncLLM
 from openhands.llm.metrics import Metrics, TokenUsage
 from openhands.memory.memory import Memory
 from openhands.runtime.base import Runtime
@@ -1140,7 +1143,7 @@ async def test_action_metrics_copy(mock_agent):
     metrics.token_usages = [usage1, usage2]
 
     # Set the accumulated token usage
-    metrics._accumulated_token_usage = TokenUsage(
+    metrics.accumulated_token_usage = TokenUsage(
         model='test-model',
         prompt_tokens=15,  # 5 + 10
         completion_tokens=30,  # 10 + 20
@@ -1225,6 +1228,49 @@ async def test_action_metrics_copy(mock_agent):
     await controller.close()
 
 
+@pytest.mark.asyncio
+async def test_action_metrics_records_of_own_step(mock_agent, test_event_stream):
+    metrics = Metrics(model_name='test-model')
+    metrics.add_token_usage(1, 1, 0, 0, 0, 'before-controller')
+    mock_agent.llm.metrics = metrics
+    response_ids = iter(['step-1', 'step-2'])
+
+    def agent_step_fn(state):
+        response_id = next(response_ids)
+        metrics.add_cost(0.01)
+        metrics.add_token_usage(10, 5, 0, 0, 1000, response_id)
+        return MessageAction(content=response_id)
+
+    mock_agent.step = agent_step_fn
+    controller = AgentController(
+        agent=mock_agent,
+        event_stream=test_event_stream,
+        max_iterations=10,
+        sid='test',
+        confirmation_mode=False,
+        headless_mode=True,
+    )
+    # only step here, not again from the stream for the agent's messages
+    test_event_stream.unsubscribe(EventStreamSubscriber.AGENT_CONTROLLER, controller.id)
+    controller.state.agent_state = AgentState.RUNNING
+    await controller._step()
+    await controller._step()
+
+    actions = [
+        event
+        for event in test_event_stream.get_events()
+        if isinstance(event, MessageAction)
+    ]
+    assert [
+        [usage.response_id for usage in action.llm_metrics.token_usages]
+        for action in actions
+    ] == [['step-1'], ['step-2']]
+    assert [len(action.llm_metrics.costs) for action in actions] == [1, 1]
+    assert actions[-1].llm_metrics.accumulated_token_usage.prompt_tokens == 21
+    assert actions[-1].llm_metrics.accumulated_cost == pytest.approx(0.02)
+    await controller.close()
+
+
 @pytest.mark.asyncio
 async def test_condenser_metrics_included(mock_agent, test_event_stream):
     """Test that metrics from the condenser's LLM are included in the action metrics."""
@@ -1232,7 +1278,7 @@ async def test_condenser_metrics_included(mock_agent, test_event_stream):
     # Set up agent metrics
     agent_metrics = Metrics(model_name='agent-model')
     agent_metrics.accumulated_cost = 0.05
-    agent_metrics._accumulated_token_usage = TokenUsage(
+    agent_metrics.accumulated_token_usage = TokenUsage(
         model='agent-model',
         prompt_tokens=100,
         completion_tokens=50,
@@ -1248,7 +1294,7 @@ async def test_condenser_metrics_included(mock_agent, test_event_stream):
     condenser.llm = MagicMock(spec=LLM)
     condenser_metrics = Metrics(model_name='condenser-model')
     condenser_metrics.accumulated_cost = 0.03
-    condenser_metrics._accumulated_token_usage = TokenUsage(
+    condenser_metrics.accumulated_token_usage = TokenUsage(
         model='condenser-model',
         prompt_tokens=200,
         completion_tokens=100,
@@ -1580,3 +1626,184 @@ async def test_openrouter_context_window_exceeded_error(
     )
 
     await controller.close()
+
+
+class _AsyncStepAgent(Agent):
+    def __init__(self, llm):
+        super().__init__(llm=llm, config=AgentConfig())
+        self.step_calls = 0
+        self.astep_calls = 0
+        self.astep_started = asyncio.Event()
+        # set from whichever thread runs the step
+        self.astep_running = threading.Event()
+        self.astep_cancelled = False
+        self.block_astep = False
+
+    def step(self, state: State):
+        self.step_calls += 1
+        return MessageAction(content='from step')
+
+    async def astep(self, state: State):
+        self.astep_calls += 1
+        self.astep_started.set()
+        self.astep_running.set()
+        if self.block_astep:
+            try:
+                # bounded, so that a step that is never cancelled fails the test
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.astep_cancelled = True
+                raise
+        return MessageAction(content='from astep')
+
+
+def _async_step_agent(llm_spec) -> _AsyncStepAgent:
+    llm = MagicMock(spec=llm_spec)
+    llm.metrics = Metrics()
+    llm.config = OpenHandsConfig().get_llm_config()
+    return _AsyncStepAgent(llm)
+
+
+def _added_messages(event_stream) -> list[str]:
+    return [
+        call.args[0].content
+        for call in event_stream.add_event.call_args_list
+        if type(call.args[0]) is MessageAction
+    ]
+
+
+@pytest.mark.asyncio
+async def test_step_prefers_astep_with_async_llm(mock_event_stream):
+    agent = _async_step_agent(AsyncLLM)
+    controller = AgentController(
+        agent=agent,
+        event_stream=mock_event_stream,
+        max_iterations=10,
+        sid='test',
+        confirmation_mode=False,
+        headless_mode=True,
+    )
+    controller.state.agent_state = AgentState.RUNNING
+
+    await controller._step()
+
+    assert agent.astep_calls == 1
+    assert agent.step_calls == 0
+    assert _added_messages(mock_event_stream) == ['from astep']
+    await controller.close()
+
+
+@pytest.mark.asyncio
+async def test_step_falls_back_to_sync_step(mock_event_stream):
+    agent = _async_step_agent(LLM)
+    controller = AgentController(
+        agent=agent,
+        event_stream=mock_event_stream,
+        max_iterations=10,
+        sid='test',
+        confirmation_mode=False,
+        headless_mode=True,
+    )
+    controller.state.agent_state = AgentState.RUNNING
+
+    await controller._step()
+
+    assert agent.astep_calls == 0
+    assert agent.step_calls == 1
+    assert _added_messages(mock_event_stream) == ['from step']
+    await controller.close()
+
+
+class _SyncStepAgent(Agent):
+    def __init__(self, llm):
+        super().__init__(llm=llm, config=AgentConfig())
+        self.step_threads: list[threading.Thread] = []
+
+    def step(self, state: State):
+        self.step_threads.append(threading.current_thread())
+        return MessageAction(content='from step')
+
+
+@pytest.mark.asyncio
+async def test_default_astep_runs_step_in_worker_thread(mock_event_stream):
+    llm = _async_step_agent(AsyncLLM).llm
+    agent = _SyncStepAgent(llm)
+    controller = AgentController(
+        agent=agent,
+        event_stream=mock_event_stream,
+        max_iterations=10,
+        sid='test',
+        confirmation_mode=False,
+        headless_mode=True,
+    )
+    controller.state.agent_state = AgentState.RUNNING
+
+    await controller._step()
+
+    assert len(agent.step_threads) == 1
+    assert agent.step_threads[0] is not threading.current_thread()
+    assert _added_messages(mock_event_stream) == ['from step']
+    await controller.close()
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_running_astep(mock_event_stream):
+    agent = _async_step_agent(AsyncLLM)
+    agent.block_astep = True
+    controller = AgentController(
+        agent=agent,
+        event_stream=mock_event_stream,
+        max_iterations=10,
+        sid='test',
+        confirmation_mode=False,
+        headless_mode=True,
+    )
+    controller.state.agent_state = AgentState.RUNNING
+
+    step_task = asyncio.create_task(controller._step())
+    await asyncio.wait_for(agent.astep_started.wait(), timeout=5)
+    await controller.set_agent_state_to(AgentState.STOPPED)
+    await asyncio.wait_for(step_task, timeout=5)
+
+    assert agent.astep_cancelled
+    assert _added_messages(mock_event_stream) == []
+    assert controller.get_agent_state() == AgentState.STOPPED
+    await controller.close()
+
+
+@pytest.mark.asyncio
+async def test_stop_through_event_stream_cancels_running_astep(test_event_stream):
+    agent = _async_step_agent(AsyncLLM)
+    agent.block_astep = True
+    controller = AgentController(
+        agent=agent,
+        event_stream=test_event_stream,
+        max_iterations=10,
+        sid='test',
+        confirmation_mode=False,
+        headless_mode=True,
+    )
+    controller.state.agent_state = AgentState.RUNNING
+
+    # The step runs on the controller's callback thread, which the stop request
+    # then has to wait behind
+    test_event_stream.add_event(
+        CmdOutputObservation(content='', command='ls', exit_code=0),
+        EventSource.ENVIRONMENT,
+    )
+    assert await asyncio.to_thread(agent.astep_running.wait, 5)
+    test_event_stream.add_event(
+        ChangeAgentStateAction(AgentState.STOPPED), EventSource.USER
+    )
+
+    for _ in range(500):
+        if controller.get_agent_state() == AgentState.STOPPED:
+            break
+        await asyncio.sleep(0.01)
+    assert agent.astep_cancelled
+    assert controller.get_agent_state() == AgentState.STOPPED
+    assert not any(
+        isinstance(event, MessageAction) and event.content == 'from astep'
+        for event in test_event_stream.get_events()
+    )
+    await controller.close()
@@ -1,5 +1,6 @@
+import threading
 from typing import Union
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 from litellm import ChatCompletionMessageToolCall
@@ -42,6 +43,7 @@ from openhands.events.observation.commands import (
     CmdOutputObservation,
 )
 from openhands.events.tool import ToolCallMetadata
+from openhands.llm.async_llm import AsyncLLM
 from openhands.llm.llm import LLM
 from openhands.memory.condenser import View
 
@@ -274,6 +276,51 @@ def test_step_with_no_pending_actions(mock_state: State):
     assert action.content == 'Task completed'
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('agent_class', [CodeActAgent, ReadOnlyAgent])
+async def test_astep_awaits_async_completion(agent_class, mock_state: State):
+    mock_response = Mock()
+    mock_response.id = 'mock_id'
+    mock_response.total_calls_in_response = 1
+    mock_response.choices = [Mock()]
+    mock_response.choices[0].message = Mock()
+    mock_response.choices[0].message.content = 'Task completed'
+    mock_response.choices[0].message.tool_calls = []
+
+    llm = Mock(spec=AsyncLLM)
+    llm.config = Mock()
+    llm.config.model = 'mock_model'
+    llm.completion = Mock(side_effect=AssertionError('astep must not block'))
+    llm.async_completion = AsyncMock(return_value=mock_response)
+    llm.is_function_calling_active = Mock(return_value=True)
+    llm.is_caching_prompt_active = Mock(return_value=False)
+
+    config = AgentConfig()
+    config.enable_prompt_extensions = False
+    agent = agent_class(llm=llm, config=config)
+
+    initial_user_message = MessageAction(content='Initial user message')
+    initial_user_message._source = EventSource.USER
+    mock_state.history = [initial_user_message]
+
+    # The condenser may call the LLM synchronously, so preparing runs off the loop
+    prepare_step = agent._prepare_step
+    prepare_threads = []
+
+    def prepare_step_recording_thread(state):
+        prepare_threads.append(threading.current_thread())
+        return prepare_step(state)
+
+    agent._prepare_step = prepare_step_recording_thread
+
+    action = await agent.astep(mock_state)
+    assert isinstance(action, MessageAction)
+    assert action.content == 'Task completed'
+    assert prepare_threads and prepare_threads[0] is not threading.current_thread()
+    llm.async_completion.assert_awaited_once()
+    assert 'messages' in llm.async_completion.call_args.kwargs
+
+
 @pytest.mark.parametrize('agent_type', ['CodeActAgent', 'ReadOnlyAgent'])
 def test_correct_tool_description_loaded_based_on_model_name(
     agent_type, mock_state: State
@@ -0,0 +1,49 @@
+import io
+import os
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+
+from openhands.runtime.utils.archive import ZipStream
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'src').mkdir(parents=True)
+    (root / 'README.md').write_text('hello\n' * 1000)
+    (root / 'src' / 'logo.png').write_bytes(os.urandom(5000))
+    return root
+
+
+@pytest.mark.parametrize(
+    'compresslevel, readme_compression',
+    [(None, ZIP_STORED), (0, ZIP_STORED), (6, ZIP_DEFLATED)],
+)
+def test_zip_stream_stores_compressed_files(project, compresslevel, readme_compression):
+    data = b''.join(ZipStream(str(project), compresslevel=compresslevel))
+
+    with ZipFile(io.BytesIO(data)) as zipf:
+        assert zipf.testzip() is None
+        entries = {info.filename: info.compress_type for info in zipf.infolist()}
+        assert zipf.read('README.md') == (project / 'README.md').read_bytes()
+    assert entries == {'README.md': readme_compression, 'src/logo.png': ZIP_STORED}
+
+
+def test_zip_stream_can_be_read_again_from_the_start(project):
+    stream = ZipStream(str(project), arcname_base=str(project.parent))
+    first = stream.read(10)
+    assert stream.seek(0) == 0
+    data = stream.read()
+    stream.close()
+
+    assert data.startswith(first)
+    with ZipFile(io.BytesIO(data)) as zipf:
+        assert sorted(zipf.namelist()) == ['project/README.md', 'project/src/logo.png']
+    with pytest.raises(io.UnsupportedOperation):
+        stream.seek(10)
+
+
+def test_zip_stream_rejects_invalid_compression_level(project):
+    with pytest.raises(ValueError):
+        ZipStream(str(project), compresslevel=10)
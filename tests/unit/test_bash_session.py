@@ -1,10 +1,15 @@
 import os
+import pwd
+import shutil
+import subprocess
 import tempfile
 import time
 
+import pytest
+
 from openhands.core.logger import openhands_logger as logger
 from openhands.events.action import CmdRunAction
-from openhands.runtime.utils.bash import BashCommandStatus, BashSession
+from openhands.runtime.utils.bash import BashCommandStatus, BashSession, _PromptFifo
 from openhands.runtime.utils.bash_constants import TIMEOUT_MESSAGE_TEMPLATE
 
 
@@ -45,6 +50,122 @@ def test_cwd_property(tmp_path):
     session.close()
 
 
+def test_output_log_only_keeps_current_command(tmp_path):
+    session = BashSession(work_dir=tmp_path)
+    session.initialize()
+    log_path = session._output_log.path
+
+    obs = session.execute(CmdRunAction('seq 1 1000'))
+    assert obs.content.splitlines()[-1] == '1000'
+    # The output of completed commands is dropped from the log
+    assert os.path.getsize(log_path) < 1000
+
+    session.close()
+    assert not os.path.exists(log_path)
+
+
+def test_output_log_survives_deletion(tmp_path):
+    session = BashSession(work_dir=tmp_path)
+    session.initialize()
+
+    obs = session.execute(CmdRunAction(f'rm {session._output_log.path}'))
+    assert obs.metadata.exit_code == 0
+    obs = session.execute(CmdRunAction('echo still here'))
+    assert obs.content == 'still here'
+    assert obs.metadata.exit_code == 0
+
+    session.close()
+
+
+def test_output_log_is_capped(tmp_path):
+    session = BashSession(work_dir=tmp_path)
+    session.initialize()
+    session._output_log.MAX_SIZE = 64 * 1024
+
+    # Prints 2 MB, then the size of the log before the command completes
+    print_output = 'head -c 100000 /dev/zero | tr "\\0" x; sleep 0.1'
+    obs = session.execute(
+        CmdRunAction(
+            f'for i in $(seq 20); do {print_output}; done; '
+            f'echo; echo log size $(stat -c %s {session._output_log.path})'
+        )
+    )
+    assert obs.metadata.exit_code == 0
+    # How much is left depends on how often the log is polled
+    log_size = int(obs.content.split()[-1])
+    assert log_size < 1_000_000
+
+    session.close()
+
+
+def test_command_completion_does_not_wait_for_poll(tmp_path):
+    session = BashSession(work_dir=tmp_path)
+    session.initialize()
+    session.POLL_INTERVAL = 5
+    fifo_path = session._prompt_fifo.path
+
+    start_time = time.time()
+    obs = session.execute(CmdRunAction('echo done'))
+    assert obs.content == 'done'
+    assert time.time() - start_time < session.POLL_INTERVAL
+
+    session.close()
+    assert not os.path.exists(fifo_path)
+
+
+def _has_user(username):
+    try:
+        pwd.getpwnam(username)
+    except KeyError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(
+    os.geteuid() != 0 or shutil.which('setpriv') is None,
+    reason='needs root to run the prompt hook as another user',
+)
+def test_prompt_fifo_is_usable_by_other_users():
+    fifo = _PromptFifo()
+    try:
+        result = subprocess.run(
+            [
+                'setpriv',
+                '--reuid=65534',
+                '--regid=65534',
+                '--clear-groups',
+                'bash',
+                '-c',
+                fifo.notify_command,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        assert (result.returncode, result.stderr) == (0, '')
+        assert fifo.wait(1)
+    finally:
+        fifo.close()
+
+
+@pytest.mark.skipif(
+    os.geteuid() != 0 or not _has_user('openhands'),
+    reason='needs root and an openhands user',
+)
+def test_command_completion_as_openhands_user(tmp_path):
+    os.chmod(tmp_path, 0o777)
+    session = BashSession(work_dir=str(tmp_path), username='openhands')
+    session.initialize()
+    session.POLL_INTERVAL = 5
+
+    start_time = time.time()
+    obs = session.execute(CmdRunAction('echo done'))
+    assert obs.content == 'done'
+    assert time.time() - start_time < session.POLL_INTERVAL
+
+    session.close()
+
+
 def test_basic_command():
     session = BashSession(work_dir=os.getcwd())
     session.initialize()
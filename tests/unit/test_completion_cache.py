@@ -0,0 +1,170 @@
+import os
+from unittest.mock import patch
+
+import pytest
+from litellm import ModelResponse, ModelResponseStream
+
+from openhands.core.config import LLMConfig
+from openhands.core.exceptions import LLMCompletionCacheMissError
+from openhands.llm.async_llm import AsyncLLM
+from openhands.llm.completion_cache import CompletionCache, get_completion_cache
+from openhands.llm.llm import LLM
+from openhands.llm.streaming_llm import StreamingLLM
+
+MESSAGES = [{'role': 'user', 'content': 'Hello!'}]
+
+
+@pytest.fixture
+def cache_config(tmp_path):
+    return LLMConfig(
+        model='gpt-4o',
+        api_key='test_key',
+        num_retries=1,
+        cache_completions=True,
+        cache_completions_folder=str(tmp_path / 'completions'),
+    )
+
+
+def _response(content: str = 'Hi there!') -> ModelResponse:
+    return ModelResponse(
+        id='response-1',
+        choices=[{'message': {'role': 'assistant', 'content': content}}],
+        usage={'prompt_tokens': 10, 'completion_tokens': 5, 'total_tokens': 15},
+    )
+
+
+def test_cache_key_ignores_credentials_and_endpoints():
+    params = {'model': 'gpt-4o', 'messages': MESSAGES, 'temperature': 0.0}
+    key = CompletionCache.make_key(params)
+
+    assert key == CompletionCache.make_key(
+        {**params, 'api_key': 'other', 'base_url': 'http://proxy', 'timeout': 30}
+    )
+    assert key == CompletionCache.make_key(dict(reversed(params.items())))
+    assert key != CompletionCache.make_key({**params, 'temperature': 0.5})
+    assert key != CompletionCache.make_key(
+        {**params, 'messages': [{'role': 'user', 'content': 'Bye!'}]}
+    )
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = CompletionCache(str(tmp_path), max_bytes=250)
+    value = {'content': 'x' * 90}
+    cache.put('first', value)
+    cache.put('second', value)
+    os.utime(tmp_path / 'first.json', (0, 0))
+    os.utime(tmp_path / 'second.json', (1, 1))
+    # reading the first entry makes the second one the least recently used
+    assert cache.get('first') == value
+
+    cache.put('third', value)
+
+    assert cache.get('first') == value
+    assert cache.get('second') is None
+    assert cache.get('third') == value
+
+
+def test_cache_treats_corrupt_entries_as_misses(tmp_path):
+    cache = CompletionCache(str(tmp_path), max_bytes=1024)
+    (tmp_path / 'broken.json').write_text('{"not json')
+
+    assert cache.get('broken') is None
+    assert cache.get('missing') is None
+
+
+def test_caches_are_shared_by_folder(tmp_path):
+    assert get_completion_cache(str(tmp_path), 1024) is get_completion_cache(
+        str(tmp_path / '.'), 1024
+    )
+
+
+@patch('openhands.llm.llm.litellm_completion')
+def test_completion_is_cached(mock_litellm_completion, cache_config):
+    mock_litellm_completion.return_value = _response()
+    llm = LLM(cache_config)
+
+    first = llm.completion(messages=MESSAGES)
+    cost_after_miss = llm.metrics.accumulated_cost
+    second = LLM(cache_config).completion(messages=MESSAGES)
+    llm.completion(messages=MESSAGES)
+
+    mock_litellm_completion.assert_called_once()
+    assert first.choices[0].message.content == 'Hi there!'
+    assert second.choices[0].message.content == 'Hi there!'
+    assert second.id == first.id
+    assert llm.metrics.completion_cache_misses == 1
+    assert llm.metrics.completion_cache_hits == 1
+    # cached responses are free, but still count their tokens
+    assert llm.metrics.accumulated_cost == cost_after_miss
+    assert len(llm.metrics.token_usages) == 2
+
+
+@patch('openhands.llm.llm.litellm_completion')
+def test_completion_cache_disabled_by_default(mock_litellm_completion, tmp_path):
+    mock_litellm_completion.return_value = _response()
+    llm = LLM(LLMConfig(model='gpt-4o', api_key='test_key'))
+
+    llm.completion(messages=MESSAGES)
+    llm.completion(messages=MESSAGES)
+
+    assert llm.completion_cache is None
+    assert mock_litellm_completion.call_count == 2
+    assert llm.metrics.completion_cache_misses == 0
+
+
+@patch('openhands.llm.llm.litellm_completion')
+def test_strict_completion_cache_fails_on_miss(mock_litellm_completion, cache_config):
+    mock_litellm_completion.return_value = _response()
+    LLM(cache_config).completion(messages=MESSAGES)
+
+    cache_config.cache_completions_strict = True
+    llm = LLM(cache_config)
+    assert llm.completion(messages=MESSAGES).choices[0].message.content == 'Hi there!'
+    with pytest.raises(LLMCompletionCacheMissError):
+        llm.completion(messages=[{'role': 'user', 'content': 'Something new'}])
+    mock_litellm_completion.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_async_completion_shares_the_cache(cache_config):
+    with patch('openhands.llm.llm.litellm_completion') as mock_litellm_completion:
+        mock_litellm_completion.return_value = _response('From the sync call')
+        LLM(cache_config).completion(messages=MESSAGES)
+
+    with patch.object(AsyncLLM, '_call_acompletion') as mock_call_acompletion:
+        llm = AsyncLLM(cache_config)
+        response = await llm.async_completion(messages=MESSAGES)
+
+    mock_call_acompletion.assert_not_called()
+    assert response.choices[0].message.content == 'From the sync call'
+    assert llm.metrics.completion_cache_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_streaming_completion_is_replayed(cache_config):
+    chunks = [
+        ModelResponseStream(id='stream-1', choices=[{'delta': {'content': text}}])
+        for text in ('Hello', ' from', ' the stream')
+    ]
+
+    async def stream(*args, **kwargs):
+        for chunk in chunks:
+            yield chunk
+
+    with patch.object(
+        StreamingLLM, '_call_acompletion', side_effect=lambda *a, **kw: stream()
+    ) as mock_call_acompletion:
+        llm = StreamingLLM(cache_config)
+        streamed = [
+            chunk['choices'][0]['delta']['content']
+            async for chunk in llm.async_streaming_completion(messages=MESSAGES)
+        ]
+        replayed = [
+            chunk['choices'][0]['delta']['content']
+            async for chunk in llm.async_streaming_completion(messages=MESSAGES)
+        ]
+
+    assert mock_call_acompletion.call_count == 1
+    assert streamed == replayed == ['Hello', ' from', ' the stream']
+    assert llm.metrics.completion_cache_misses == 1
+    assert llm.metrics.completion_cache_hits == 1
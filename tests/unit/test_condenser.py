@@ -1,3 +1,4 @@
+import threading
 from datetime import datetime
 from typing import Any, Callable, Iterable
 from unittest.mock import MagicMock
@@ -19,13 +20,19 @@ from openhands.core.config.condenser_config import (
 from openhands.core.config.llm_config import LLMConfig
 from openhands.core.message import Message, TextContent
 from openhands.core.schema.action import ActionType
+from openhands.events.action.agent import CondensationAction
 from openhands.events.event import Event, EventSource
 from openhands.events.observation import BrowserOutputObservation
 from openhands.events.observation.agent import AgentCondensationObservation
 from openhands.events.observation.observation import Observation
 from openhands.llm import LLM
 from openhands.memory.condenser import Condenser
-from openhands.memory.condenser.condenser import Condensation, RollingCondenser, View
+from openhands.memory.condenser.condenser import (
+    Condensation,
+    RollingCondenser,
+    View,
+    get_condensation_metadata,
+)
 from openhands.memory.condenser.impl import (
     AmortizedForgettingCondenser,
     BrowserOutputCondenser,
@@ -229,6 +236,20 @@ def test_observation_masking_condenser_respects_attention_window():
             assert event == condensed_event
 
 
+def test_observation_masking_condenser_masks_in_chunks():
+    """Test that ObservationMaskingCondenser keeps the masked prefix unchanged between chunks."""
+    condenser = ObservationMaskingCondenser(attention_window=2, mask_chunk_size=4)
+
+    state = State()
+    masked_sizes = []
+    for i in range(14):
+        state.history.append(Observation(f'Observation {i}'))
+        view = condenser.condensed_history(state)
+        masked_sizes.append(sum('<MASKED>' in str(event) for event in view))
+
+    assert masked_sizes == [0] * 5 + [4] * 4 + [8] * 4 + [12]
+
+
 def test_browser_output_condenser_from_config():
     """Test that BrowserOutputCondenser objects can be made from config."""
     attention_window = 5
@@ -412,6 +433,82 @@ def test_llm_summarizing_condenser_keeps_first_and_summary_events(mock_llm):
             assert isinstance(view[keep_first], AgentCondensationObservation)
 
 
+def test_llm_summarizing_condenser_condenses_in_background(mock_llm):
+    """Test that a condensation started ahead of the limit is returned once it is ready."""
+    max_size = 10
+    condenser = LLMSummarizingCondenser(
+        max_size=max_size, llm=mock_llm, background_threshold=0.8
+    )
+    assert condenser.background_size == 8
+    mock_llm.set_mock_response_content('Summary of forgotten events')
+
+    state = State()
+    results = []
+    for i in range(max_size):
+        state.history.append(create_test_event(f'Event {i}', id=i))
+        if condenser._background_condensation is not None:
+            condenser._background_condensation.result()
+        results.append(condenser.condensed_history(state))
+
+    # The view of 8 events starts the condensation, the next step returns it
+    assert all(isinstance(result, View) for result in results[:8])
+    assert isinstance(results[8], Condensation)
+    assert mock_llm.completion.call_count == 1
+    # Metadata recorded in the background lands in the step of the condensation
+    assert get_condensation_metadata(state) == [
+        {
+            'response': mock_llm.completion.return_value.model_dump.return_value,
+            'metrics': mock_llm.metrics.get.return_value,
+        }
+    ]
+
+    state.history.append(results[8].action)
+    assert isinstance(results[9], View)
+    assert len(condenser.condensed_history(state)) < max_size
+
+    # The same events are forgotten as by a condensation at the limit
+    sync_condenser = LLMSummarizingCondenser(max_size=max_size, llm=mock_llm)
+    sync_condensation = sync_condenser.condense(
+        View(events=[create_test_event(f'Event {i}', id=i) for i in range(11)])
+    )
+    assert isinstance(sync_condensation, Condensation)
+    assert results[8].action.forgotten == sync_condensation.action.forgotten
+
+
+def test_rolling_condenser_drops_outdated_background_condensation():
+    """Test that a background condensation is not applied to a view it was not computed from."""
+
+    class BlockedCondenser(RollingCondenser):
+        def __init__(self):
+            super().__init__(background_size=2)
+            self.released = threading.Event()
+            self.condensed_views: list[list[int]] = []
+
+        def should_condense(self, view: View) -> bool:
+            return len(view) > 3
+
+        def get_condensation(self, view: View) -> Condensation:
+            if threading.current_thread() is not threading.main_thread():
+                self.released.wait()
+            self.condensed_views.append([event.id for event in view])
+            return Condensation(
+                action=CondensationAction(forgotten_event_ids=[view[0].id])
+            )
+
+    condenser = BlockedCondenser()
+    events = [create_test_event(f'Event {i}', id=i) for i in range(4)]
+
+    assert isinstance(condenser.condense(View(events=events[:2])), View)
+    background = condenser._background_condensation
+    # The limit is reached before the background condensation is ready
+    assert isinstance(condenser.condense(View(events=events)), Condensation)
+    condenser.released.set()
+    background.result()
+
+    assert isinstance(condenser.condense(View(events=events[1:])), View)
+    assert condenser.condensed_views == [[0, 1, 2, 3], [0, 1]]
+
+
 def test_amortized_forgetting_condenser_from_config():
     """Test that AmortizedForgettingCondenser objects can be made from config."""
     max_size = 50
@@ -1581,3 +1581,94 @@ def test_process_ipython_observation_with_vision_disabled(
     message = messages[0]
     assert len(message.content) == 1
     assert isinstance(message.content[0], TextContent)
+
+
+def _history_with_ids() -> list[Event]:
+    system_message = SystemMessageAction(content='System message')
+    system_message._source = EventSource.AGENT
+    user_message = MessageAction(content='Run a command')
+    user_message._source = EventSource.USER
+    cmd_action = CmdRunAction(command='ls')
+    cmd_action._source = EventSource.AGENT
+    cmd_action.tool_call_metadata = _create_mock_tool_call_metadata(
+        'call_1', 'execute_bash', 'response_1'
+    )
+    cmd_obs = CmdOutputObservation(
+        content='file1\nfile2', command='ls', metadata=CmdOutputMetadata(exit_code=0)
+    )
+    cmd_obs._source = EventSource.AGENT
+    cmd_obs.tool_call_metadata = _create_mock_tool_call_metadata(
+        'call_1', 'execute_bash', 'response_1'
+    )
+    followup = MessageAction(content='Thanks')
+    followup._source = EventSource.USER
+    another = MessageAction(content='One more thing')
+    another._source = EventSource.USER
+    events: list[Event] = [
+        system_message,
+        user_message,
+        cmd_action,
+        cmd_obs,
+        followup,
+        another,
+    ]
+    for i, event in enumerate(events):
+        event._id = i
+    return events
+
+
+def test_process_events_reuses_converted_events(conversation_memory, agent_config):
+    events = _history_with_ids()
+    conversation_memory._process_action = Mock(
+        wraps=conversation_memory._process_action
+    )
+
+    first = conversation_memory.process_events(
+        condensed_history=events[:5],
+        initial_user_action=events[1],
+        max_message_chars=None,
+        vision_is_active=False,
+    )
+    # the agent marks the returned messages for prompt caching
+    conversation_memory.apply_prompt_caching(first)
+    assert conversation_memory._process_action.call_count == 4
+
+    second = conversation_memory.process_events(
+        condensed_history=list(events),
+        initial_user_action=events[1],
+        max_message_chars=None,
+        vision_is_active=False,
+    )
+    # only the new event was converted
+    assert conversation_memory._process_action.call_count == 5
+
+    fresh_memory = ConversationMemory(agent_config, conversation_memory.prompt_manager)
+    expected = fresh_memory.process_events(
+        condensed_history=list(events),
+        initial_user_action=events[1],
+        max_message_chars=None,
+        vision_is_active=False,
+    )
+    assert [m.model_dump() for m in second] == [m.model_dump() for m in expected]
+    assert second[-1].content[0].text == '\n\nOne more thing'
+    assert not any(
+        content.cache_prompt for message in second for content in message.content
+    )
+
+
+def test_process_events_converts_again_on_new_limits(conversation_memory):
+    events = _history_with_ids()[:4]
+
+    def tool_result(max_message_chars: int | None) -> str:
+        messages = conversation_memory.process_events(
+            condensed_history=list(events),
+            initial_user_action=events[1],
+            max_message_chars=max_message_chars,
+            vision_is_active=False,
+        )
+        assert messages[-1].role == 'tool'
+        return messages[-1].content[0].text
+
+    assert 'file2' in tool_result(None)
+    assert 'truncated' in tool_result(4)
+    assert 'file2' in tool_result(None)
@@ -1,7 +1,14 @@
+import json
+import os
+import time
+from dataclasses import asdict
+
+from openhands.events import EventSource, EventStream
 from openhands.events.action import MessageAction
 from openhands.events.observation import CmdOutputMetadata, CmdOutputObservation
 from openhands.events.serialization import event_from_dict, event_to_dict
 from openhands.llm.metrics import Cost, Metrics, ResponseLatency, TokenUsage
+from openhands.storage.memory import InMemoryFileStore
 
 
 def test_command_output_success_serialization():
@@ -60,7 +67,7 @@ def test_metrics_full_serialization():
 
     # Add a cost
     cost = Cost(model='test-model', cost=0.02)
-    metrics._costs.append(cost)
+    metrics.costs.append(cost)
 
     # Add a response latency
     latency = ResponseLatency(model='test-model', latency=0.5, response_id='test-id')
@@ -121,3 +128,83 @@ def test_metrics_none_serialization():
     # Test deserialization
     deserialized = event_from_dict(serialized)
     assert deserialized.llm_metrics is None
+
+
+def test_metrics_round_trip_through_event_stream():
+    event_stream = EventStream(sid='test', file_store=InMemoryFileStore({}))
+    metrics = Metrics(model_name='gpt-4o')
+    metrics.add_cost(0.02)
+    metrics.add_response_latency(0.5, 'response-1')
+    metrics.add_token_usage(10, 5, 2, 1, 1000, 'response-1')
+    metrics.accumulated_token_usage = TokenUsage(
+        model='gpt-4o', prompt_tokens=30, completion_tokens=15, response_id='total'
+    )
+    action = MessageAction(content='Hello, world!')
+    action.llm_metrics = metrics
+    event_stream.add_event(action, EventSource.AGENT)
+
+    stored = event_stream.get_event(action.id)
+    assert stored.llm_metrics.get() == metrics.get()
+    usage = stored.llm_metrics.accumulated_token_usage
+    assert (usage.model, usage.response_id) == ('gpt-4o', 'total')
+    assert stored.llm_metrics.token_usages[0].response_id == 'response-1'
+
+
+TRAJECTORY_FILE = os.path.join(
+    os.path.dirname(__file__), '..', 'runtime', 'trajs', 'basic_gui_mode.json'
+)
+
+
+def _load_trajectory() -> list:
+    with open(TRAJECTORY_FILE) as f:
+        return [event_from_dict(data) for data in json.load(f)]
+
+
+def test_event_to_dict_matches_asdict():
+    events = _load_trajectory()
+    events.append(
+        CmdOutputObservation(
+            command='ls', content='a.txt', metadata=CmdOutputMetadata(exit_code=0)
+        )
+    )
+    for event in events:
+        serialized = event_to_dict(event)
+        props = asdict(event)
+        if 'args' in serialized:
+            assert list(serialized['args']) == [
+                k
+                for k in props
+                if k != 'action' and not (k == 'security_risk' and props[k] is None)
+            ]
+            assert serialized['args'] == {k: props[k] for k in serialized['args']}
+        else:
+            assert serialized['content'] == props['content']
+            assert list(serialized['extras']) == [
+                k for k in props if k not in ('observation', 'content')
+            ]
+
+
+def test_event_serialization_performance():
+    """Benchmark serializing a recorded trajectory."""
+    events = _load_trajectory()
+    serialized = [event_to_dict(event) for event in events]
+
+    num_iterations = 100
+    start_time = time.time()
+    for _ in range(num_iterations):
+        for event in events:
+            event_to_dict(event)
+    to_dict_time = time.time() - start_time
+
+    start_time = time.time()
+    for _ in range(num_iterations):
+        for data in serialized:
+            event_from_dict(data)
+    from_dict_time = time.time() - start_time
+
+    num_events = num_iterations * len(events)
+    print(
+        f'event_to_dict: {to_dict_time / num_events * 1e6:.1f}us, '
+        f'event_from_dict: {from_dict_time / num_events * 1e6:.1f}us per event'
+    )
+    assert [event_to_dict(event) for event in events] == serialized
@@ -1,6 +1,8 @@
+import copy
 import gc
 import json
 import os
+import threading
 import time
 
 import psutil
@@ -10,6 +12,7 @@ from pytest import TempPathFactory
 from openhands.core.schema import ActionType, ObservationType
 from openhands.events import EventSource, EventStream, EventStreamSubscriber
 from openhands.events.action import (
+    CmdRunAction,
     NullAction,
 )
 from openhands.events.action.files import (
@@ -18,19 +21,35 @@ from openhands.events.action.files import (
     FileWriteAction,
 )
 from openhands.events.action.message import MessageAction
-from openhands.events.event import FileEditSource, FileReadSource
-from openhands.events.event_filter import EventFilter
+from openhands.events.event import Event, FileEditSource, FileReadSource
+from openhands.events.event_dispatcher import AsyncEventDispatcher, EventDispatchMode
+from openhands.events.event_filter import EventColumns, EventFilter
+from openhands.events.event_log_migration import migrate_conversation
+from openhands.events.event_lru_cache import EVENT_LRU_CACHE, EventLRUCache
+from openhands.events.event_search_index import (
+    MAX_INDEXED_TEXT_LENGTH,
+    EventIndexEntry,
+    EventSearchIndex,
+)
+from openhands.events.event_store import EventLogFormat, EventStore
+from openhands.events.group_commit_writer import GroupCommitWriter
 from openhands.events.observation import NullObservation
 from openhands.events.observation.files import (
     FileEditObservation,
     FileReadObservation,
     FileWriteObservation,
 )
+from openhands.events.secret_redactor import SECRET_PLACEHOLDER, SecretRedactor
 from openhands.events.serialization.event import event_to_dict
 from openhands.storage import get_file_store
 from openhands.storage.locations import (
     get_conversation_event_filename,
+    get_conversation_event_index_dir,
+    get_conversation_event_log_dir,
+    get_conversation_event_manifest_filename,
+    get_conversation_events_dir,
 )
+from openhands.storage.memory import InMemoryFileStore
 
 
 @pytest.fixture
@@ -176,6 +195,7 @@ def test_get_matching_events_source_filter(temp_dir: str):
         event_stream._get_filename_for_id(event.id, event_stream.user_id),
         json.dumps(data),
     )
+    EVENT_LRU_CACHE.invalidate(event_stream.user_id, event_stream.sid)
 
     # Verify that source comparison works correctly
     assert EventFilter(source='agent').exclude(event)
@@ -582,7 +602,12 @@ def test_search_events_limit_edge_cases(temp_dir: str):
     assert len(events) == 0
 
 
-def test_callback_dictionary_modification(temp_dir: str):
+@pytest.mark.parametrize(
+    'dispatch_mode', [EventDispatchMode.THREADS, EventDispatchMode.ASYNCIO]
+)
+def test_callback_dictionary_modification(
+    temp_dir: str, dispatch_mode: EventDispatchMode
+):
     """Test that the event stream can handle dictionary modification during iteration.
 
     This test verifies that the fix for the 'dictionary changed size during iteration' error works.
@@ -590,7 +615,7 @@ def test_callback_dictionary_modification(temp_dir: str):
     without the fix.
     """
     file_store = get_file_store('local', temp_dir)
-    event_stream = EventStream('callback_test', file_store)
+    event_stream = EventStream('callback_test', file_store, dispatch_mode=dispatch_mode)
 
     # Track callback execution
     callback_executed = [False, False, False]
@@ -735,3 +760,808 @@ def test_cache_page_with_missing_events(temp_dir: str):
         # If the delete operation fails, we'll just verify that the basic functionality works
         print(f'Note: Could not delete file {missing_filename}: {e}')
         assert len(initial_events) > 0, 'Should retrieve events successfully'
+
+
+def test_segmented_log_storage(temp_dir: str):
+    """Test that the segmented log writes one JSONL segment per page of events."""
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream(
+        'segments', file_store, log_format=EventLogFormat.SEGMENTS
+    )
+    for i in range(30):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+
+    log_files = sorted(file_store.list(get_conversation_event_log_dir('segments')))
+    assert [f.split('/')[-1] for f in log_files] == [
+        '0-25.idx',
+        '0-25.jsonl',
+        '25-50.jsonl',
+    ]
+    lines = file_store.read(log_files[1]).splitlines()
+    assert len(lines) == 25
+    assert json.loads(lines[3])['content'] == 'test3'
+    with pytest.raises(FileNotFoundError):
+        file_store.read(get_conversation_event_filename('segments', 0))
+
+
+def test_segmented_log_reads(temp_dir: str):
+    """Test that a reopened segmented log supports every read path."""
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream(
+        'segments', file_store, log_format=EventLogFormat.SEGMENTS
+    )
+    for i in range(30):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+
+    # The format is detected from the files, whatever the preferred format is
+    store = EventStore('segments', file_store, None)
+    assert store.log_format == EventLogFormat.SEGMENTS
+    assert store.cur_id == 30
+    assert store.get_event(7).content == 'test7'  # Sealed segment, via the index
+    assert store.get_event(27).content == 'test27'  # Open segment
+    assert store.get_latest_event().content == 'test29'
+    with pytest.raises(FileNotFoundError):
+        store.get_event(30)
+
+    events = list(store.search_events(start_id=20, end_id=27))
+    assert [e.content for e in events] == [f'test{i}' for i in range(20, 28)]
+    events = list(store.search_events(reverse=True, limit=3))
+    assert [e.content for e in events] == ['test29', 'test28', 'test27']
+
+
+def test_segmented_log_resume(temp_dir: str):
+    """Test that a new stream continues the open segment of an existing log."""
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream(
+        'segments', file_store, log_format=EventLogFormat.SEGMENTS
+    )
+    for i in range(20):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+
+    resumed_stream = EventStream('segments', file_store)
+    assert resumed_stream.log_format == EventLogFormat.SEGMENTS
+    for i in range(20, 60):
+        resumed_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+
+    events = collect_events(EventStream('segments', file_store))
+    assert [e.id for e in events] == list(range(60))
+    assert [e.content for e in events] == [f'test{i}' for i in range(60)]
+
+
+def test_segmented_log_appends_events():
+    """Test that each event is appended to its segment instead of rewriting it."""
+    file_store = _CountingFileStore()
+    event_stream = EventStream(
+        'segments', file_store, log_format=EventLogFormat.SEGMENTS
+    )
+    for i in range(30):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+
+    # The first event of each segment creates it
+    assert file_store.num_appends == 28
+    events = collect_events(EventStream('segments', file_store))
+    assert [e.content for e in events] == [f'test{i}' for i in range(30)]
+
+
+def test_segmented_log_resume_after_partial_line(temp_dir: str):
+    """Test that a line cut short in the open segment is dropped on resume."""
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream(
+        'segments', file_store, log_format=EventLogFormat.SEGMENTS
+    )
+    for i in range(3):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    filename = get_conversation_event_log_dir('segments') + '0-25.jsonl'
+    file_store.append(filename, '{"id": 3, "cont')
+
+    resumed_stream = EventStream('segments', file_store)
+    assert resumed_stream.cur_id == 3
+    resumed_stream.add_event(NullObservation('test3'), EventSource.AGENT)
+    events = collect_events(EventStream('segments', file_store))
+    assert [e.content for e in events] == [f'test{i}' for i in range(4)]
+
+
+def test_legacy_log_stays_legacy(temp_dir: str):
+    """Test that existing per-file conversations are not mixed with segments."""
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream('legacy', file_store)
+    event_stream.add_event(NullObservation('obs1'), EventSource.AGENT)
+
+    stream2 = EventStream('legacy', file_store, log_format=EventLogFormat.SEGMENTS)
+    assert stream2.log_format == EventLogFormat.FILES
+    stream2.add_event(NullObservation('obs2'), EventSource.AGENT)
+    assert file_store.read(get_conversation_event_filename('legacy', 1))
+    assert [e.content for e in collect_events(stream2)] == ['obs1', 'obs2']
+
+
+def test_migrate_conversation(temp_dir: str):
+    """Test converting a per-file conversation into the segmented log."""
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream('migrate', file_store)
+    for i in range(40):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    event_stream.close()
+    file_store.delete(get_conversation_event_filename('migrate', 30))
+
+    assert migrate_conversation(file_store, 'migrate', delete_legacy=True) == 39
+    with pytest.raises(FileNotFoundError):
+        file_store.read(get_conversation_event_filename('migrate', 0))
+
+    store = EventStore('migrate', file_store, None)
+    assert store.log_format == EventLogFormat.SEGMENTS
+    assert store.cur_id == 40
+    with pytest.raises(FileNotFoundError):
+        store.get_event(30)
+    events = list(store.search_events())
+    assert [e.id for e in events] == [i for i in range(40) if i != 30]
+
+    # Migrating again is a no-op
+    assert migrate_conversation(file_store, 'migrate') == 0
+
+
+class _CountingFileStore(InMemoryFileStore):
+    def __init__(self):
+        super().__init__()
+        self.num_lists = 0
+        self.num_writes = 0
+        self.num_appends = 0
+        self.num_reads = 0
+
+    def write(self, path: str, contents: str | bytes) -> None:
+        self.num_writes += 1
+        super().write(path, contents)
+
+    def append(self, path: str, contents: str) -> None:
+        self.num_appends += 1
+        super().append(path, contents)
+
+    def read(self, path: str) -> str:
+        self.num_reads += 1
+        return super().read(path)
+
+    def list(self, path: str) -> list[str]:
+        self.num_lists += 1
+        return super().list(path)
+
+
+@pytest.mark.parametrize('log_format', list(EventLogFormat))
+def test_manifest_avoids_listing(log_format: EventLogFormat):
+    """Test that opening a store with an up to date manifest does not list events."""
+    file_store = _CountingFileStore()
+    event_stream = EventStream('manifest', file_store, log_format=log_format)
+    for i in range(30):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    event_stream.close()
+
+    manifest = json.loads(
+        file_store.read(get_conversation_event_manifest_filename('manifest'))
+    )
+    assert manifest['cur_id'] == 30
+    assert manifest['log_format'] == log_format.value
+
+    file_store.num_lists = 0
+    store = EventStore('manifest', file_store, None)
+    assert file_store.num_lists == 0
+    assert store.cur_id == 30
+    assert store.log_format == log_format
+    assert [e.content for e in store.search_events(start_id=28)] == [
+        'test28',
+        'test29',
+    ]
+
+
+@pytest.mark.parametrize('log_format', list(EventLogFormat))
+def test_manifest_behind_writer(log_format: EventLogFormat):
+    """Test that events written after the manifest was last updated are found with few requests."""
+    file_store = _CountingFileStore()
+    event_stream = EventStream('manifest', file_store, log_format=log_format)
+    for i in range(30):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+
+    # The writer is still running: the manifest is updated with each write
+    file_store.num_lists = 0
+    file_store.num_reads = 0
+    store = EventStore('manifest', file_store, None)
+    assert file_store.num_lists == 0
+    if log_format == EventLogFormat.FILES:
+        # The manifest, then the missing event past it
+        assert file_store.num_reads == 2
+    assert store.cur_id == 30
+    assert store.get_latest_event().content == 'test29'
+
+
+def test_stale_manifest_is_caught_up():
+    """Test that events written after the manifest are found without listing them."""
+    file_store = _CountingFileStore()
+    event_stream = EventStream('manifest', file_store)
+    for i in range(30):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    file_store.write(
+        get_conversation_event_manifest_filename('manifest'),
+        json.dumps({'log_format': 'files', 'cur_id': 2, 'pages': []}),
+    )
+
+    file_store.num_lists = 0
+    store = EventStore('manifest', file_store, None)
+    assert file_store.num_lists == 0
+    assert store.cur_id == 30
+
+
+def test_manifest_records_unaligned_cache_pages():
+    """Test that cache pages written after resuming a conversation are used for reads."""
+    file_store = InMemoryFileStore()
+    event_stream = EventStream('pages', file_store)
+    for i in range(3):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    event_stream.close()
+    resumed_stream = EventStream('pages', file_store)
+    for i in range(3, 30):
+        resumed_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    resumed_stream.close()
+
+    store = EventStore('pages', file_store, None)
+    assert store._cache_page_starts == [3]
+    page = store._load_cache_page_for_index(20)
+    assert (page.start, page.end) == (3, 28)
+    assert page.get_event(20).content == 'test20'
+
+
+def test_event_lru_cache_bounded_by_bytes():
+    cache = EventLRUCache(max_bytes=100)
+    store = object()
+    for i in range(5):
+        event = NullObservation(f'test{i}')
+        event._id = i  # type: ignore [attr-defined]
+        cache.put(store, None, 'abc', event, 30)
+
+    assert cache.stats()['num_bytes'] == 90
+    assert cache.evictions == 2
+    assert cache.get(store, None, 'abc', 0) is None
+    assert cache.get(store, None, 'abc', 4).content == 'test4'
+    assert cache.get(object(), None, 'abc', 4) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.invalidate(None, 'abc')
+    assert cache.stats()['num_events'] == 0
+
+
+def test_event_lru_cache_shared_between_stores(temp_dir: str):
+    """Test that repeated reads of a conversation are served without the file store."""
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream('shared', file_store)
+    for i in range(30):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+
+    # The writer extends the cache as it appends, so readers never touch the events
+    store = EventStore('shared', file_store, None)
+    hits = EVENT_LRU_CACHE.hits
+    file_store.read = None  # type: ignore
+    events = list(store.search_events())
+    assert [e.content for e in events] == [f'test{i}' for i in range(30)]
+    assert store.get_event(3).content == 'test3'
+    assert EVENT_LRU_CACHE.hits == hits + 31
+
+    # Callers get their own copy of cached events
+    events[0].content = 'changed'
+    assert store.get_event(0).content == 'test0'
+
+
+@pytest.mark.parametrize('log_format', list(EventLogFormat))
+def test_write_behind(log_format: EventLogFormat):
+    """Test that write behind events are readable right away and stored once flushed."""
+    file_store = _CountingFileStore()
+    event_stream = EventStream(
+        'write_behind',
+        file_store,
+        log_format=log_format,
+        write_behind_interval=60,
+        write_behind_batch_size=1000,
+    )
+    for i in range(30):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    assert file_store.num_writes == 0
+    assert event_stream.get_write_metrics()['queue_depth'] == 30
+    assert event_stream.get_event(29).content == 'test29'
+
+    assert event_stream.flush(timeout=5)
+    metrics = event_stream.get_write_metrics()
+    assert metrics['queue_depth'] == 0
+    assert metrics['num_flushes'] == 1
+    assert metrics['num_written'] == 30
+    if log_format == EventLogFormat.SEGMENTS:
+        # Two segments, the offsets of the sealed one, the manifest and the
+        # search index of the sealed block
+        assert file_store.num_writes == 5
+
+    EVENT_LRU_CACHE.invalidate(None, 'write_behind')
+    store = EventStore('write_behind', file_store, None)
+    assert store.cur_id == 30
+    assert [e.content for e in store.search_events()] == [f'test{i}' for i in range(30)]
+    event_stream.close()
+
+
+def test_write_behind_close_drains_queue(temp_dir: str):
+    """Test that closing a write behind stream stores the pending events."""
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream('write_behind', file_store, write_behind_interval=60)
+    for i in range(3):
+        event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    event_stream.close()
+
+    # Events added after closing are written synchronously
+    event_stream.add_event(NullObservation('test3'), EventSource.AGENT)
+    assert len(file_store.list(get_conversation_events_dir('write_behind'))) == 4
+
+
+def test_group_commit_writer_batches_in_order():
+    batches: list[list[int]] = []
+    writer: GroupCommitWriter[int] = GroupCommitWriter(
+        batches.append, interval=60, batch_size=5
+    )
+    for i in range(12):
+        assert writer.submit(i)
+    assert writer.flush(timeout=5)
+    writer.close(timeout=5)
+    assert not writer.submit(12)
+    assert [i for batch in batches for i in batch] == list(range(12))
+    assert all(len(batch) <= 5 for batch in batches[:-1])
+    assert writer.get_metrics()['num_written'] == 12
+
+
+def test_group_commit_writer_counts_failures():
+    def write_batch(batch: list[int]) -> None:
+        raise OSError('disk full')
+
+    writer: GroupCommitWriter[int] = GroupCommitWriter(
+        write_batch, interval=60, batch_size=2, retry_delay=0
+    )
+    writer.submit(0)
+    writer.submit(1)
+    # The batch was given up on, so the items are not durable
+    assert not writer.flush(timeout=5)
+    writer.close(timeout=5)
+    metrics = writer.get_metrics()
+    assert metrics['num_failed'] == 2
+    assert metrics['num_written'] == 0
+    assert metrics['num_retries'] == 2
+    assert metrics['num_flushes'] == 1
+
+
+def test_group_commit_writer_retries_failed_batches():
+    batches: list[list[int]] = []
+
+    def write_batch(batch: list[int]) -> None:
+        if not batches:
+            batches.append([])
+            raise OSError('throttled')
+        batches.append(batch)
+
+    writer: GroupCommitWriter[int] = GroupCommitWriter(
+        write_batch, interval=60, batch_size=2, retry_delay=0
+    )
+    writer.submit(0)
+    writer.submit(1)
+    assert writer.flush(timeout=5)
+    writer.close(timeout=5)
+    assert batches == [[], [0, 1]]
+    metrics = writer.get_metrics()
+    assert metrics['num_written'] == 2
+    assert metrics['num_failed'] == 0
+    assert metrics['num_retries'] == 1
+
+
+def wait_until(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_asyncio_dispatch_delivers_in_order():
+    event_stream = EventStream(
+        'asyncio_dispatch',
+        InMemoryFileStore(),
+        dispatch_mode=EventDispatchMode.ASYNCIO,
+    )
+    received: dict[str, list[int]] = {'sync': [], 'async': [], 'failing': []}
+
+    def on_event(event):
+        received['sync'].append(event.id)
+
+    async def on_event_async(event):
+        received['async'].append(event.id)
+
+    def on_event_failing(event):
+        received['failing'].append(event.id)
+        raise RuntimeError('callback failed')
+
+    event_stream.subscribe(EventStreamSubscriber.TEST, on_event, 'sync')
+    event_stream.subscribe(EventStreamSubscriber.TEST, on_event_async, 'async')
+    event_stream.subscribe(EventStreamSubscriber.MAIN, on_event_failing, 'failing')
+    for i in range(50):
+        event_stream.add_event(NullObservation(f'obs{i}'), EventSource.AGENT)
+
+    def get_metrics():
+        return event_stream.get_dispatch_metrics()['subscribers']
+
+    assert wait_until(
+        lambda: all(
+            metrics['num_delivered'] == 50
+            for callbacks in get_metrics().values()
+            for metrics in callbacks.values()
+        )
+    )
+    assert all(ids == list(range(50)) for ids in received.values())
+    assert get_metrics()[EventStreamSubscriber.MAIN]['failing']['num_failed'] == 50
+
+    event_stream.unsubscribe(EventStreamSubscriber.TEST, 'sync')
+    event_stream.add_event(NullObservation('after'), EventSource.AGENT)
+    assert wait_until(lambda: len(received['async']) == 51)
+    assert len(received['sync']) == 50
+    event_stream.close()
+
+
+def test_asyncio_dispatch_threads_are_shared():
+    # Warm up the dispatcher, which starts its threads on first use
+    EventStream(
+        'shared', InMemoryFileStore(), dispatch_mode=EventDispatchMode.ASYNCIO
+    ).close()
+    num_threads = threading.active_count()
+    streams = []
+    for i in range(20):
+        event_stream = EventStream(
+            f'shared{i}', InMemoryFileStore(), dispatch_mode=EventDispatchMode.ASYNCIO
+        )
+        event_stream.subscribe(EventStreamSubscriber.TEST, lambda event: None, 'a')
+        event_stream.subscribe(EventStreamSubscriber.MAIN, lambda event: None, 'b')
+        event_stream.add_event(NullObservation(''), EventSource.AGENT)
+        streams.append(event_stream)
+    # Worker threads are started lazily, but there is a fixed number of them
+    assert threading.active_count() - num_threads <= 32
+    for event_stream in streams:
+        event_stream.close()
+
+
+def test_asyncio_dispatch_blocking_subscriber_does_not_hold_back_others():
+    dispatcher = AsyncEventDispatcher(num_workers=1)
+    blocked = dispatcher.open_channel(10)
+    other = dispatcher.open_channel(10)
+    release = threading.Event()
+    thread_names: list[str] = []
+    received: list[Event] = []
+
+    def on_event_blocking(event):
+        thread_names.append(threading.current_thread().name)
+        release.wait(30)
+
+    blocked.subscribe(
+        EventStreamSubscriber.AGENT_CONTROLLER,
+        'step',
+        on_event_blocking,
+        dedicated_thread=True,
+    )
+    other.subscribe(EventStreamSubscriber.TEST, 'other', received.append)
+    blocked.publish(NullObservation('step'))
+    assert wait_until(lambda: len(thread_names) == 1)
+
+    # The only shared worker is free, so the other channel is still served
+    other.publish(NullObservation('other'))
+    assert wait_until(lambda: len(received) == 1)
+    assert thread_names[0].startswith('event-dispatch-dedicated')
+
+    release.set()
+    blocked.close()
+    other.close()
+
+
+def test_asyncio_dispatch_backpressure():
+    event_stream = EventStream(
+        'backpressure',
+        InMemoryFileStore(),
+        dispatch_mode=EventDispatchMode.ASYNCIO,
+        dispatch_queue_size=2,
+    )
+    release = threading.Event()
+    slow_ids: list[int] = []
+    fast_ids: list[int] = []
+
+    def on_event_slow(event):
+        release.wait(5)
+        slow_ids.append(event.id)
+
+    event_stream.subscribe(EventStreamSubscriber.MAIN, on_event_slow, 'slow')
+    event_stream.subscribe(EventStreamSubscriber.TEST, fast_ids.append, 'fast')
+    started_at = time.monotonic()
+    for i in range(10):
+        event_stream.add_event(NullObservation(f'obs{i}'), EventSource.AGENT)
+    # Adding events never waits for subscribers
+    assert time.monotonic() - started_at < 1
+
+    def get_slow_metrics():
+        metrics = event_stream.get_dispatch_metrics()
+        return metrics['subscribers'][EventStreamSubscriber.MAIN]['slow']
+
+    assert wait_until(lambda: get_slow_metrics()['num_blocked'] >= 1)
+    assert get_slow_metrics()['max_queue_depth'] == 2
+    # Subscribers after the slow one wait for it to catch up
+    assert len(fast_ids) <= 3
+
+    release.set()
+    assert wait_until(lambda: len(fast_ids) == 10 and len(slow_ids) == 10)
+    assert [event.id for event in fast_ids] == list(range(10))
+    assert slow_ids == list(range(10))
+    assert event_stream.get_dispatch_metrics()['queue_depth'] == 0
+    event_stream.close()
+
+
+def test_secrets_are_redacted(temp_dir: str):
+    file_store = get_file_store('local', temp_dir)
+    event_stream = EventStream('secrets', file_store)
+    event_stream.set_secrets({'github_token': 'ghp_abc'})
+    event_stream.update_secrets({'custom': 'ghp_abcdef', 'empty': ''})
+    received: list = []
+    event_stream.subscribe(EventStreamSubscriber.TEST, received.append, 'test')
+    action = CmdRunAction(command='export A=ghp_abcdef B=ghp_abc')
+    event_stream.add_event(action, EventSource.USER)
+    plain_action = CmdRunAction(command='ls')
+    event_stream.add_event(plain_action, EventSource.USER)
+    assert wait_until(lambda: len(received) == 2)
+
+    data = json.loads(file_store.read(get_conversation_event_filename('secrets', 0)))
+    assert data['args']['command'] == 'export A=<secret_hidden> B=<secret_hidden>'
+    # Subscribers get a redacted copy, or the event itself if it holds no secrets
+    assert received[0] is not action
+    assert received[0].command == 'export A=<secret_hidden> B=<secret_hidden>'
+    assert received[1] is plain_action
+    event_stream.close()
+
+
+def test_secret_redactor_handles_lists_and_tuples():
+    redactor = SecretRedactor(['s3cr3t', 'tok'])
+    data = {
+        'a': ['x s3cr3t', {'b': ('tok', 1, None)}],
+        'c': 'tok' * 2000,
+    }
+    assert redactor.redact(data) == {
+        'a': ['x <secret_hidden>', {'b': ('<secret_hidden>', 1, None)}],
+        'c': '<secret_hidden>' * 2000,
+    }
+    assert SecretRedactor().redact({'a': 'tok'}) == {'a': 'tok'}
+    assert redactor.has_secrets({'a': [('x', 'tok')]})
+    assert redactor.has_secrets('x' * 5000 + 's3cr3t')
+    assert not redactor.has_secrets({'a': ['to', 'k', 1], 'b': 'x' * 5000})
+    assert not SecretRedactor().has_secrets('tok')
+
+
+@pytest.mark.parametrize('num_repeats', [1, 1000])
+def test_secret_redactor_overlapping_secrets(num_repeats: int):
+    # Repeating the text takes it past the length where the redactor stops using
+    # its combined pattern, and both ways must hide the same spans
+    redactor = SecretRedactor(['ab', 'bcdef', 'abc', 'hidden'])
+    text = 'x ab bcdef abcdef abc hidden '
+    redacted = 'x <H> <H> a<H> <H> <H> '.replace('<H>', SECRET_PLACEHOLDER)
+    assert redactor.redact(text * num_repeats) == redacted * num_repeats
+
+    # Without partial overlaps the combined pattern is used for short strings
+    redactor = SecretRedactor(['abcdef', 'cd', 'hidden'])
+    assert redactor._use_pattern
+    text = 'abcdef cd hidden abcde '
+    redacted = '<H> <H> <H> ab<H>e '.replace('<H>', SECRET_PLACEHOLDER)
+    assert redactor.redact(text * num_repeats) == redacted * num_repeats
+
+
+def test_secret_redaction_performance():
+    """Microbenchmark of redacting an event with many secrets loaded."""
+    secrets = [f'ghp_{i:036d}' for i in range(30)]
+    secrets += [f'sk-proj-{i:048d}' for i in range(20)]
+    secrets += [f'custom-secret-{i}' for i in range(10)]
+    redactor = SecretRedactor(secrets)
+    event = event_to_dict(
+        CmdRunAction(command='git push https://ghp_' + '0' * 36 + '@github.com/x/y')
+    )
+    event['extras'] = {'output': 'line of output\n' * 20, 'lines': ['a', 'b'] * 10}
+
+    num_iterations = 1000
+    start_time = time.time()
+    for _ in range(num_iterations):
+        data = copy.deepcopy(event)
+        redactor.redact(data)
+    redactor_time = time.time() - start_time
+
+    start_time = time.time()
+    for _ in range(num_iterations):
+        data = copy.deepcopy(event)
+        _replace_each_secret(data, secrets)
+    baseline_time = time.time() - start_time
+
+    assert '<secret_hidden>' in redactor.redact(copy.deepcopy(event))['args']['command']
+    print(
+        f'Per event redaction: {redactor_time / num_iterations * 1e6:.1f}us, '
+        f'one replace per secret: {baseline_time / num_iterations * 1e6:.1f}us'
+    )
+
+
+def _replace_each_secret(data: dict, secrets: list[str]) -> dict:
+    for key in data:
+        if isinstance(data[key], dict):
+            data[key] = _replace_each_secret(data[key], secrets)
+        elif isinstance(data[key], str):
+            for secret in secrets:
+                data[key] = data[key].replace(secret, '<secret_hidden>')
+    return data
+
+
+def _add_search_events(event_stream: EventStream, ids: range) -> None:
+    for i in ids:
+        content = f'needle {i}' if i % 7 == 0 else f'haystack {i}'
+        event_stream.add_event(NullObservation(content), EventSource.AGENT)
+
+
+@pytest.mark.parametrize('log_format', list(EventLogFormat))
+def test_search_index_query(log_format: EventLogFormat):
+    file_store = _CountingFileStore()
+    event_stream = EventStream('search', file_store, log_format=log_format)
+    _add_search_events(event_stream, range(60))
+    assert file_store.list(get_conversation_event_index_dir('search')) == [
+        f'{get_conversation_event_index_dir("search")}0-25.json',
+        f'{get_conversation_event_index_dir("search")}25-50.json',
+    ]
+
+    expected = [f'needle {i}' for i in range(0, 60, 7)]
+    query = EventFilter(query='NEEDLE')
+    assert [e.content for e in event_stream.search_events(filter=query)] == expected
+    assert [
+        e.content for e in event_stream.search_events(filter=query, reverse=True)
+    ] == expected[::-1]
+
+    # Events added after the index was loaded are found too
+    _add_search_events(event_stream, range(60, 64))
+    assert [e.content for e in event_stream.search_events(filter=query)][-1] == (
+        'needle 63'
+    )
+    event_stream.close()
+
+    # A new store only reads the stored shards and the events of the last block
+    EVENT_LRU_CACHE.invalidate(None, 'search')
+    store = EventStore('search', file_store, None)
+    assert [e.content for e in store.search_events(filter=query)] == expected + [
+        'needle 63'
+    ]
+    file_store.num_reads = 0
+    assert [
+        e.content for e in store.search_events(filter=EventFilter(query='needle 5'))
+    ] == ['needle 56']
+    assert file_store.num_reads <= 1
+
+
+def test_search_index_short_query_and_resume():
+    file_store = InMemoryFileStore()
+    event_stream = EventStream('search', file_store)
+    _add_search_events(event_stream, range(10))
+    event_stream.close()
+
+    # Resuming mid block still stores a shard covering the earlier events
+    event_stream = EventStream('search', file_store)
+    _add_search_events(event_stream, range(10, 25))
+    event_stream.close()
+    EVENT_LRU_CACHE.invalidate(None, 'search')
+    store = EventStore('search', file_store, None)
+    store._get_search_index()
+    assert store._load_search_index_shard(0, 25) is not None
+    assert [
+        e.content for e in store.search_events(filter=EventFilter(query='needle'))
+    ] == ['needle 0', 'needle 7', 'needle 14', 'needle 21']
+
+    # Queries shorter than a trigram scan every event
+    short_query = EventFilter(query='1')
+    assert list(store.search_events(filter=short_query)) == [
+        e for e in store.search_events() if short_query.include(e)
+    ]
+
+
+def test_search_index_entry_from_stored_json():
+    event = CmdRunAction(command='ECHO "Grüße" \\ done', thought='Tab\there')
+    event._id = 3  # type: ignore [attr-defined]
+    event._source = EventSource.USER  # type: ignore [attr-defined]
+    event_json = json.dumps(event_to_dict(event))
+    assert EventIndexEntry.from_event(event, event_json) == EventIndexEntry.from_event(
+        event
+    )
+    long_event = NullObservation('x' * (MAX_INDEXED_TEXT_LENGTH + 1))
+    long_entry = EventIndexEntry.from_event(
+        long_event, json.dumps(event_to_dict(long_event))
+    )
+    assert long_entry.trigrams is None
+
+
+def test_search_index_catch_up_does_not_block_searches():
+    file_store = InMemoryFileStore()
+    event_stream = EventStream('search', file_store)
+    _add_search_events(event_stream, range(10))
+    event_stream.close()
+
+    event_stream = EventStream('search', file_store)
+    search_events = event_stream.search_events
+    lock_states = []
+
+    def search_events_checking_lock(*args, **kwargs):
+        lock_states.append(event_stream._search_index_lock.locked())
+        return search_events(*args, **kwargs)
+
+    event_stream.search_events = search_events_checking_lock  # type: ignore [method-assign]
+    _add_search_events(event_stream, range(10, 25))
+    event_stream.close()
+    # The earlier events of the block were read back once, without the lock
+    assert lock_states == [False]
+    assert event_stream._load_search_index_shard(0, 25) is not None
+
+
+def test_search_index_candidates():
+    def entry(trigrams, kind='observation:null', source='agent', hidden=False):
+        return EventIndexEntry(
+            trigrams, EventColumns(kind, source, '2024-01-01T00:00:00', hidden)
+        )
+
+    index = EventSearchIndex(25)
+    index.add(0, entry({'abc', 'bcd'}))
+    index.add(1, entry({'abc', 'xyz'}, kind='action:run', source='user'))
+    index.add(2, entry(None, hidden=True))  # Too long to index
+    assert list(index.get_candidates(EventFilter(query='ABCD'), range(5))) == [
+        0,
+        2,
+        3,
+        4,
+    ]
+    assert list(index.get_candidates(EventFilter(query='abc'), range(4, -1, -1))) == [
+        4,
+        3,
+        2,
+        1,
+        0,
+    ]
+    assert index.get_candidates(EventFilter(query='ab'), range(5)) is None
+
+    # Ids not indexed yet (3 and 4) are always candidates
+    assert list(
+        index.get_candidates(EventFilter(include_types=(CmdRunAction,)), range(5))
+    ) == [1, 3, 4]
+    assert list(
+        index.get_candidates(
+            EventFilter(exclude_types=(NullObservation,), source='user'), range(5)
+        )
+    ) == [1, 3, 4]
+    assert list(
+        index.get_candidates(EventFilter(exclude_hidden=True, query='abc'), range(3))
+    ) == [0, 1]
+    assert (
+        list(index.get_candidates(EventFilter(start_date='2025-01-01'), range(3))) == []
+    )
+
+
+def test_search_index_pushes_down_column_filters():
+    file_store = _CountingFileStore()
+    event_stream = EventStream('columns', file_store, log_format=EventLogFormat.FILES)
+    for i in range(100):
+        if i in (3, 70):
+            event_stream.add_event(CmdRunAction(command=f'ls {i}'), EventSource.USER)
+        else:
+            event_stream.add_event(NullObservation(f'test{i}'), EventSource.AGENT)
+    event_stream.close()
+
+    EVENT_LRU_CACHE.invalidate(None, 'columns')
+    store = EventStore('columns', file_store, None)
+    file_store.num_reads = 0
+    assert len(list(store.search_events())) == 100
+    num_scan_reads = file_store.num_reads
+
+    # Once the index is loaded, only the pages holding matching events are read
+    query = EventFilter(include_types=(CmdRunAction,), source='user')
+    store._get_search_index()
+    EVENT_LRU_CACHE.invalidate(None, 'columns')
+    file_store.num_reads = 0
+    events = list(store.search_events(filter=query))
+    assert [e.command for e in events] == ['ls 3', 'ls 70']
+    assert file_store.num_reads == 2
+    assert file_store.num_reads < num_scan_reads
@@ -0,0 +1,100 @@
+import base64
+import os
+
+import pytest
+
+from openhands.runtime.utils.files import (
+    LineIndex,
+    get_line_index,
+    read_data_url,
+    read_line_range,
+    read_lines,
+)
+
+
+def _write(path, content: bytes) -> str:
+    path.write_bytes(content)
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    'content',
+    [
+        b'',
+        b'single line without newline',
+        b'one\ntwo\nthree\n',
+        b'one\r\ntwo\r\nthree',
+        b'one\rtwo\rthree\r',
+        b'one\r\ntwo\rthree\nfour',
+        b'\n\n\n',
+        ''.join(f'line {i} {"x" * (i % 7)}\n' for i in range(200)).encode(),
+    ],
+)
+def test_read_line_range_matches_read_lines(tmp_path, content):
+    path = _write(tmp_path / 'file.txt', content)
+    with open(path, encoding='utf-8') as file:
+        all_lines = file.readlines()
+
+    for start in (-1, 0, 1, 2, 3, 50, 199, 200, 250):
+        for end in (-5, -1, 0, 1, 2, 4, 51, 199, 200, 300):
+            assert read_line_range(path, start, end) == read_lines(
+                all_lines, start, end
+            ), (start, end)
+
+
+def test_line_index_spans_blocks(tmp_path):
+    lines = [f'{i}\n' * (i % 3 + 1) for i in range(500)]
+    path = _write(tmp_path / 'file.txt', ''.join(lines).encode())
+    all_lines = ''.join(lines).splitlines(keepends=True)
+    index = LineIndex(path, block_size=16)
+
+    assert index.num_lines == len(all_lines)
+    with open(path, 'rb') as file:
+        offsets = [index.line_offset(file, line) for line in range(len(all_lines))]
+    assert offsets == [
+        sum(len(line) for line in all_lines[:i]) for i in range(len(all_lines))
+    ]
+
+
+def test_line_index_finds_lone_carriage_returns(tmp_path):
+    # a \r\n split between blocks is not a lone \r
+    path = _write(tmp_path / 'crlf.txt', b'abc\r\n' * 10)
+    assert not LineIndex(path, block_size=4).has_lone_cr
+
+    path = _write(tmp_path / 'cr.txt', b'abc\r\nabc\rabc')
+    assert LineIndex(path, block_size=4).has_lone_cr
+    path = _write(tmp_path / 'cr_at_end.txt', b'abc\r\nabc\r')
+    assert LineIndex(path, block_size=4).has_lone_cr
+
+
+def test_line_index_is_rebuilt_when_the_file_changes(tmp_path):
+    path = _write(tmp_path / 'file.txt', b'one\ntwo\n')
+    index = get_line_index(path)
+    assert get_line_index(path) is index
+
+    _write(tmp_path / 'file.txt', b'one\ntwo\nthree\n')
+    os.utime(path, ns=(0, index.version[0] + 1))
+
+    assert get_line_index(path).num_lines == 3
+    assert read_line_range(path) == ['one\n', 'two\n', 'three\n']
+
+
+def test_whole_file_read_builds_no_line_index(tmp_path, monkeypatch):
+    path = _write(tmp_path / 'file.txt', b'one\ntwo\n')
+
+    def fail(path):
+        raise AssertionError('no line index needed')
+
+    monkeypatch.setattr('openhands.runtime.utils.files.get_line_index', fail)
+    assert read_line_range(path) == ['one\n', 'two\n']
+    assert read_line_range(path, -1, -1) == ['one\n', 'two\n']
+
+
+def test_read_data_url_encodes_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr('openhands.runtime.utils.files._BASE64_CHUNK_SIZE', 3 * 5)
+    data = bytes(range(256)) * 3
+    path = _write(tmp_path / 'image.png', data)
+
+    assert read_data_url(path, 'image/png') == (
+        'data:image/png;base64,' + base64.b64encode(data).decode()
+    )
@@ -1,4 +1,7 @@
+import json
 import logging
+import os
+import random
 from unittest.mock import Mock, patch
 
 import pytest
@@ -7,8 +10,15 @@ from pytest import TempPathFactory
 from openhands.controller.agent_controller import AgentController
 from openhands.controller.state.state import State
 from openhands.controller.stuck import StuckDetector
-from openhands.events.action import CmdRunAction, FileReadAction, MessageAction
+from openhands.events.action import (
+    Action,
+    CmdRunAction,
+    FileReadAction,
+    MessageAction,
+    NullAction,
+)
 from openhands.events.action.commands import IPythonRunCellAction
+from openhands.events.event import Event
 from openhands.events.observation import (
     CmdOutputObservation,
     FileReadObservation,
@@ -17,9 +27,13 @@ from openhands.events.observation.agent import AgentCondensationObservation
 from openhands.events.observation.commands import IPythonRunCellObservation
 from openhands.events.observation.empty import NullObservation
 from openhands.events.observation.error import ErrorObservation
+from openhands.events.observation.observation import Observation
+from openhands.events.serialization.event import event_from_dict
 from openhands.events.stream import EventSource, EventStream
 from openhands.storage import get_file_store
 
+TRAJS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'runtime', 'trajs')
+
 
 def collect_events(stream):
     return [event for event in stream.get_events()]
@@ -783,3 +797,126 @@ class TestAgentController:
         controller.delegate = Mock()
         controller.delegate._is_stuck.return_value = True
         assert controller._is_stuck() is True
+
+
+def _is_stuck_full_scan(detector: StuckDetector, headless_mode: bool) -> bool:
+    """The verdict of the stuck detector before it was incremental, scanning the whole history."""
+    history = detector.state.history
+    if not headless_mode:
+        last_user_msg_idx = -1
+        for i, event in enumerate(reversed(history)):
+            if isinstance(event, MessageAction) and event.source == EventSource.USER:
+                last_user_msg_idx = len(history) - i - 1
+                break
+        history = history[last_user_msg_idx + 1 :]
+    filtered_history = [
+        event
+        for event in history
+        if not (
+            (isinstance(event, MessageAction) and event.source == EventSource.USER)
+            or isinstance(event, (NullAction, NullObservation))
+        )
+    ]
+    if len(filtered_history) < 3:
+        return False
+
+    def last_of(event_type: type, n: int) -> list[Event]:
+        return [e for e in reversed(filtered_history) if isinstance(e, event_type)][:n]
+
+    last_actions = last_of(Action, 6)
+    last_observations = last_of(Observation, 6)
+    if detector._is_stuck_repeating_action_observation(
+        last_actions[:4], last_observations[:4]
+    ) or detector._is_stuck_repeating_action_error(
+        last_actions[:4], last_observations[:4]
+    ):
+        return True
+
+    agent_messages = [
+        (i, e)
+        for i, e in enumerate(filtered_history)
+        if isinstance(e, MessageAction) and e.source == EventSource.AGENT
+    ][-3:]
+    if (
+        len(agent_messages) == 3
+        and all(agent_messages[0][1] == e for _, e in agent_messages)
+        and not any(
+            isinstance(e, Observation)
+            for e in filtered_history[agent_messages[0][0] + 1 : agent_messages[-1][0]]
+        )
+    ):
+        return True
+
+    if len(filtered_history) >= 6 and detector._is_stuck_action_observation_pattern(
+        last_actions, last_observations
+    ):
+        return True
+
+    condensations = [
+        i
+        for i, e in enumerate(filtered_history)
+        if isinstance(e, AgentCondensationObservation)
+    ][-10:]
+    return (
+        len(filtered_history) >= 10
+        and len(condensations) == 10
+        and any(j == i + 1 for i, j in zip(condensations, condensations[1:]))
+    )
+
+
+def _random_event(rng: random.Random, recorded_events: list[Event]) -> Event:
+    """An event from a small pool, so that loops of every kind come up often."""
+    kind = rng.randrange(11)
+    if kind == 0:
+        return rng.choice(recorded_events)
+    if kind == 1:
+        return CmdRunAction(command=rng.choice(['ls', 'pwd']))
+    if kind == 2:
+        return CmdOutputObservation(
+            content='', command=rng.choice(['ls', 'pwd']), command_id=rng.randrange(9)
+        )
+    if kind == 3:
+        return ErrorObservation(content='error')
+    if kind in (4, 5):
+        message = MessageAction(content=rng.choice(['same', 'other']))
+        message._source = EventSource.USER if kind == 4 else EventSource.AGENT
+        return message
+    if kind == 6:
+        return rng.choice([NullAction(), NullObservation(content='')])
+    if kind in (7, 8):
+        return AgentCondensationObservation(content='Trimming prompt')
+    if kind == 9:
+        return IPythonRunCellAction(code=code_snippet)
+    return IPythonRunCellObservation(
+        content='  Cell In[1], line 1\nhello\n       ^\nSyntaxError: unterminated string literal (detected at line 1)'
+        + jupyter_line_1
+        + jupyter_line_2,
+        code=code_snippet,
+    )
+
+
+def test_incremental_verdicts_match_full_scan():
+    recorded_events: list[Event] = []
+    for name in ['basic', 'basic_gui_mode', 'basic_interactions']:
+        with open(os.path.join(TRAJS_DIR, f'{name}.json')) as f:
+            recorded_events.extend(event_from_dict(data) for data in json.load(f))
+
+    rng = random.Random(42)
+    num_stuck = 0
+    for _ in range(100):
+        state = State(inputs={}, max_iterations=50)
+        state.history = list(recorded_events)
+        detector = StuckDetector(state)
+        for _ in range(60):
+            for _ in range(rng.randrange(1, 4)):
+                state.history.append(_random_event(rng, recorded_events))
+            if rng.random() < 0.05:
+                # Replaced history is processed from scratch
+                state.history = state.history[rng.randrange(len(state.history)) :]
+            for headless_mode in (True, False):
+                with patch('logging.Logger.warning'):
+                    verdict = detector.is_stuck(headless_mode=headless_mode)
+                    assert verdict == _is_stuck_full_scan(detector, headless_mode)
+                num_stuck += verdict
+    # The corpus has plenty of loops
+    assert num_stuck > 500
@@ -1,5 +1,8 @@
+import json as stdlib_json
 from datetime import datetime
 
+import pytest
+
 from openhands.events.action import MessageAction
 from openhands.io import json
 
@@ -44,3 +47,39 @@ def test_array_serialization_deserialization():
         }
     ]
     assert deserialized == expected
+
+
+def test_loads_matches_stdlib_with_and_without_orjson(monkeypatch):
+    inputs = [
+        '{"a": [1, 2.5, "\\u00e9", null, true], "b": {"c": "d"}}',
+        '{"big": 123456789012345678901234567890}',
+        '{"nan": NaN}',
+        'Some text {"key": "value"} around an object',
+    ]
+    expected = [
+        {'a': [1, 2.5, 'é', None, True], 'b': {'c': 'd'}},
+        {'big': 123456789012345678901234567890},
+        {'nan': float('nan')},
+        {'key': 'value'},
+    ]
+    for fast_path in (json.orjson, None):
+        monkeypatch.setattr(json, 'orjson', fast_path)
+        for json_str, value in zip(inputs, expected):
+            result = json.loads(json_str)
+            if 'nan' in value:
+                assert result['nan'] != result['nan']
+            else:
+                assert result == value
+
+
+def test_decode_is_strict(monkeypatch):
+    for fast_path in (json.orjson, None):
+        monkeypatch.setattr(json, 'orjson', fast_path)
+        assert json.decode(b'{"big": [12345678901234567890123, 1]}') == {
+            'big': [12345678901234567890123, 1]
+        }
+        assert json.decode('{"a": "1234567890123456789"}') == {
+            'a': '1234567890123456789'
+        }
+        with pytest.raises(stdlib_json.JSONDecodeError):
+            json.decode('Some text {"key": "value"} around an object')
@@ -1,4 +1,6 @@
 import copy
+import json
+import pickle
 import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -13,7 +15,11 @@ from openhands.core.config import LLMConfig
 from openhands.core.exceptions import LLMNoResponseError, OperationCancelled
 from openhands.core.message import Message, TextContent
 from openhands.llm.llm import LLM
-from openhands.llm.metrics import Metrics, TokenUsage
+from openhands.llm.metrics import Cost, Metrics, ResponseLatency, TokenUsage
+from openhands.llm.model_capabilities import (
+    clear_model_capabilities,
+    get_model_capabilities,
+)
 
 
 @pytest.fixture(autouse=True)
@@ -26,6 +32,12 @@ def mock_logger(monkeypatch):
     return mock_logger
 
 
+@pytest.fixture(autouse=True)
+def forget_model_capabilities():
+    # the capabilities are shared by the LLMs of the process, but tests mock their lookup
+    clear_model_capabilities()
+
+
 @pytest.fixture
 def default_config():
     return LLMConfig(
@@ -80,6 +92,21 @@ def test_token_usage_add():
     )  # Should keep the response_id from the first instance
 
 
+def test_token_usage_cache_ratios():
+    """Test the share of the prompt tokens read from and written to the prompt cache."""
+    metrics = Metrics(model_name='test')
+    assert metrics.accumulated_token_usage.cache_read_ratio == 0.0
+
+    metrics.add_token_usage(100, 10, 0, 80, 1000, 'response-1')
+    metrics.add_token_usage(100, 10, 80, 10, 1000, 'response-2')
+
+    assert metrics.token_usages[1].cache_read_ratio == 0.8
+    usage = metrics.accumulated_token_usage
+    assert usage.cache_read_ratio == 0.4
+    assert usage.cache_write_ratio == 0.45
+    assert 'cache_read_ratio: 0.40' in metrics.log()
+
+
 def test_metrics_merge_accumulated_token_usage():
     """Test that accumulated token usage is properly merged between two Metrics instances."""
     # Create two Metrics instances
@@ -123,6 +150,106 @@ def test_metrics_merge_accumulated_token_usage():
     assert token_usages[1]['response_id'] == 'response-2'
 
 
+def test_metrics_records_round_trip():
+    metrics = Metrics(model_name='model1')
+    metrics.add_cost(0.5)
+    metrics.add_response_latency(1.5, 'response-1')
+    metrics.add_token_usage(10, 5, 3, 2, 1000, 'response-1')
+    metrics.add_token_usage(8, 6, 2, 4, 2000, 'response-2')
+
+    assert metrics.costs[0].cost == 0.5
+    assert metrics.response_latencies[-1] == ResponseLatency(
+        model='model1', latency=1.5, response_id='response-1'
+    )
+    assert [usage.response_id for usage in metrics.token_usages] == [
+        'response-1',
+        'response-2',
+    ]
+    assert metrics.token_usages[1] == TokenUsage(
+        model='model1',
+        prompt_tokens=8,
+        completion_tokens=6,
+        cache_read_tokens=2,
+        cache_write_tokens=4,
+        context_window=2000,
+        per_turn_token=14,
+        response_id='response-2',
+    )
+    assert metrics.accumulated_token_usage.context_window == 2000
+
+    restored = Metrics.from_dict(metrics.get(), model_name='model1')
+    assert restored.get() == metrics.get()
+    assert pickle.loads(pickle.dumps(metrics)).get() == metrics.get()
+
+
+def test_metrics_merge_records_of_other_models():
+    metrics1 = Metrics(model_name='model1')
+    metrics2 = Metrics(model_name='model2')
+    metrics1.add_token_usage(10, 5, 0, 0, 0, 'response-1')
+    metrics2.add_response_latency(0.5, 'response-2')
+    metrics2.add_token_usage(8, 6, 0, 0, 0, 'response-2')
+
+    metrics1.merge(metrics2)
+    metrics2.add_token_usage(1, 1, 0, 0, 0, 'response-3')
+
+    assert [(u.model, u.response_id) for u in metrics1.token_usages] == [
+        ('model1', 'response-1'),
+        ('model2', 'response-2'),
+    ]
+    assert metrics1.response_latencies[0].model == 'model2'
+
+
+def test_metrics_totals_and_records_since():
+    metrics = Metrics(model_name='model1')
+    metrics.add_cost(0.5)
+    metrics.add_token_usage(10, 5, 0, 0, 1000, 'response-1')
+    start = metrics.num_records
+    metrics.add_cost(0.25)
+    metrics.add_response_latency(1.5, 'response-2')
+    metrics.add_token_usage(8, 6, 0, 0, 2000, 'response-2')
+    metrics.accumulated_token_usage = metrics.accumulated_token_usage.model_copy(
+        update={'response_id': 'total'}
+    )
+
+    totals = metrics.totals()
+    assert totals.num_records == (0, 0, 0)
+    assert totals.accumulated_cost == 0.75
+    assert totals.accumulated_token_usage == metrics.accumulated_token_usage
+    assert totals.accumulated_token_usage.response_id == 'total'
+
+    totals.add_records(metrics, start)
+    assert totals.accumulated_cost == 0.75
+    assert [cost.cost for cost in totals.costs] == [0.25]
+    assert totals.response_latencies == metrics.response_latencies
+    assert [usage.response_id for usage in totals.token_usages] == ['response-2']
+
+
+def test_metrics_unpickle_list_based_metrics():
+    metrics = Metrics.__new__(Metrics)
+    metrics.__setstate__(
+        {
+            'model_name': 'model1',
+            '_accumulated_cost': 0.25,
+            '_costs': [Cost(model='model1', cost=0.25, timestamp=1.0)],
+            '_response_latencies': [
+                ResponseLatency(model='model1', latency=2.0, response_id='r1')
+            ],
+            '_token_usages': [
+                TokenUsage(model='model1', prompt_tokens=3, response_id='r1')
+            ],
+            '_accumulated_token_usage': TokenUsage(model='model1', prompt_tokens=3),
+        }
+    )
+
+    assert metrics.accumulated_cost == 0.25
+    assert metrics.costs == [Cost(model='model1', cost=0.25, timestamp=1.0)]
+    assert metrics.response_latencies[0].latency == 2.0
+    assert metrics.token_usages[0].prompt_tokens == 3
+    assert metrics.accumulated_token_usage.prompt_tokens == 3
+    metrics.add_token_usage(1, 1, 0, 0, 0, 'r2')
+    assert metrics.accumulated_token_usage.prompt_tokens == 4
+
+
 @patch('openhands.llm.llm.litellm.get_model_info')
 def test_llm_init_with_model_info(mock_get_model_info, default_config):
     mock_get_model_info.return_value = {
@@ -286,6 +413,44 @@ def test_llm_init_with_openrouter_model(mock_get_model_info, default_config):
     mock_get_model_info.assert_called_once_with('openrouter:gpt-4o-mini')
 
 
+@patch('openhands.llm.llm.litellm.supports_vision', return_value=True)
+@patch('openhands.llm.llm.litellm.get_model_info')
+def test_model_capabilities_shared_between_llms(
+    mock_get_model_info, mock_supports_vision, default_config
+):
+    mock_get_model_info.return_value = {'max_input_tokens': 7000}
+
+    llms = [LLM(default_config) for _ in range(3)]
+    LLM(default_config.model_copy(update={'base_url': 'http://localhost:4000'}))
+
+    assert all(llm.config.max_input_tokens == 7000 for llm in llms)
+    assert all(llm.vision_is_active() for llm in llms)
+    # once for the default endpoint, and once for the other base_url
+    assert mock_get_model_info.call_count == 2
+    assert mock_supports_vision.call_count == 2
+
+
+@patch('openhands.llm.llm.litellm.get_model_info')
+def test_model_capabilities_snapshot(mock_get_model_info, default_config, tmp_path):
+    mock_get_model_info.return_value = {'max_input_tokens': 7000}
+    default_config.model_info_cache_file = str(tmp_path / 'model_info.json')
+    capabilities = get_model_capabilities(default_config)
+
+    # a new process loads the capabilities from the snapshot
+    clear_model_capabilities()
+    assert get_model_capabilities(default_config) == capabilities
+    assert LLM(default_config).config.max_input_tokens == 7000
+    assert mock_get_model_info.call_count == 1
+
+    # but not when it was written with another version of litellm
+    snapshot = json.loads((tmp_path / 'model_info.json').read_text())
+    snapshot['litellm_version'] = '0.0.0'
+    (tmp_path / 'model_info.json').write_text(json.dumps(snapshot))
+    clear_model_capabilities()
+    get_model_capabilities(default_config)
+    assert mock_get_model_info.call_count == 2
+
+
 # Tests involving completion and retries
 
 
@@ -511,7 +676,7 @@ def test_completion_retry_with_llm_no_response_error_nonzero_temp(
 
 
 @patch('openhands.llm.llm.litellm.get_model_info')
-@patch('openhands.llm.llm.httpx.get')
+@patch('openhands.llm.model_capabilities.httpx.get')
 def test_gemini_25_pro_function_calling(mock_httpx_get, mock_get_model_info):
     """
     Test that Gemini 2.5 Pro models have function calling enabled by default.
@@ -751,17 +916,25 @@ def test_completion_with_two_positional_args(mock_litellm_completion, default_co
     )  # No positional args should be passed to litellm_completion here
 
 
+def _mock_token_counter(messages, **kwargs):
+    # 42 tokens per message, and 3 tokens priming the reply
+    return 42 * len(messages) if messages else 3
+
+
 @patch('openhands.llm.llm.litellm.token_counter')
 def test_get_token_count_with_dict_messages(mock_token_counter, default_config):
-    mock_token_counter.return_value = 42
+    mock_token_counter.side_effect = _mock_token_counter
     llm = LLM(default_config)
     messages = [{'role': 'user', 'content': 'Hello!'}]
 
     token_count = llm.get_token_count(messages)
 
-    assert token_count == 42
-    mock_token_counter.assert_called_once_with(
-        model=default_config.model, messages=messages, custom_tokenizer=None
+    assert token_count == 45
+    mock_token_counter.assert_any_call(
+        model=default_config.model,
+        messages=messages,
+        custom_tokenizer=None,
+        count_response_tokens=True,
     )
 
 
@@ -775,16 +948,14 @@ def test_get_token_count_with_message_objects(
     message_obj = Message(role='user', content=[TextContent(text='Hello!')])
     message_dict = {'role': 'user', 'content': 'Hello!'}
 
-    # Mock token counter to return different values for each call
-    mock_token_counter.side_effect = [42, 42]  # Same value for both cases
+    mock_token_counter.side_effect = _mock_token_counter
 
     # Get token counts for both formats
     token_count_obj = llm.get_token_count([message_obj])
     token_count_dict = llm.get_token_count([message_dict])
 
     # Verify both formats get the same token count
-    assert token_count_obj == token_count_dict
-    assert mock_token_counter.call_count == 2
+    assert token_count_obj == token_count_dict == 45
 
 
 @patch('openhands.llm.llm.litellm.token_counter')
@@ -794,7 +965,7 @@ def test_get_token_count_with_custom_tokenizer(
 ):
     mock_tokenizer = MagicMock()
     mock_create_tokenizer.return_value = mock_tokenizer
-    mock_token_counter.return_value = 42
+    mock_token_counter.side_effect = _mock_token_counter
 
     config = copy.deepcopy(default_config)
     config.custom_tokenizer = 'custom/tokenizer'
@@ -803,13 +974,90 @@ def test_get_token_count_with_custom_tokenizer(
 
     token_count = llm.get_token_count(messages)
 
-    assert token_count == 42
+    assert token_count == 45
     mock_create_tokenizer.assert_called_once_with('custom/tokenizer')
-    mock_token_counter.assert_called_once_with(
-        model=config.model, messages=messages, custom_tokenizer=mock_tokenizer
+    mock_token_counter.assert_any_call(
+        model=config.model,
+        messages=messages,
+        custom_tokenizer=mock_tokenizer,
+        count_response_tokens=True,
     )
 
 
+@patch('openhands.llm.llm.create_pretrained_tokenizer')
+def test_custom_tokenizer_shared_between_llms(mock_create_tokenizer, default_config):
+    mock_create_tokenizer.return_value = MagicMock()
+    config = copy.deepcopy(default_config)
+    config.custom_tokenizer = 'custom/shared-tokenizer'
+
+    first_llm = LLM(config)
+    second_llm = LLM(config)
+
+    assert first_llm.tokenizer is second_llm.tokenizer
+    mock_create_tokenizer.assert_called_once_with('custom/shared-tokenizer')
+
+
+@patch('openhands.llm.llm.litellm.token_counter')
+def test_get_token_count_only_tokenizes_new_messages(
+    mock_token_counter, default_config
+):
+    mock_token_counter.side_effect = _mock_token_counter
+    llm = LLM(default_config)
+    messages = [
+        Message(role='system', content=[TextContent(text='System prompt')]),
+        Message(role='user', content=[TextContent(text='Hello!')]),
+    ]
+    assert llm.get_token_count(messages) == 87
+
+    messages.append(Message(role='assistant', content=[TextContent(text='Hi!')]))
+    mock_token_counter.reset_mock()
+    assert llm.get_token_count(messages) == 129
+
+    counted_messages = [
+        call.kwargs['messages']
+        for call in mock_token_counter.call_args_list
+        if call.kwargs['messages']
+    ]
+    assert counted_messages == [llm.format_messages_for_llm(messages[-1:])]
+
+
+def test_get_token_count_matches_litellm(default_config):
+    import litellm
+
+    config = copy.deepcopy(default_config)
+    config.model = 'custom-model'
+    llm = LLM(config)
+    messages = [
+        {'role': 'system', 'content': 'You are a helpful assistant.'},
+        {'role': 'user', 'content': [{'type': 'text', 'text': 'List the files.'}]},
+        {
+            'role': 'assistant',
+            'content': 'Sure.',
+            'tool_calls': [
+                {
+                    'id': 'call_1',
+                    'type': 'function',
+                    'function': {
+                        'name': 'execute_bash',
+                        'arguments': '{"command": "ls"}',
+                    },
+                }
+            ],
+        },
+        {
+            'role': 'tool',
+            'content': 'file1\nfile2',
+            'tool_call_id': 'call_1',
+            'name': 'execute_bash',
+        },
+    ]
+
+    expected = litellm.token_counter(model='custom-model', messages=messages)
+    assert llm.get_token_count(messages) == expected
+    # a second time, from the cached counts
+    assert llm.get_token_count(messages) == expected
+
+
 @patch('openhands.llm.llm.litellm.token_counter')
 def test_get_token_count_error_handling(
     mock_token_counter, default_config, mock_logger
@@ -78,8 +78,8 @@ def test_get_token_usage_for_event_id():
         cache_write_tokens=3,
         response_id='resp-2',
     )
-    metrics._token_usages.append(usage_1)
-    metrics._token_usages.append(usage_2)
+    metrics.token_usages.append(usage_1)
+    metrics.token_usages.append(usage_2)
 
     # Build a list of events
     events = []
@@ -7,6 +7,8 @@ from litellm.exceptions import (
 
 from openhands.core.config.llm_config import LLMConfig
 from openhands.core.config.openhands_config import OpenHandsConfig
+from openhands.llm.async_llm import AsyncLLM
+from openhands.llm.llm import LLM
 from openhands.server.session.session import Session
 from openhands.storage.memory import InMemoryFileStore
 
@@ -67,3 +69,21 @@ async def test_notify_on_llm_retry(
         'info', 'STATUS$LLM_RETRY', ANY
     )
     await session.close()
+
+
+@pytest.mark.asyncio
+async def test_async_llm_is_opt_in(mock_sio, default_llm_config):
+    config = OpenHandsConfig()
+    config.set_llm_config(default_llm_config)
+    session = Session(
+        sid='..sid..',
+        file_store=InMemoryFileStore({}),
+        config=config,
+        sio=mock_sio,
+        user_id='..uid..',
+    )
+    assert type(session._create_llm('CodeActAgent')) is LLM
+
+    session.config.get_agent_config('CodeActAgent').enable_async_step = True
+    assert type(session._create_llm('CodeActAgent')) is AsyncLLM
+    await session.close()
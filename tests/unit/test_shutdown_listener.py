@@ -19,6 +19,10 @@ from openhands.utils.shutdown_listener import (
 def cleanup_listeners():
     shutdown_listener._shutdown_listeners.clear()
     shutdown_listener._should_exit = False
+    yield
+    # Later tests in the same process would otherwise stop reading events
+    shutdown_listener._shutdown_listeners.clear()
+    shutdown_listener._should_exit = False
 
 
 @dataclass
@@ -1,5 +1,10 @@
 from openhands.controller.state.state import State
-from openhands.events.event import Event
+from openhands.events.action import MessageAction
+from openhands.events.event import Event, EventSource
+from openhands.events.observation import NullObservation
+from openhands.events.stream import EventStream
+from openhands.llm.metrics import Metrics
+from openhands.storage.locations import get_conversation_agent_state_filename
 from openhands.storage.memory import InMemoryFileStore
 
 
@@ -56,3 +61,63 @@ def test_state_view_cache_not_serialized():
     # be structurally identical but _not_ the same object.
     assert id(restored_view) != id(view)
     assert restored_view.events == view.events
+
+
+def test_state_view_rebuilt_when_history_replaced():
+    """Test that the view is rebuilt when the history is replaced, even by one of the same length."""
+    state = State()
+    state.history = [example_event(i) for i in range(5)]
+    view = state.view
+
+    state.history = [example_event(i) for i in range(10, 15)]
+    new_view = state.view
+    assert id(new_view) != id(view)
+    assert [event.id for event in new_view] == list(range(10, 15))
+
+
+def test_state_pickle_keeps_metric_totals_only():
+    """Test that the saved state does not grow with the number of LLM calls."""
+    store = InMemoryFileStore()
+    sizes = []
+    for num_calls in (1, 100):
+        state = State()
+        state.metrics = Metrics(model_name='gpt-4o')
+        for i in range(num_calls):
+            state.metrics.add_cost(0.01)
+            state.metrics.add_token_usage(10, 5, 0, 0, 1000, f'response-{i}')
+        state.save_to_session('test_sid', store, None)
+        sizes.append(len(store.read(get_conversation_agent_state_filename('test_sid'))))
+
+    restored = State.restore_from_session('test_sid', store, None)
+    assert sizes[0] == sizes[1]
+    assert restored.metrics.accumulated_cost == state.metrics.accumulated_cost
+    assert (
+        restored.metrics.accumulated_token_usage
+        == state.metrics.accumulated_token_usage
+    )
+    assert len(restored.metrics.token_usages) == 0
+    # the metrics of the running state are untouched
+    assert len(state.metrics.token_usages) == 100
+
+
+def test_restored_state_rebuilds_metric_records_from_events():
+    """Test that the records of the LLM calls come back from the events of their steps."""
+    store = InMemoryFileStore()
+    event_stream = EventStream('test_sid', store)
+    state = State()
+    state.metrics = Metrics(model_name='gpt-4o')
+    for i in range(3):
+        step_metrics = Metrics(model_name='gpt-4o')
+        step_metrics.add_cost(0.01)
+        step_metrics.add_response_latency(0.5, f'response-{i}')
+        step_metrics.add_token_usage(10, 5, 0, 0, 1000, f'response-{i}')
+        state.metrics.merge(step_metrics)
+        action = MessageAction(content=f'step {i}')
+        action.llm_metrics = step_metrics
+        event_stream.add_event(action, EventSource.AGENT)
+        event_stream.add_event(NullObservation(''), EventSource.ENVIRONMENT)
+    event_stream.close()
+    state.save_to_session('test_sid', store, None)
+
+    restored = State.restore_from_session('test_sid', store, None)
+    assert restored.metrics.get() == state.metrics.get()
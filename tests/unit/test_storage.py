@@ -77,6 +77,22 @@ class _StorageTest(ABC):
         store.delete('foo/bar/qux.txt')
         store.delete('foo/bar/quux.txt')
 
+    def test_read_range(self):
+        store = self.get_store()
+        store.write('foo/range.txt', 'Hello, world!')
+        self.assertEqual(store.read_range('foo/range.txt', 7, 12), 'world')
+        self.assertEqual(store.read_range('foo/range.txt', 0, 5), 'Hello')
+        store.delete('foo/range.txt')
+        with self.assertRaises(FileNotFoundError):
+            store.read_range('foo/range.txt', 0, 5)
+
+    def test_append(self):
+        store = self.get_store()
+        store.append('foo/append.txt', 'Hello')
+        store.append('foo/append.txt', ', world!')
+        self.assertEqual(store.read('foo/append.txt'), 'Hello, world!')
+        store.delete('foo/append.txt')
+
     def test_directory_deletion(self):
         store = self.get_store()
         # Create a directory structure
@@ -211,7 +227,7 @@ class _MockS3Client:
             self.objects_by_bucket[Bucket] = {}
         self.objects_by_bucket[Bucket][Key] = _MockS3Object(Key, Body)
 
-    def get_object(self, Bucket: str, Key: str) -> dict:
+    def get_object(self, Bucket: str, Key: str, Range: str | None = None) -> dict:
         if Bucket not in self.objects_by_bucket:
             raise botocore.exceptions.ClientError(
                 {
@@ -233,6 +249,9 @@ class _MockS3Client:
                 'GetObject',
             )
         content = self.objects_by_bucket[Bucket][Key].content
+        if Range:
+            start, end = Range.removeprefix('bytes=').split('-')
+            content = content[int(start) : int(end) + 1]
         if isinstance(content, bytes):
             return {'Body': BytesIO(content)}
         return {'Body': StringIO(content)}
@@ -1,8 +1,10 @@
+import pytest
+
 from openhands.events.action.agent import CondensationAction
 from openhands.events.action.message import MessageAction
 from openhands.events.event import Event
 from openhands.events.observation.agent import AgentCondensationObservation
-from openhands.memory.view import View
+from openhands.memory.view import IncrementalView, View
 
 
 def test_view_preserves_uncondensed_lists() -> None:
@@ -98,6 +100,89 @@ def test_no_condensation_action_in_view() -> None:
     assert len(view) == 3  # Event 1, Event 2, Event 3 (Event 0 was forgotten)
 
 
+def test_incremental_view_matches_full_rebuild() -> None:
+    """Tests that a view kept up to date as events are appended matches one built from scratch."""
+    events: list[Event] = [MessageAction(content=f'Event {i}') for i in range(40)]
+    events[10] = CondensationAction(forgotten_event_ids=[2, 3, 4])
+    events[20] = CondensationAction(
+        forgotten_event_ids=[5, 6], summary='My Summary', summary_offset=1
+    )
+    # An offset past the kept events, which moves as more events are kept
+    events[25] = CondensationAction(
+        forgotten_event_ids=[7], summary='Later Summary', summary_offset=30
+    )
+    set_ids(events)
+
+    incremental_view = IncrementalView()
+    history: list[Event] = []
+    for event in events:
+        history.append(event)
+        view = incremental_view.get_view(history)
+        expected = View.from_events(history)
+        assert [(type(e), e.id, e.message) for e in view] == [
+            (type(e), e.id, e.message) for e in expected
+        ]
+        assert incremental_view.get_view(history) is view
+
+    # Replacing the history rebuilds the view
+    replaced_history = events[:5]
+    assert incremental_view.get_view(replaced_history).events == events[:5]
+
+
+def test_incremental_view_only_processes_new_events() -> None:
+    """Tests that appending an event does not look at the events already in the view."""
+
+    class CountingMessageAction(MessageAction):
+        num_id_reads = 0
+
+        @property
+        def id(self) -> int:  # type: ignore[override]
+            CountingMessageAction.num_id_reads += 1
+            return self._id  # type: ignore[attr-defined]
+
+    events: list[Event] = [
+        CountingMessageAction(content=f'Event {i}') for i in range(1000)
+    ]
+    set_ids(events)
+    incremental_view = IncrementalView()
+    history = events[:999]
+    incremental_view.get_view(history)
+
+    CountingMessageAction.num_id_reads = 0
+    history.append(events[999])
+    assert len(incremental_view.get_view(history)) == 1000
+    assert CountingMessageAction.num_id_reads == 1
+
+
+def test_incremental_views_share_the_kept_events() -> None:
+    """Tests that views handed out earlier keep their events without being copied on each append."""
+    events: list[Event] = [MessageAction(content=f'Event {i}') for i in range(20)]
+    set_ids(events)
+    incremental_view = IncrementalView()
+    history = events[:10]
+    view = incremental_view.get_view(history)
+    history.extend(events[10:])
+    later_view = incremental_view.get_view(history)
+    assert later_view._shared_events is view._shared_events
+
+    assert len(view) == 10
+    assert list(view) == events[:10]
+    assert view[-1] is events[9]
+    assert view[5:] == events[5:10]
+    with pytest.raises(IndexError):
+        view[10]
+    assert view.events == events[:10]
+    assert view == View(events=events[:10])
+
+    # Changing the events of a view, as the conversation memory may, leaves the others alone
+    later_view.events.insert(0, MessageAction(content='System'))
+    assert len(later_view) == 21
+    history.append(MessageAction(content='Event 20'))
+    history[-1]._id = 20  # type: ignore
+    assert list(incremental_view.get_view(history)) == history
+    assert view.events == events[:10]
+
+
 def set_ids(events: list[Event]) -> None:
     """Set the IDs of the events in the list to their index."""
     for i, e in enumerate(events):